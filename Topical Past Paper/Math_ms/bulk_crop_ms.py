@@ -1,7 +1,16 @@
+import argparse
 import os
+import sys
 import fitz  # PyMuPDF
 import re
 
+# The manifest is shared with the bulk_processing scripts
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "bulk_processing"))
+from manifest import DEFAULT_PATH as MANIFEST_PATH, Manifest, rules_version, run_stage
+
+# Bump when a change to the cropping code changes its output
+CROP_VERSION = 1
+
 
 def increment_question_number(question_number):
     match = re.match(r"(\d+)(\([a-zA-Z]\))?", question_number)
@@ -12,11 +21,12 @@ def increment_question_number(question_number):
 
 
 def crop_pdf(input_pdf_path, output_pdf_path):
+    """Crops a question PDF to its question; returns the output path, or None if it could not be saved."""
     try:
         doc = fitz.open(input_pdf_path)
     except Exception as e:
         print(f"Error opening {input_pdf_path}: {e}")
-        return  # Skip this file and move to the next one
+        return None  # Skip this file and move to the next one
 
     file_name = os.path.basename(input_pdf_path).split('.')[0]
     question_number = file_name  # Extract question number from the filename
@@ -134,13 +144,17 @@ def crop_pdf(input_pdf_path, output_pdf_path):
         cropped_pdf.save(output_pdf_path)
         cropped_pdf.close()
         print(f"Saved cropped PDF: {output_pdf_path}")
+        return output_pdf_path
     except OSError as e:
         print(f"Error saving {output_pdf_path}: {e}")
+        return None
     finally:
         doc.close()
 
 
-def process_pdfs(input_folder, output_folder):
+def process_pdfs(input_folder, output_folder, manifest_path=MANIFEST_PATH, force=False):
+    """Crops every question PDF that the manifest does not record as cropped, unchanged, into output_folder."""
+    output_paths = {}  # input PDF -> cropped PDF
     for root, _, files in os.walk(input_folder):
         for filename in files:
             if filename.endswith(".pdf"):
@@ -148,12 +162,27 @@ def process_pdfs(input_folder, output_folder):
                 relative_path = os.path.relpath(root, input_folder)
                 output_dir = os.path.join(output_folder, relative_path)
                 os.makedirs(output_dir, exist_ok=True)
-                output_pdf_path = os.path.join(output_dir, filename)
-                crop_pdf(input_pdf_path, output_pdf_path)
+                output_paths[input_pdf_path] = os.path.join(output_dir, filename)
+
+    with Manifest(manifest_path) as manifest:
+        stats = run_stage(
+            manifest, f"crop_ms:{os.path.normpath(output_folder)}", rules_version(CROP_VERSION), output_paths,
+            lambda input_pdf_path: crop_pdf(input_pdf_path, output_paths[input_pdf_path]), force
+        )
+    print(f"Cropped {stats['processed']} PDFs, {stats['skipped']} up to date, {stats['failed']} failed")
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Crop each Maths mark scheme question PDF to its own question.")
+    parser.add_argument("--input", default="output_questions", help="Folder containing the question PDFs.")
+    parser.add_argument("--output", default="cropped_questions", help="Folder for saving cropped PDFs.")
+    parser.add_argument("--manifest", default=MANIFEST_PATH, help="Manifest of question PDFs already cropped.")
+    parser.add_argument("--force", action="store_true", help="Crop PDFs the manifest records as up to date.")
+    args = parser.parse_args()
+    process_pdfs(args.input, args.output, args.manifest, args.force)
 
 
-# Example usage:
-input_folder = "output_questions"  # Folder containing PDFs
-output_folder = "cropped_questions"  # Folder for saving cropped PDFs
-process_pdfs(input_folder, output_folder)
+if __name__ == "__main__":
+    main()
     
\ No newline at end of file
@@ -1,6 +1,15 @@
+import argparse
 import os
+import sys
 from PyPDF2 import PdfReader, PdfWriter
 
+# The manifest is shared with the bulk_processing scripts
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "bulk_processing"))
+from manifest import DEFAULT_PATH as MANIFEST_PATH, Manifest, rules_version, run_stage
+
+# Bump when a change to the rotation changes its output
+ROTATE_VERSION = 1
+
 def rotate_pdf(input_pdf, output_pdf):
     reader = PdfReader(input_pdf)
     writer = PdfWriter()
@@ -15,8 +24,10 @@ def rotate_pdf(input_pdf, output_pdf):
         writer.write(out_file)
 
     print(f"Rotated file saved as {output_pdf}")
+    return output_pdf
 
-def process_pdfs_in_directory(input_folder, output_folder):
+def process_pdfs_in_directory(input_folder, output_folder, manifest_path=MANIFEST_PATH, force=False):
+    output_paths = {}  # input PDF -> rotated PDF
     # Walk through all subdirectories and files in the input folder
     for root, _, files in os.walk(input_folder):
         for file_name in files:
@@ -27,17 +38,30 @@ def process_pdfs_in_directory(input_folder, output_folder):
                 relative_path = os.path.relpath(root, input_folder)
                 output_path_dir = os.path.join(output_folder, relative_path)
                 os.makedirs(output_path_dir, exist_ok=True)
-                output_path = os.path.join(output_path_dir, file_name)
+                output_paths[input_path] = os.path.join(output_path_dir, file_name)
+
+    # Rotate the PDFs the manifest does not record as rotated, unchanged, and save them to the new location
+    with Manifest(manifest_path) as manifest:
+        stats = run_stage(
+            manifest, f"rotate:{os.path.normpath(output_folder)}", rules_version(ROTATE_VERSION), output_paths,
+            lambda input_path: rotate_pdf(input_path, output_paths[input_path]), force
+        )
+    print(f"Rotated {stats['processed']} PDFs, {stats['skipped']} up to date, {stats['failed']} failed")
+    return stats
 
-                # Rotate the PDF and save to the new location
-                rotate_pdf(input_path, output_path)
+def main():
+    parser = argparse.ArgumentParser(description="Rotate every cropped question PDF by 90 degrees.")
+    parser.add_argument("--input", default="cropped_questions", help="Folder containing the cropped PDFs (with subdirectories).")
+    parser.add_argument("--output", default="final", help="Folder to save the rotated PDFs, maintaining the same directory structure.")
+    parser.add_argument("--manifest", default=MANIFEST_PATH, help="Manifest of PDFs already rotated.")
+    parser.add_argument("--force", action="store_true", help="Rotate PDFs the manifest records as up to date.")
+    args = parser.parse_args()
 
-# Folder paths
-input_folder = "cropped_questions"  # Folder containing the original PDFs (with subdirectories)
-output_folder = "final"  # Folder to save the rotated PDFs, maintaining the same directory structure
+    # Create output folder if it doesn't exist
+    os.makedirs(args.output, exist_ok=True)
 
-# Create output folder if it doesn't exist
-os.makedirs(output_folder, exist_ok=True)
+    # Process each PDF in the directory and its subdirectories
+    process_pdfs_in_directory(args.input, args.output, args.manifest, args.force)
 
-# Process each PDF in the directory and its subdirectories
-process_pdfs_in_directory(input_folder, output_folder)
\ No newline at end of file
+if __name__ == "__main__":
+    main()
\ No newline at end of file
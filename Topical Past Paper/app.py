@@ -1,17 +1,15 @@
 import streamlit as st
 from filter_logic import (
-    connect_to_db, get_subjects, get_topics, get_subtopics,
-    get_years, get_variants, get_paper_numbers, get_paper_variants,
-    get_difficulties, filter_papers
+    connect_to_db, get_subjects, get_facets, facet_label, select_papers
 )
-from pdf_utils import display_pdfs, download_pdf, merge_pdfs, create_zip
+from pdf_utils import display_pdfs, download_pdf, merge_pdfs, create_zip, view_mode_selector
+from prefetch import prefetch_neighbours
 from doubly_linked_list import DoublyLinkedList
 from theme_management import toggle_theme  # Import your theme toggle function
 import random
 import os
 import zipfile
 from io import BytesIO
-import time  # Import time to use sleep for simulating progress
 
 def load_css():
     with open("styles.css") as f:
@@ -21,6 +19,7 @@ def main():
     with st.sidebar:
         st.header("🌙 Theme Toggle")
         toggle_theme()  # Add theme toggle button from your theme_management.py
+    view = view_mode_selector()
     load_css()
 
     # Main app title and description
@@ -64,94 +63,101 @@ def main():
             selected_paper_variants = st.session_state.get("paper_variants_multiselect", [])
             selected_difficulties = st.session_state.get("difficulties_multiselect", [])
 
+            # Options and question counts for every dropdown, narrowed by the selections above them
+            facets = get_facets(conn, {
+                'Subject_name': selected_subject,
+                'Topic': selected_topics,
+                'Sub_topic': selected_subtopics,
+                'Year': selected_years,
+                'Variant': selected_variants,
+                'Paper_number': selected_paper_numbers,
+                'Paper_variant': selected_paper_variants
+            })
+
             if selected_subject:
                 with st.expander("Select Topics and Subtopics"):
-                    topics = get_topics(conn, selected_subject)
+                    topics = list(facets['Topic'])
                     select_all_topics = st.checkbox("Select All Topics", key="all_topics")
                     selected_topics = st.multiselect(
                         "Topics:",
                         topics,
                         default=topics if select_all_topics else [],
                         key="topics_multiselect",
+                        format_func=facet_label(facets['Topic']),
                         help="Choose one or more topics to narrow down the papers."
                     )
 
                     if selected_topics:
-                        subtopics = get_subtopics(conn, selected_subject, selected_topics)
+                        subtopics = list(facets['Sub_topic'])
                         select_all_subtopics = st.checkbox("Select All Subtopics", key="all_subtopics")
                         selected_subtopics = st.multiselect(
                             "Subtopics:",
                             subtopics,
                             default=subtopics if select_all_subtopics else [],
                             key="subtopics_multiselect",
+                            format_func=facet_label(facets['Sub_topic']),
                             help="Choose subtopics for more specific filtering."
                         )
 
                 with st.expander("Select Year and Variants"):
-                    years = get_years(conn, selected_subject, selected_topics, selected_subtopics)
+                    years = list(facets['Year'])
                     select_all_years = st.checkbox("Select All Years", key="all_years")
                     selected_years = st.multiselect(
                         "Years:",
                         years,
                         default=years if select_all_years else [],
                         key="years_multiselect",
+                        format_func=facet_label(facets['Year']),
                         help="Select the years for which you want to see past papers."
                     )
 
                     if selected_years:
-                        variants = get_variants(conn, selected_subject, selected_years, selected_topics, selected_subtopics)
+                        variants = list(facets['Variant'])
                         select_all_variants = st.checkbox("Select All Variants", key="all_variants")
                         selected_variants = st.multiselect(
                             "Variants:",
                             variants,
                             default=variants if select_all_variants else [],
                             key="variants_multiselect",
+                            format_func=facet_label(facets['Variant']),
                             help="Choose paper variants if applicable."
                         )
 
                 with st.expander("Select Paper Numbers and Variants"):
                     if selected_variants:
-                        paper_numbers = get_paper_numbers(
-                            conn, selected_subject, selected_years,
-                            selected_variants, selected_topics, selected_subtopics
-                        )
+                        paper_numbers = list(facets['Paper_number'])
                         select_all_paper_numbers = st.checkbox("Select All Paper Numbers", key="all_paper_numbers")
                         selected_paper_numbers = st.multiselect(
                             "Paper Numbers:",
                             paper_numbers,
                             default=paper_numbers if select_all_paper_numbers else [],
                             key="paper_numbers_multiselect",
+                            format_func=facet_label(facets['Paper_number']),
                             help="Select specific paper numbers."
                         )
 
                         if selected_paper_numbers:
-                            paper_variants = get_paper_variants(
-                                conn, selected_subject, selected_years,
-                                selected_variants, selected_paper_numbers,
-                                selected_topics, selected_subtopics
-                            )
+                            paper_variants = list(facets['Paper_variant'])
                             select_all_paper_variants = st.checkbox("Select All Paper Variants", key="all_paper_variants")
                             selected_paper_variants = st.multiselect(
                                 "Paper Variants:",
                                 paper_variants,
                                 default=paper_variants if select_all_paper_variants else [],
                                 key="paper_variants_multiselect",
+                                format_func=facet_label(facets['Paper_variant']),
                                 help="Choose paper variants if available."
                             )
 
                 with st.expander("Select Difficulty Levels"):
                     if selected_paper_variants:
-                        difficulties = get_difficulties(
-                            conn, selected_subject, selected_years,
-                            selected_variants, selected_paper_numbers,
-                            selected_paper_variants, selected_topics, selected_subtopics
-                        )
+                        difficulties = list(facets['Difficulty'])
                         select_all_difficulties = st.checkbox("Select All Difficulties", key="all_difficulties")
                         selected_difficulties = st.multiselect(
                             "Difficulty Levels:",
                             difficulties,
                             default=difficulties if select_all_difficulties else [],
                             key="difficulties_multiselect",
+                            format_func=facet_label(facets['Difficulty']),
                             help="Filter papers by difficulty level."
                         )
 
@@ -159,12 +165,11 @@ def main():
         st.subheader("🔍 Filtered Results")
 
         if st.button("Generate Papers", key="generate_papers_button"):
-            progress_bar = st.progress(0)  # Initialize progress bar
-
             # Use a spinner only for filtering the papers (before the filtering is done)
             with st.spinner("Loading papers..."):
-                filtered_data = filter_papers(
+                filtered_data = select_papers(
                     conn,
+                    ('Question', 'Answer'),
                     selected_subject,
                     selected_years,
                     selected_variants,
@@ -175,27 +180,12 @@ def main():
                     selected_paper_variants
                 )
 
-            # If papers are found, continue processing and update progress bar
+            # If papers are found, shuffle them and start at the first one
             if filtered_data:
                 st.success(f"Found {len(filtered_data)} papers matching your criteria.")
-                
-                # Separate lists for questions and answers
-                question_paths_list = []
-                answer_paths_list = []
-
-                for i, paper in enumerate(filtered_data):
-                    question_path = paper[11]  # Assuming question PDF path is at index 11
-                    answer_path = paper[12]   # Assuming answer PDF path is at index 12
-                    question_paths_list.append(question_path)
-                    answer_paths_list.append(answer_path)
-
-                    # Update progress bar manually with small increments
-                    progress = (i + 1) / len(filtered_data) * 100
-                    progress_bar.progress(int(progress))  # Update the progress bar
-                    time.sleep(0.0005)  # Simulate some delay
-
-                # Shuffle both lists in parallel to maintain the pairing
-                combined = list(zip(question_paths_list, answer_paths_list))
+
+                # Shuffle questions and answers together to maintain the pairing
+                combined = [(paper.Question, paper.Answer) for paper in filtered_data]
                 random.shuffle(combined)
                 question_paths_list, answer_paths_list = zip(*combined)
 
@@ -217,7 +207,10 @@ def main():
                     st.rerun()
 
             # Display the appropriate PDF based on whether the question or answer should be visible
-            display_pdfs(question_pdf_path, answer_pdf_path, show_question=st.session_state.show_question)
+            display_pdfs(question_pdf_path, answer_pdf_path, show_question=st.session_state.show_question, subject_name=selected_subject, view=view)
+
+            # Render the next questions and this question's answer while the user reads
+            prefetch_neighbours(st.session_state.question_paths_list, current_index, current_answer=answer_pdf_path, subject_name=selected_subject, view=view)
 
             # Navigation buttons (Next and Previous)
             col1, col2, col3 = st.columns([1, 3, 1])
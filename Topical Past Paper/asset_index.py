@@ -0,0 +1,60 @@
+import os
+import sqlite3
+from contextlib import contextmanager
+
+from connection_pool import get_pool
+
+# The pre-rendered images (prerender.py) and question packs (build_packs.py) are indexed
+# in a file of their own. Writing them to past_papers.db would change its mtime, which
+# the facet index, the result caches and the connection pool all read as new question data.
+DEFAULT_PATH = "asset_index.db"
+
+SCHEMA = [
+    # One row per page and width of every question and mark scheme PDF, stamped with the
+    # PDF's mtime so stale images are ignored.
+    """
+    CREATE TABLE IF NOT EXISTS rendered_pages (
+        source TEXT NOT NULL,
+        width INTEGER NOT NULL,
+        page INTEGER NOT NULL,
+        source_mtime_ns INTEGER NOT NULL,
+        image TEXT NOT NULL,
+        height INTEGER NOT NULL,
+        bytes INTEGER NOT NULL,
+        PRIMARY KEY (source, width, page)
+    ) WITHOUT ROWID
+    """,
+    # Where each question and mark scheme PDF sits inside its subject's pack PDF.
+    """
+    CREATE TABLE IF NOT EXISTS question_pack_pages (
+        source TEXT PRIMARY KEY,
+        pack TEXT NOT NULL,
+        first_page INTEGER NOT NULL,
+        page_count INTEGER NOT NULL,
+        source_mtime_ns INTEGER NOT NULL
+    ) WITHOUT ROWID
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_question_pack_pages_pack ON question_pack_pages (pack)",
+]
+
+def open_index(path=DEFAULT_PATH):
+    """Open the asset index for writing, creating its tables on first use."""
+    conn = sqlite3.connect(path)
+    for statement in SCHEMA:
+        conn.execute(statement)
+    conn.commit()
+    return conn
+
+@contextmanager
+def read_index(path=DEFAULT_PATH):
+    """
+    Check out a pooled, read-only connection to the asset index, or None when neither
+    batch command has created it yet.
+
+    Use as 'with read_index() as conn:', like filter_logic.connect_to_db.
+    """
+    if not os.path.exists(path):
+        yield None
+        return
+    with get_pool(path).connection() as conn:
+        yield conn
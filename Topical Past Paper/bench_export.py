@@ -0,0 +1,96 @@
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+
+from bench_merge import sample_sources
+from pdf_merge import merge_documents
+from zip_export import build_zip, file_members
+
+def peak_rss():
+    """Return the peak resident set size of this process in bytes, or None where unsupported (Windows)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+def export_previous(question_paths, answer_paths, include_questions):
+    """The previous export: merged PDFs written to files, then deflated into a BytesIO from disk."""
+    question_pdf, _ = merge_documents(question_paths)
+    answer_pdf, _ = merge_documents(answer_paths)
+    with tempfile.TemporaryDirectory() as folder:
+        outputs = {"merged_question_paper.pdf": question_pdf, "merged_answer_sheet.pdf": answer_pdf}
+        for name, data in outputs.items():
+            with open(os.path.join(folder, name), "wb") as f:
+                f.write(data)
+        del question_pdf, answer_pdf, outputs
+        zip_buffer = BytesIO()
+        with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as zip_file:
+            for name in ("merged_question_paper.pdf", "merged_answer_sheet.pdf"):
+                zip_file.write(os.path.join(folder, name), name)
+            if include_questions:
+                for name, path in file_members(question_paths, "questions") + file_members(answer_paths, "answers"):
+                    zip_file.write(path, name)
+        zip_buffer.seek(0)
+        return zip_buffer.read()  # What st.download_button does with a BytesIO
+
+def export_streaming(question_paths, answer_paths, include_questions):
+    """The current export: merge results and question files streamed into one ZIP_STORED archive."""
+    question_pdf, _ = merge_documents(question_paths)
+    answer_pdf, _ = merge_documents(answer_paths)
+    members = [("merged_question_paper.pdf", question_pdf), ("merged_answer_sheet.pdf", answer_pdf)]
+    if include_questions:
+        members += file_members(question_paths, "questions") + file_members(answer_paths, "answers")
+    return build_zip(members)
+
+EXPORTS = {"previous": export_previous, "streaming": export_streaming}
+
+def measure(method, question_paths, answer_paths, include_questions):
+    """Run one export in this (fresh) process; returns seconds, ZIP bytes, Python heap peak and peak RSS."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    data = EXPORTS[method](question_paths, answer_paths, include_questions)
+    elapsed = time.perf_counter() - start
+    _, heap_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, len(data), heap_peak, peak_rss()
+
+def run(db_path, count, include_questions, subject=None):
+    conn = sqlite3.connect(db_path)
+    try:
+        question_paths = sample_sources(conn, count, subject)
+    finally:
+        conn.close()
+    # Mark schemes live next to the questions under ms/ instead of qp/
+    answer_paths = [path.replace("/qp/", "/ms/") for path in question_paths]
+
+    megabyte = 1024 * 1024
+    print(f"{count} questions, individual PDFs {'included' if include_questions else 'left out'}")
+    for method in EXPORTS:
+        # A process per export, so each peak RSS only covers that export
+        with ProcessPoolExecutor(max_workers=1) as pool:
+            elapsed, size, heap_peak, rss = pool.submit(
+                measure, method, question_paths, answer_paths, include_questions).result()
+        rss_text = f"{rss / megabyte:7.1f} MB" if rss is not None else "    n/a"
+        print(f"{method:<10} {elapsed:7.2f} s  zip {size / megabyte:7.1f} MB  "
+              f"Python peak {heap_peak / megabyte:7.1f} MB  peak RSS {rss_text}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare time and peak memory of the worksheet ZIP export.")
+    parser.add_argument("--db", default="past_papers.db", help="Path to the SQLite database file.")
+    parser.add_argument("--questions", type=int, default=500, help="Worksheet size in questions.")
+    parser.add_argument("--include-questions", action="store_true", help="Also add every question and mark scheme PDF.")
+    parser.add_argument("--subject", default=None, help="Only use questions of this subject.")
+    args = parser.parse_args()
+    run(args.db, args.questions, args.include_questions, args.subject)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+import argparse
+import itertools
+import os
+import sqlite3
+import statistics
+import time
+from io import BytesIO
+
+from PyPDF2 import PdfMerger
+
+from pdf_merge import merge_documents
+
+def sample_sources(conn, count, subject=None):
+    """
+    Return `count` existing question PDFs for a worksheet, repeating them if the
+    database has fewer (a worksheet of 1000 questions needs 1000 inputs either way).
+    """
+    query = "SELECT Question FROM question_facts WHERE has_question = 1"
+    params = []
+    if subject:
+        query += " AND Subject_name = ?"
+        params.append(subject)
+    paths = [row[0] for row in conn.execute(query + " ORDER BY id", params) if os.path.exists(row[0])]
+    if not paths:
+        raise SystemExit("No question PDFs found on disk; run generate_paths.py and the split scripts first.")
+    return list(itertools.islice(itertools.cycle(paths), count))
+
+def merge_pypdf2(pdf_paths):
+    """The previous merger: PyPDF2.PdfMerger written to memory."""
+    merger = PdfMerger()
+    for pdf_path in pdf_paths:
+        merger.append(pdf_path)
+    buffer = BytesIO()
+    merger.write(buffer)
+    merger.close()
+    return buffer.getvalue()
+
+def merge_fitz(pdf_paths):
+    return merge_documents(pdf_paths)[0]
+
+def time_merge(merge, pdf_paths, repeat):
+    """Return the median time in seconds and the output size of a merger."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        data = merge(pdf_paths)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings), len(data)
+
+def run(db_path, sizes, repeat, subject=None):
+    conn = sqlite3.connect(db_path)
+    try:
+        sources = sample_sources(conn, max(sizes), subject)
+    finally:
+        conn.close()
+
+    print(f"{'questions':>9}  {'PyPDF2':>10} {'size':>9}  {'PyMuPDF':>10} {'size':>9}  speed-up")
+    for size in sizes:
+        pdf_paths = sources[:size]
+        old_time, old_bytes = time_merge(merge_pypdf2, pdf_paths, repeat)
+        new_time, new_bytes = time_merge(merge_fitz, pdf_paths, repeat)
+        print(f"{size:>9}  {old_time:>9.2f}s {old_bytes / 1024 / 1024:>7.1f}MB  "
+              f"{new_time:>9.2f}s {new_bytes / 1024 / 1024:>7.1f}MB  {old_time / new_time:>7.1f}x")
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the PyPDF2 and PyMuPDF worksheet mergers.")
+    parser.add_argument("--db", default="past_papers.db", help="Path to the SQLite database file.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50, 200, 1000], help="Worksheet sizes in questions.")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per size; the median is reported.")
+    parser.add_argument("--subject", default=None, help="Only use questions of this subject.")
+    args = parser.parse_args()
+    run(args.db, args.sizes, args.repeat, args.subject)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+import argparse
+import glob
+import hashlib
+import os
+import re
+import sqlite3
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import fitz
+
+from asset_index import DEFAULT_PATH as INDEX_PATH, open_index
+from progress import ConsoleBar, ProgressReporter
+
+DEFAULT_OUTPUT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "question_packs")
+
+def list_sources(conn, subject=None):
+    """
+    Return {(subject, subject code, kind): [PDF paths]} for every question ('qp') and
+    mark scheme ('ms') PDF, sorted by path so a pack's fingerprint does not depend on row
+    order. A question tagged with several topics is listed once.
+    """
+    query = """
+        SELECT Subject_name, Subject_code, 'qp', Question FROM question_facts WHERE has_question = 1 {subject}
+        UNION
+        SELECT Subject_name, Subject_code, 'ms', Answer FROM question_facts WHERE answer_kind = 1 {subject}
+        ORDER BY 1, 2, 3, 4
+    """
+    params = []
+    if subject:
+        params = [subject, subject]
+    query = query.format(subject="AND Subject_name = ?" if subject else "")
+    groups = {}
+    for subject_name, code, kind, source in conn.execute(query, params):
+        groups.setdefault((subject_name, code, kind), []).append(source)
+    return groups
+
+def fingerprint(sources):
+    """Return (hash, [(source, mtime_ns)]) of the PDFs of a pack that exist on disk."""
+    stamped = []
+    for source in sources:
+        try:
+            stamped.append((source, os.stat(source).st_mtime_ns))
+        except OSError:
+            continue
+    digest = hashlib.sha1("\n".join(f"{source}\0{mtime_ns}" for source, mtime_ns in stamped).encode("utf-8"))
+    return digest.hexdigest(), stamped
+
+def pack_prefix(output_dir, subject, code, kind):
+    """
+    Start of the file names of a subject's packs. Subjects can share a syllabus code
+    (Pure Math and Statistics are both 9709), so the subject name is part of it.
+    """
+    name = re.sub(r"[^A-Za-z0-9]+", "_", subject).strip("_")
+    return os.path.join(output_dir, f"{code}-{name}-{kind}-")
+
+def pack_path(output_dir, subject, code, kind, digest):
+    """Packs are named after their contents, so a rebuild never overwrites a pack the app has open."""
+    return f"{pack_prefix(output_dir, subject, code, kind)}{digest[:12]}.pdf"
+
+def build_pack(stamped, path):
+    """
+    Copy every PDF of a pack into one document and save it under path.
+
+    Runs in a worker process. Returns the question_pack_pages rows
+    (source, pack, first_page, page_count, source_mtime_ns) and the PDFs that failed.
+    """
+    rows = []
+    failed = []
+    with fitz.open() as pack:
+        for source, mtime_ns in stamped:
+            first_page = pack.page_count
+            try:
+                with fitz.open(source) as doc:
+                    pack.insert_pdf(doc)
+            except Exception as e:
+                failed.append(f"{source}: {e}")
+                continue
+            rows.append((source, path, first_page, pack.page_count - first_page, mtime_ns))
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        os.close(fd)
+        try:
+            pack.save(temp_path, garbage=3, deflate=True)
+            os.replace(temp_path, path)
+        except Exception:
+            os.unlink(temp_path)
+            raise
+    return rows, failed
+
+def store_pack(index, output_dir, subject, code, kind, path, rows):
+    """Point the index at a new pack, then delete the pack files it replaces."""
+    prefix = pack_prefix(output_dir, subject, code, kind)
+    old_packs = [pack for pack in glob.glob(glob.escape(prefix) + "*.pdf") if pack != path]
+    index.execute("DELETE FROM question_pack_pages WHERE substr(pack, 1, ?) = ?", (len(prefix), prefix))
+    index.executemany("INSERT OR REPLACE INTO question_pack_pages VALUES (?, ?, ?, ?, ?)", rows)
+    index.commit()
+    for pack in old_packs:
+        try:
+            os.unlink(pack)
+        except OSError:
+            pass  # Still open in the app on Windows; the next build removes it
+
+def build_packs(conn, index, output_dir=DEFAULT_OUTPUT, subject=None, workers=None, force=False):
+    """
+    Bake the question and mark scheme PDFs listed in past_papers.db (conn) into one pack
+    PDF per subject and kind, and record each PDF's page range in the question_pack_pages
+    table of the asset index (index).
+
+    A pack is rebuilt only when a PDF was added, removed or modified since it was built.
+
+    Returns:
+        dict: Counters for built, skipped and failed packs, PDFs packed and bytes written.
+    """
+    groups = list_sources(conn, subject)
+    stats = {"packs": len(groups), "built": 0, "skipped": 0, "failed": 0, "pdfs": 0, "bytes": 0}
+
+    pending = []
+    for (subject_name, code, kind), sources in groups.items():
+        digest, stamped = fingerprint(sources)
+        if not stamped:
+            continue  # None of the PDFs has been generated yet
+        path = pack_path(output_dir, subject_name, code, kind, digest)
+        indexed = index.execute("SELECT 1 FROM question_pack_pages WHERE pack = ? LIMIT 1", (path,)).fetchone()
+        if not force and indexed and os.path.exists(path):
+            stats["skipped"] += 1
+            continue
+        pending.append((subject_name, code, kind, path, stamped))
+
+    reporter = ProgressReporter(ConsoleBar(), len(pending), unit="packs built", interval=5)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(build_pack, stamped, path): (subject_name, code, kind, path)
+            for subject_name, code, kind, path, stamped in pending
+        }
+        for future in as_completed(futures):
+            subject_name, code, kind, path = futures[future]
+            try:
+                rows, failed = future.result()
+            except Exception as e:
+                print(f"Error building {path}: {e}")
+                stats["failed"] += 1
+                reporter.advance()
+                continue
+            for message in failed:
+                print(f"Skipped {message}")
+            store_pack(index, output_dir, subject_name, code, kind, path, rows)
+            stats["built"] += 1
+            stats["pdfs"] += len(rows)
+            stats["bytes"] += os.path.getsize(path)
+            reporter.advance()
+    reporter.finish()
+    return stats
+
+def main():
+    parser = argparse.ArgumentParser(description="Bake question and mark scheme PDFs into per-subject question packs.")
+    parser.add_argument("--db", default="past_papers.db", help="Path to the SQLite database file.")
+    parser.add_argument("--index", default=INDEX_PATH, help="Asset index the pack pages are recorded in.")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="Folder the packs are written to.")
+    parser.add_argument("--subject", default=None, help="Only build the packs of this subject.")
+    parser.add_argument("--workers", type=int, default=None, help="Build processes (default: one per CPU).")
+    parser.add_argument("--force", action="store_true", help="Rebuild packs that are already up to date.")
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.db)
+    index = open_index(args.index)
+    try:
+        if conn.execute("PRAGMA user_version").fetchone()[0] < 2:
+            raise SystemExit("The database has no question_facts view; run database/migrations.py first.")
+        start = time.perf_counter()
+        stats = build_packs(conn, index, os.path.abspath(args.output), args.subject, args.workers, args.force)
+        elapsed = time.perf_counter() - start
+        print(f"Built {stats['built']} packs of {stats['pdfs']} PDFs ({stats['bytes'] / 1024 / 1024:.1f} MiB), "
+              f"{stats['skipped']} up to date, {stats['failed']} failed in {elapsed:.1f} s")
+    finally:
+        index.close()
+        conn.close()
+
+if __name__ == "__main__":
+    main()
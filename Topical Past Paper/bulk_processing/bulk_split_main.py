@@ -1,8 +1,11 @@
+import argparse
 import fitz  # PyMuPDF
 import os
 import re
 import logging
 
+from manifest import DEFAULT_PATH as MANIFEST_PATH, Manifest, rules_version, run_stage
+
 # Set up logging
 logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger()
@@ -14,6 +17,9 @@ mapping_dict = {
     's': 'May_June'
 }
 
+# Bump when a change to the splitting code changes its output
+SPLIT_VERSION = 1
+
 def find_question_number_in_area(page, search_area=75):
     """Searches for question numbers within the leftmost search area of the page."""
     rect = fitz.Rect(0, 0, search_area, page.rect.height)
@@ -26,7 +32,13 @@ def find_question_number_in_area(page, search_area=75):
     return None
 
 def split_pdf_into_questions(input_pdf_path, output_dir, max_questions=12):
-    """Splits the PDF into separate files by question, up to max_questions."""
+    """
+    Splits the PDF into separate files by question, up to max_questions.
+
+    Returns the paths of the question PDFs written, or None if the paper or one of its
+    questions could not be processed.
+    """
+    outputs = []
     try:
         # Open the input PDF
         pdf_document = fitz.open(input_pdf_path)
@@ -48,7 +60,7 @@ def split_pdf_into_questions(input_pdf_path, output_dir, max_questions=12):
             if detected_question is not None and detected_question not in saved_questions:
                 if question_start_page is not None:
                     # Save the previous question's pages
-                    save_question_pdf(pdf_document, question_start_page, page_number - 1, current_question, output_dir)
+                    outputs.append(save_question_pdf(pdf_document, question_start_page, page_number - 1, current_question, output_dir))
                     saved_questions.add(current_question)
                     current_question += 1
 
@@ -57,7 +69,7 @@ def split_pdf_into_questions(input_pdf_path, output_dir, max_questions=12):
 
         # Save the final question if it hasn't been saved
         if question_start_page is not None and current_question not in saved_questions:
-            save_question_pdf(pdf_document, question_start_page, len(pdf_document) - 1, current_question, output_dir)
+            outputs.append(save_question_pdf(pdf_document, question_start_page, len(pdf_document) - 1, current_question, output_dir))
             saved_questions.add(current_question)
 
         pdf_document.close()
@@ -66,9 +78,13 @@ def split_pdf_into_questions(input_pdf_path, output_dir, max_questions=12):
 
     except Exception as e:
         logger.error(f"Error processing PDF {input_pdf_path}: {e}", exc_info=True)
+        return None
+    if None in outputs:
+        return None
+    return outputs
 
 def save_question_pdf(pdf_document, start_page, end_page, question_number, output_dir):
-    """Saves the specified pages as a separate PDF file for each question."""
+    """Saves the specified pages as a separate PDF file for each question; returns its path, or None on error."""
     try:
         pdf_writer = fitz.open()
         for page_index in range(start_page, end_page + 1):
@@ -80,12 +96,20 @@ def save_question_pdf(pdf_document, start_page, end_page, question_number, outpu
         pdf_writer.save(output_pdf_path)
         pdf_writer.close()
         logger.info(f"Created: {output_pdf_path}")
+        return output_pdf_path
     except Exception as e:
         logger.error(f"Error saving question PDF {question_number} to {output_dir}: {e}", exc_info=True)
+        return None
 
-def process_pdf_folder(input_folder, output_base_folder):
-    """Processes all PDF files in a folder and splits them into questions."""
-    for filename in os.listdir(input_folder):
+def process_pdf_folder(input_folder, output_base_folder, manifest_path=MANIFEST_PATH, force=False):
+    """
+    Processes all PDF files in a folder and splits them into questions.
+
+    Papers the manifest records as split, unchanged, into output_base_folder are skipped
+    unless force is set.
+    """
+    output_dirs = {}  # input PDF -> folder its questions are written to
+    for filename in sorted(os.listdir(input_folder)):
         if filename.endswith(".pdf"):
             # Updated regex to match both `_qp_` and `_ms_`
             match = re.match(r"(\d{4})_([wms])(\d{2})_(qp|ms)_(\d{1,2})_cleaned", filename)
@@ -108,13 +132,26 @@ def process_pdf_folder(input_folder, output_base_folder):
                 mapping = mapping_dict.get(mapping_code, "Unknown_Mapping")
                 output_dir = os.path.join(output_base_folder, subject_code, year, mapping, paper_type, paper_number)
 
-                input_pdf_path = os.path.join(input_folder, filename)
-                split_pdf_into_questions(input_pdf_path, output_dir)
+                output_dirs[os.path.join(input_folder, filename)] = output_dir
             else:
                 logger.warning(f"Filename format not recognized: {filename}")
 
-# Example usage
-input_folder = "output_cleaned"  # Adjust to your input folder path
-output_base_folder = "output_questions"  # Adjust to your output folder path
-
-process_pdf_folder(input_folder, output_base_folder)
+    with Manifest(manifest_path) as manifest:
+        stats = run_stage(
+            manifest, f"split:{os.path.normpath(output_base_folder)}", rules_version(SPLIT_VERSION),
+            output_dirs, lambda input_pdf_path: split_pdf_into_questions(input_pdf_path, output_dirs[input_pdf_path]), force
+        )
+    logger.info(f"Split {stats['processed']} papers, {stats['skipped']} up to date, {stats['failed']} failed")
+    return stats
+
+def main():
+    parser = argparse.ArgumentParser(description="Split cleaned papers into one PDF per question.")
+    parser.add_argument("--input", default="output_cleaned", help="Folder of cleaned papers.")
+    parser.add_argument("--output", default="output_questions", help="Folder the question PDFs are written to.")
+    parser.add_argument("--manifest", default=MANIFEST_PATH, help="Manifest of papers already split.")
+    parser.add_argument("--force", action="store_true", help="Split papers the manifest records as up to date.")
+    args = parser.parse_args()
+    process_pdf_folder(args.input, args.output, args.manifest, args.force)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,342 @@
+import argparse
+import os
+import re
+import tempfile
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import fitz  # PyMuPDF
+
+from clean_profiles import RULES_PATH, load_profiles, texts_to_remove
+from manifest import DEFAULT_PATH as MANIFEST_PATH, Manifest, rules_version
+from page_analysis import BoilerplateMatcher, PageAnalysis, RuleTimer
+
+PAGE_NUMBER = re.compile(r"^\d+[-/]*$")
+
+# Bump when a change to the cleaning code changes its output, so the manifest reprocesses
+# every paper
+CLEAN_VERSION = 2
+
+# A worker still busy with a paper this many times its timeout after it started is taken
+# to be stuck inside MuPDF (a malformed PDF can hang a single fitz call, where the
+# worker's own deadline checks never run) and is killed by the parent. The margin covers
+# the one extra paper ProcessPoolExecutor hands out before a worker is free.
+HARD_TIMEOUT_FACTOR = 2
+POLL_SECONDS = 1.0
+
+class CleanTimeout(Exception):
+    """Raised inside a worker when a paper takes longer than its time budget."""
+
+def check_deadline(deadline, file_name):
+    if deadline is not None and time.monotonic() > deadline:
+        raise CleanTimeout(f"{file_name} exceeded its time budget")
+
+def is_blank(analysis, page_number, page_count, profile):
+    """Return True if the page holds no question according to the profile's page rules."""
+    page_text = analysis.text.upper()
+    for rule in profile["page_rules"]:
+        if page_number >= rule.get("first_pages", page_count):
+            continue
+        if "all" in rule and all(phrase in page_text for phrase in rule["all"]):
+            return True
+        if "any" in rule and any(phrase in page_text for phrase in rule["any"]):
+            return True
+    return False
+
+def redaction_rects(analysis, profile, matcher, timer):
+    """Return the boxes of the header, case-sensitive words and boilerplate of one page."""
+    rects = []
+    with timer.time("header"):
+        header_height = profile["header_height"]
+        if profile["header"]:
+            for rect, text in analysis.blocks:
+                if profile["header"] == "all":
+                    in_header = rect.y0 <= header_height
+                else:  # 'numbers': only page numbers such as "3" or "12-"
+                    in_header = rect.y0 < header_height and PAGE_NUMBER.match(text.strip())
+                if in_header:
+                    rects.append(rect)
+
+    with timer.time("case_sensitive"):
+        for word in profile["case_sensitive_words"]:
+            rects.extend(analysis.find_exact(word))
+
+    with timer.time("boilerplate"):
+        rects.extend(matcher.rects(analysis))
+    return rects
+
+def redact_footer(page, cutoff):
+    """Redact everything in the bottom `cutoff` points of a page (the last page's footer)."""
+    height = page.rect.height
+    page.add_redact_annot(fitz.Rect(0, height - cutoff, page.rect.width, height))
+    page.apply_redactions()
+
+def clean_document(doc, profile, matcher, deadline=None, file_name="", timer=None):
+    """
+    Clean an open paper in place: drop the cover pages and pages without questions,
+    then redact headers, boilerplate and the last page's footer.
+
+    Each page's text is extracted once (see PageAnalysis) and every rule runs against
+    that, with all the paper's boilerplate in one matcher (see BoilerplateMatcher); the
+    time spent in each rule is added to timer.
+    """
+    timer = timer or RuleTimer()
+    for _ in range(min(profile["leading_pages"], len(doc))):
+        doc.delete_page(0)
+
+    page_count = len(doc)
+    blank_pages = []
+    for page_number, page in enumerate(doc):
+        with timer.time("extract"):
+            analysis = PageAnalysis(page)
+        with timer.time("page_rules"):
+            blank = is_blank(analysis, page_number, page_count, profile)
+        if blank:
+            blank_pages.append(page_number)
+            continue
+        rects = redaction_rects(analysis, profile, matcher, timer)
+        if rects:
+            with timer.time("apply_redactions"):
+                for rect in rects:
+                    page.add_redact_annot(rect)
+                page.apply_redactions()
+        check_deadline(deadline, file_name)
+
+    for page_number in reversed(blank_pages):
+        doc.delete_page(page_number)
+
+    if profile["footer_cutoff"] and len(doc) > 0:
+        with timer.time("footer"):
+            redact_footer(doc[-1], profile["footer_cutoff"])
+
+def output_path(output_dir, profile, file_name):
+    return os.path.join(output_dir, profile["output_name"].format(name=file_name, stem=file_name[:-len(".pdf")]))
+
+def clean_file(input_pdf, output_pdf, profile, timeout=None):
+    """
+    Clean one paper and save it; runs in a worker process.
+
+    Errors are returned rather than raised, so one broken paper never stops the run, and
+    the output is written through a temporary file, so a failed paper leaves no partial PDF.
+
+    Returns:
+        dict: file, pages_in, pages_out, seconds, timings (seconds per rule) and error
+        (None on success).
+    """
+    start = time.monotonic()
+    file_name = os.path.basename(input_pdf)
+    deadline = start + timeout if timeout else None
+    result = {"file": file_name, "pages_in": 0, "pages_out": 0, "seconds": 0.0, "timings": {}, "error": None}
+    timer = RuleTimer()
+    try:
+        with fitz.open(input_pdf) as doc:
+            result["pages_in"] = len(doc)
+            matcher = BoilerplateMatcher(texts_to_remove(profile, file_name), profile["patterns"])
+            clean_document(doc, profile, matcher, deadline, file_name, timer)
+            result["pages_out"] = len(doc)
+
+            os.makedirs(os.path.dirname(os.path.abspath(output_pdf)), exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(output_pdf)), suffix=".tmp")
+            os.close(fd)
+            try:
+                with timer.time("save"):
+                    doc.save(temp_path)
+                os.replace(temp_path, output_pdf)
+            except Exception:
+                os.unlink(temp_path)
+                raise
+    except CleanTimeout as e:
+        result["error"] = f"timeout: {e}"
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    result["seconds"] = time.monotonic() - start
+    result["timings"] = timer.seconds
+    return result
+
+def kill_pool(pool):
+    """Kill a process pool's workers at once, whatever they are running."""
+    # ProcessPoolExecutor has no public way to stop a worker in the middle of a call
+    for process in list((pool._processes or {}).values()):
+        process.kill()
+    pool.shutdown(wait=True, cancel_futures=True)
+
+def run_bounded(fn, jobs, workers, max_in_flight, hard_timeout=None, timed_out=None):
+    """
+    Yield the results of fn(*job) for every job, in completion order, from a process
+    pool of `workers` processes with at most max_in_flight jobs submitted at a time.
+
+    A job still running hard_timeout seconds after a worker picked it up is taken to be
+    stuck: the pool's processes are killed, timed_out(job, seconds) is yielded as the
+    job's result, and the jobs that were in flight with it are resubmitted to a new pool.
+    """
+    pending = iter(jobs)
+    retry = []
+    in_flight = {}  # future -> job
+    started = {}  # future -> when it was first seen running
+    pool = ProcessPoolExecutor(max_workers=workers)
+    try:
+        while True:
+            while len(in_flight) < max_in_flight:
+                job = retry.pop() if retry else next(pending, None)
+                if job is None:
+                    break
+                in_flight[pool.submit(fn, *job)] = job
+            if not in_flight:
+                return
+            done, _ = wait(in_flight, timeout=POLL_SECONDS if hard_timeout else None, return_when=FIRST_COMPLETED)
+            for future in done:
+                del in_flight[future]
+                started.pop(future, None)
+                yield future.result()
+            if not hard_timeout:
+                continue
+
+            now = time.monotonic()
+            stuck = []
+            for future in in_flight:
+                if future.running():
+                    since = started.setdefault(future, now)
+                    if now - since > hard_timeout:
+                        stuck.append(future)
+            if not stuck:
+                continue
+            kill_pool(pool)
+            for future in stuck:
+                yield timed_out(in_flight.pop(future), now - started[future])
+            for future, job in in_flight.items():
+                if future.done() and not future.cancelled() and future.exception() is None:
+                    yield future.result()
+                else:
+                    retry.append(job)
+            in_flight.clear()
+            started.clear()
+            pool = ProcessPoolExecutor(max_workers=workers)
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+def killed_result(job, seconds):
+    """Result of a paper whose worker run_bounded killed, shaped like clean_file's."""
+    return {"file": os.path.basename(job[0]), "pages_in": 0, "pages_out": 0, "seconds": seconds, "timings": {},
+            "error": f"timeout: worker killed after {seconds:.0f} s", "killed": True}
+
+def skip_current(manifest, stage, version, input_dir, file_names, stats):
+    """
+    Return the papers the manifest does not record as done for the stage, counting the
+    others in stats["skipped"] and naming those skipped because they failed before.
+    """
+    failures = manifest.failures(stage)
+    stale = []
+    for file_name in file_names:
+        path = os.path.join(input_dir, file_name)
+        if not manifest.is_current(stage, path, version):
+            stale.append(file_name)
+        elif os.path.normpath(path) in failures:
+            print(f"Skipped {file_name}: {failures[os.path.normpath(path)]} (use --force to retry)")
+    stats["skipped"] = len(file_names) - len(stale)
+    return stale
+
+def clean_folder(input_dir, output_dir, profile, workers=None, timeout=120, max_in_flight=None,
+                 manifest_path=MANIFEST_PATH, force=False):
+    """
+    Clean every PDF in input_dir with a profile (see clean_profiles.load_profiles), in a
+    process pool.
+
+    At most max_in_flight papers (default: two per worker) are queued at a time, so a
+    folder of thousands of papers never piles up thousands of pending futures. A paper
+    that overruns its timeout stops at the next page; one stuck inside a single MuPDF
+    call is killed from here after HARD_TIMEOUT_FACTOR times the timeout and recorded in
+    the manifest as failed, so later runs skip it until it changes or force is set.
+
+    Papers the manifest records as cleaned into output_dir, unchanged and with the same
+    profile, are skipped unless force is set; pass manifest_path=None to clean
+    everything without a manifest.
+
+    Returns:
+        dict: Counters for papers, skipped and failed papers and pages, the elapsed
+        time and the seconds spent in each rule, summed over all workers.
+    """
+    file_names = sorted(name for name in os.listdir(input_dir) if name.endswith(".pdf"))
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = max_in_flight or workers * 2
+    stats = {"papers": 0, "skipped": 0, "failed": 0, "pages_in": 0, "pages_out": 0, "seconds": 0.0}
+    timer = RuleTimer()
+
+    manifest = Manifest(manifest_path) if manifest_path else None
+    stage = f"clean:{os.path.normpath(output_dir)}"
+    version = rules_version(CLEAN_VERSION, profile)
+    if manifest is not None and not force:
+        file_names = skip_current(manifest, stage, version, input_dir, file_names, stats)
+
+    start = time.perf_counter()
+    last_report = start
+    jobs = (
+        (os.path.join(input_dir, file_name), output_path(output_dir, profile, file_name), profile, timeout)
+        for file_name in file_names
+    )
+    hard_timeout = timeout * HARD_TIMEOUT_FACTOR if timeout else None
+    try:
+        for result in run_bounded(clean_file, jobs, workers, max_in_flight, hard_timeout, killed_result):
+            stats["papers"] += 1
+            if result["error"]:
+                stats["failed"] += 1
+                print(f"Failed {result['file']}: {result['error']}")
+                if result.get("killed") and manifest is not None:
+                    manifest.record_failure(stage, os.path.join(input_dir, result["file"]), version, result["error"])
+                continue
+            stats["pages_in"] += result["pages_in"]
+            stats["pages_out"] += result["pages_out"]
+            timer.add(result["timings"])
+            if manifest is not None:
+                manifest.record(stage, os.path.join(input_dir, result["file"]), version,
+                                [output_path(output_dir, profile, result["file"])])
+            if time.perf_counter() - last_report >= 5:
+                last_report = time.perf_counter()
+                print(f"Cleaned {stats['papers']} of {len(file_names)} papers")
+    finally:
+        if manifest is not None:
+            manifest.close()
+    stats["seconds"] = time.perf_counter() - start
+    stats["timings"] = timer.seconds
+    return stats
+
+def main():
+    parser = argparse.ArgumentParser(description="Clean exam papers in parallel with a per-subject profile.")
+    parser.add_argument("--profile", help="Cleaning profile to apply (see --list-profiles).")
+    parser.add_argument("--rules", default=RULES_PATH, help="Rules file the profiles are read from.")
+    parser.add_argument("--input", default="input_pdfs", help="Folder of papers to clean.")
+    parser.add_argument("--output", default="output_cleaned", help="Folder the cleaned papers are written to.")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: one per CPU).")
+    parser.add_argument("--timeout", type=float, default=120,
+                        help="Seconds a single paper may take before it is given up (a stuck worker is killed after twice this).")
+    parser.add_argument("--max-in-flight", type=int, default=None, help="Papers queued at once (default: two per worker).")
+    parser.add_argument("--manifest", default=MANIFEST_PATH, help="Manifest of papers already cleaned.")
+    parser.add_argument("--force", action="store_true", help="Clean papers the manifest records as up to date.")
+    parser.add_argument("--timings", action="store_true", help="Print the time spent in each cleaning rule.")
+    parser.add_argument("--list-profiles", action="store_true", help="List the profiles and exit.")
+    args = parser.parse_args()
+
+    try:
+        profiles = load_profiles(args.rules)
+    except (OSError, ValueError) as e:
+        parser.error(f"cannot load the rules: {e}")
+    if args.list_profiles:
+        for name in sorted(profiles):
+            print(f"{name:<10} {profiles[name]['description']}")
+        return
+    if args.profile not in profiles:
+        parser.error(f"--profile must be one of {', '.join(sorted(profiles))} (see --list-profiles)")
+
+    stats = clean_folder(args.input, args.output, profiles[args.profile], args.workers, args.timeout,
+                         args.max_in_flight, args.manifest, args.force)
+    seconds = stats["seconds"] or 1e-9
+    cleaned = stats["papers"] - stats["failed"]
+    print(f"Cleaned {cleaned} papers ({stats['failed']} failed) in {stats['seconds']:.1f} s: "
+          f"{cleaned / seconds:.1f} papers/s, {stats['pages_in'] / seconds:.1f} pages/s "
+          f"({stats['pages_in']} pages in, {stats['pages_out']} out, {stats['skipped']} papers up to date)")
+    if args.timings:
+        print("Time per rule (CPU seconds over all workers):")
+        for line in RuleTimer(stats["timings"]).report(stats["pages_in"]):
+            print(f"  {line}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+import json
+import os
+import re
+
+# Cambridge session letters in file names (9702_s23_qp_12.pdf) as printed on the papers
+SESSIONS = {
+    's': ('M/J', 'May/June'),
+    'm': ('F/M', 'February/March'),
+    'w': ('O/N', 'October/November'),
+}
+
+RULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "clean_rules.json")
+
+# The profiles live in clean_rules.json, one per kind of paper:
+#   leading_pages:        cover (and instruction) pages dropped first
+#   file_pattern:         regex over the file name; its groups fill file_texts
+#   texts / file_texts:   boilerplate redacted wherever it appears (case-insensitive)
+#   patterns:             regexes redacted wherever they match (case-insensitive)
+#   case_sensitive_words: words redacted only where the word matches exactly
+#   page_rules:           pages deleted outright when their text contains all (or any)
+#                         of the phrases, optionally only among the first pages left
+#                         after the cover
+#   header:               'numbers' redacts page numbers in the top header_height points,
+#                         'all' everything there, null nothing
+#   footer_cutoff:        points at the bottom of the last page that are redacted
+#   output_name:          name of the cleaned file ({name} and {stem} of the input)
+# A value "@name" is replaced by the entry "name" of the file's "shared" section; inside
+# a list, the shared list is spliced in.
+PROFILE_DEFAULTS = {
+    "leading_pages": 0,
+    "file_pattern": None,
+    "texts": [],
+    "file_texts": [],
+    "patterns": [],
+    "case_sensitive_words": [],
+    "page_rules": [],
+    "header": None,
+    "header_height": 50,
+    "footer_cutoff": None,
+    "output_name": "{stem}_cleaned.pdf",
+}
+
+def _resolve(value, shared, where):
+    """Replace "@name" references to the shared section, splicing shared lists into lists."""
+    if isinstance(value, str) and value.startswith("@"):
+        if value[1:] not in shared:
+            raise ValueError(f"{where}: unknown shared entry {value!r}")
+        return shared[value[1:]]
+    if isinstance(value, list):
+        resolved = []
+        for item in value:
+            if isinstance(item, str) and item.startswith("@"):
+                resolved.extend(_resolve(item, shared, where))
+            else:
+                resolved.append(item)
+        return resolved
+    return value
+
+def load_profiles(path=RULES_PATH):
+    """
+    Load the cleaning profiles from a rules file.
+
+    Raises:
+        ValueError: If a profile has an unknown field, misses its description, refers to
+            an unknown shared entry or has a pattern that does not compile.
+    """
+    with open(path, encoding="utf-8") as f:
+        rules = json.load(f)
+    shared = rules.get("shared", {})
+    profiles = {}
+    for name, fields in rules["profiles"].items():
+        unknown = set(fields) - set(PROFILE_DEFAULTS) - {"description"}
+        if unknown:
+            raise ValueError(f"{path}: profile {name!r} has unknown fields {sorted(unknown)}")
+        if "description" not in fields:
+            raise ValueError(f"{path}: profile {name!r} has no description")
+        profile = dict(PROFILE_DEFAULTS)
+        for field, value in fields.items():
+            profile[field] = _resolve(value, shared, f"{path}: profile {name!r}")
+        for pattern in profile["patterns"] + [profile["file_pattern"] or ""]:
+            try:
+                re.compile(pattern)
+            except re.error as e:
+                raise ValueError(f"{path}: profile {name!r} has an invalid pattern {pattern!r}: {e}") from e
+        profiles[name] = profile
+    return profiles
+
+def file_fields(profile, file_name):
+    """Return the fields file_texts are formatted with, or None if the file name does not match."""
+    if not profile["file_pattern"]:
+        return None
+    match = re.match(profile["file_pattern"], file_name)
+    if not match:
+        return None
+    fields = match.groupdict()
+    session, month = SESSIONS.get(fields["letter"], ("", ""))
+    fields.update(
+        session=session,
+        month=month,
+        number2=fields["number"].zfill(2),
+        yy2=fields["yy"].zfill(2),
+    )
+    return fields
+
+def texts_to_remove(profile, file_name):
+    """Return the profile's boilerplate plus the footer references built from the file name."""
+    texts = list(profile["texts"])
+    fields = file_fields(profile, file_name)
+    if fields is not None:
+        texts += [template.format(**fields) for template in profile["file_texts"]]
+    return list(dict.fromkeys(texts))  # The same reference can come out of two templates
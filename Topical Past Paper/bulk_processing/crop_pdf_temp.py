@@ -1,8 +1,14 @@
+import argparse
 import fitz  # PyMuPDF
 import os
 import re
 
-def mark_and_crop_two_areas(input_dir, output_dir, safety_margin=5):
+from manifest import DEFAULT_PATH as MANIFEST_PATH, Manifest, rules_version
+
+# Bump when a change to the cropping code changes its output
+CROP_VERSION = 1
+
+def mark_and_crop_two_areas(input_dir, output_dir, safety_margin=5, manifest_path=MANIFEST_PATH, force=False):
     """
     Processes each PDF page by cropping content based on the current and next question positions.
     The top crop box removes content above the current question, and the bottom crop box removes content up to the start of the next question.
@@ -11,9 +17,18 @@ def mark_and_crop_two_areas(input_dir, output_dir, safety_margin=5):
     - input_dir (str): Directory containing the question PDFs.
     - output_dir (str): Directory to save the cropped PDFs.
     - safety_margin (int): Pixels to subtract from the top crop position for a safety margin.
+    - manifest_path (str): Manifest of question PDFs already cropped; those unchanged since are skipped.
+    - force (bool): Crop every question PDF, even those the manifest records as up to date.
+
+    Question PDFs whose question is not found are not recorded, so they are retried and
+    listed again on the next run.
     """
     not_found_files = []  # List to keep track of files where the question was not found
-    
+    skipped = 0
+    manifest = Manifest(manifest_path)
+    stage = f"crop:{os.path.normpath(output_dir)}"
+    version = rules_version(CROP_VERSION, safety_margin)
+
     try:
         # Ensure the output directory exists
         os.makedirs(output_dir, exist_ok=True)
@@ -27,6 +42,9 @@ def mark_and_crop_two_areas(input_dir, output_dir, safety_margin=5):
                     next_question_number = str(int(question_number) + 1)  # Find the next question number
 
                     input_path = os.path.join(root, filename)
+                    if not force and manifest.is_current(stage, input_path, version):
+                        skipped += 1
+                        continue
                     pdf_document = fitz.open(input_path)
 
                     question_found = False  # Flag to track if the question is found
@@ -153,6 +171,8 @@ def mark_and_crop_two_areas(input_dir, output_dir, safety_margin=5):
                     output_path = os.path.join(output_subdir, filename)
                     pdf_document.save(output_path)
                     print(f"Processed {filename} saved as {output_path}")
+                    if question_found:
+                        manifest.record(stage, input_path, version, [output_path])
                     
                     # Close the document
                     pdf_document.close()
@@ -164,11 +184,23 @@ def mark_and_crop_two_areas(input_dir, output_dir, safety_margin=5):
                 print(file)
         else:
             print("\nAll questions were found and cropped successfully.")
+        print(f"{skipped} question PDFs were already up to date.")
 
     except Exception as e:
         print("Error while processing PDFs:", e)
-
-# Usage example
-input_directory = os.path.expanduser("output_questions")  # Path to the input folder (on Desktop)
-output_directory = os.path.expanduser("cropped_questions")  # Path to the output folder (on Desktop)
-mark_and_crop_two_areas(input_directory, output_directory, safety_margin=5)  # Set safety margin to 5 pixels
\ No newline at end of file
+    finally:
+        manifest.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Crop each question PDF to its own question.")
+    parser.add_argument("--input", default="output_questions", help="Folder of question PDFs.")
+    parser.add_argument("--output", default="cropped_questions", help="Folder the cropped PDFs are written to.")
+    parser.add_argument("--safety-margin", type=int, default=5, help="Points kept above each question.")
+    parser.add_argument("--manifest", default=MANIFEST_PATH, help="Manifest of question PDFs already cropped.")
+    parser.add_argument("--force", action="store_true", help="Crop question PDFs the manifest records as up to date.")
+    args = parser.parse_args()
+    mark_and_crop_two_areas(os.path.expanduser(args.input), os.path.expanduser(args.output), args.safety_margin,
+                            args.manifest, args.force)
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -7,8 +7,8 @@ def clear_question_column():
     conn = sqlite3.connect("past_papers.db")
     cursor = conn.cursor()
 
-    # SQL query to update the question column to NULL where subject_name is 'Accounting'
-    cursor.execute("UPDATE past_papers SET question = NULL WHERE Subject_name = 'Accounting'")
+    # Question paths are derived from has_question, so clearing the flag clears the path
+    cursor.execute("UPDATE questions SET has_question = 0 WHERE subject_id = (SELECT id FROM subjects WHERE name = 'Accounting')")
     
     conn.commit()
     conn.close()
@@ -0,0 +1,169 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+
+# Each bulk script keeps its manifest in the folder it is run from, next to its input
+# and output folders
+DEFAULT_PATH = "pipeline_manifest.db"
+HASH_CHUNK = 1024 * 1024
+COMMIT_EVERY = 200
+
+def file_hash(path):
+    """Return the SHA-1 of a file's contents."""
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def rules_version(*parts):
+    """
+    Return a short hash of whatever decides a stage's output (its rules, parameters and a
+    version number bumped when its code changes), so changing any of them reprocesses
+    every input.
+    """
+    encoded = json.dumps(parts, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha1(encoded).hexdigest()[:12]
+
+class Manifest:
+    """
+    What each bulk-processing stage produced from each input, kept in a SQLite file so
+    that re-runs only process new and changed papers.
+
+    An input is up to date for a stage when its content hash and the stage's rules
+    version match what was recorded, and every output recorded for it still exists.
+    Inputs are only re-hashed when their size or modification time changed. An input
+    recorded as failed (see record_failure) counts as up to date too, so it is not
+    retried until it or the rules change.
+    """
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS artefacts (
+                stage TEXT NOT NULL,
+                input TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                input_hash TEXT NOT NULL,
+                rules_version TEXT NOT NULL,
+                outputs TEXT NOT NULL,
+                recorded_at REAL NOT NULL,
+                error TEXT,  -- why the stage gave up on the input, NULL when it succeeded
+                PRIMARY KEY (stage, input)
+            ) WITHOUT ROWID
+        """)
+        self._uncommitted = 0
+        self._hashes = {}  # input -> (size, mtime_ns, hash) computed during this run
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @staticmethod
+    def _key(path):
+        return os.path.normpath(path)
+
+    @staticmethod
+    def _stamp(path):
+        stat = os.stat(path)
+        return stat.st_size, stat.st_mtime_ns
+
+    def input_hash(self, path):
+        """Return the content hash of an input, hashing it at most once per run."""
+        stamp = self._stamp(path)
+        cached = self._hashes.get(path)
+        if cached is not None and cached[:2] == stamp:
+            return cached[2]
+        digest = file_hash(path)
+        self._hashes[path] = (*stamp, digest)
+        return digest
+
+    def is_current(self, stage, path, version):
+        """Return True if the stage already processed this input, unchanged, with these rules."""
+        key = self._key(path)
+        row = self.conn.execute(
+            "SELECT size, mtime_ns, input_hash, rules_version, outputs FROM artefacts WHERE stage = ? AND input = ?",
+            (stage, key)
+        ).fetchone()
+        if row is None:
+            return False
+        size, mtime_ns, digest, recorded_version, outputs = row
+        if recorded_version != version or not all(os.path.exists(output) for output in json.loads(outputs)):
+            return False
+        try:
+            stamp = self._stamp(path)
+            if stamp == (size, mtime_ns):
+                return True
+            if self.input_hash(path) != digest:
+                return False
+        except OSError:
+            return False
+        # Same contents under a new timestamp (copied or re-downloaded): remember the new
+        # stamp so the next run does not hash it again
+        self.conn.execute(
+            "UPDATE artefacts SET size = ?, mtime_ns = ? WHERE stage = ? AND input = ?",
+            (*stamp, stage, key)
+        )
+        self._written()
+        return True
+
+    def record(self, stage, path, version, outputs, error=None):
+        """Record the outputs a stage wrote for an input."""
+        size, mtime_ns = self._stamp(path)
+        self.conn.execute(
+            "INSERT OR REPLACE INTO artefacts VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (stage, self._key(path), size, mtime_ns, self.input_hash(path), version,
+             json.dumps([self._key(output) for output in outputs]), time.time(), error)
+        )
+        self._written()
+
+    def record_failure(self, stage, path, version, error):
+        """Record that a stage gave up on an input, e.g. because it hung a worker."""
+        self.record(stage, path, version, [], error)
+
+    def failures(self, stage):
+        """Return {input: error} for the inputs recorded as failed for the stage."""
+        return dict(self.conn.execute(
+            "SELECT input, error FROM artefacts WHERE stage = ? AND error IS NOT NULL", (stage,)
+        ))
+
+    def _written(self):
+        self._uncommitted += 1
+        if self._uncommitted >= COMMIT_EVERY:
+            self.conn.commit()
+            self._uncommitted = 0
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
+
+def run_stage(manifest, stage, version, inputs, process, force=False):
+    """
+    Run process(input) for every input that is not up to date for the stage and record
+    the output paths it returns. process returns None (or raises) when it fails, and the
+    input is then retried on the next run.
+
+    Returns:
+        dict: Counters for inputs processed, skipped as up to date and failed.
+    """
+    stats = {"processed": 0, "skipped": 0, "failed": 0}
+    for path in inputs:
+        if not force and manifest.is_current(stage, path, version):
+            stats["skipped"] += 1
+            continue
+        try:
+            outputs = process(path)
+        except Exception as e:
+            print(f"Error processing {path}: {e}")
+            outputs = None
+        if outputs is None:
+            stats["failed"] += 1
+            continue
+        manifest.record(stage, path, version, outputs)
+        stats["processed"] += 1
+    return stats
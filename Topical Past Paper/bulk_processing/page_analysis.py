@@ -0,0 +1,168 @@
+import re
+import time
+from bisect import bisect_right
+from collections import namedtuple
+from contextlib import contextmanager
+
+import fitz  # PyMuPDF
+
+# One entry of page.get_text("words"): the word's box, its text and where it sits
+Word = namedtuple('Word', ['x0', 'y0', 'x1', 'y1', 'text', 'block', 'line'])
+
+class PageAnalysis:
+    """
+    Everything the cleaning rules read from a page, extracted with a single
+    get_text("words") call.
+
+    The page text, the text blocks and the boilerplate search (see BoilerplateMatcher)
+    are derived from the word list in memory, instead of asking MuPDF again for "text",
+    "blocks" and one search_for per boilerplate string.
+    """
+    def __init__(self, page):
+        self.page = page
+        self.rect = page.rect
+        self.words = [Word(*entry[:7]) for entry in page.get_text("words")]
+        self._text = None
+        self._blocks = None
+        self._joined = None
+
+    @property
+    def text(self):
+        """The page's words, joined by spaces within a line and newlines between lines."""
+        if self._text is None:
+            lines = []
+            previous = None
+            for word in self.words:
+                if (word.block, word.line) != previous:
+                    lines.append([])
+                    previous = (word.block, word.line)
+                lines[-1].append(word.text)
+            self._text = "\n".join(" ".join(line) for line in lines)
+        return self._text
+
+    @property
+    def blocks(self):
+        """Return (rect, text) per text block, as get_text("blocks") would."""
+        if self._blocks is None:
+            boxes = {}
+            for word in self.words:
+                box = boxes.get(word.block)
+                if box is None:
+                    boxes[word.block] = [fitz.Rect(word.x0, word.y0, word.x1, word.y1), [word.text]]
+                else:
+                    box[0] |= fitz.Rect(word.x0, word.y0, word.x1, word.y1)
+                    box[1].append(word.text)
+            self._blocks = [(rect, " ".join(texts)) for rect, texts in boxes.values()]
+        return self._blocks
+
+    @property
+    def joined(self):
+        """Return (all words joined by single spaces, offset of each word in that string)."""
+        if self._joined is None:
+            starts = []
+            offset = 0
+            for word in self.words:
+                starts.append(offset)
+                offset += len(word.text) + 1
+            self._joined = (" ".join(word.text for word in self.words), starts)
+        return self._joined
+
+    def find_exact(self, word):
+        """Return the boxes of words that are exactly `word`, case included."""
+        return [fitz.Rect(entry[:4]) for entry in self.words if entry.text == word]
+
+def literal_pattern(text):
+    """Regex for a boilerplate string: its words in order, separated by any whitespace."""
+    return r"\s+".join(re.escape(token) for token in text.split())
+
+class BoilerplateMatcher:
+    """
+    A paper's boilerplate strings and regexes compiled into one case-insensitive regex.
+
+    The regex runs once over the page's words joined by spaces, and each hit is mapped
+    back to the characters it covers in each word, so only the matched text is redacted,
+    as search_for did: "2023" inside "12023" leaves the "1". Strings are tried longest
+    first, so "© UCLES 2023" wins over "2023" where both match at the same place.
+    """
+    def __init__(self, texts=(), patterns=()):
+        literals = sorted({text for text in texts if text.split()}, key=len, reverse=True)
+        alternatives = [literal_pattern(text) for text in literals] + list(patterns)
+        self.regex = None
+        if alternatives:
+            self.regex = re.compile("|".join(f"(?:{alternative})" for alternative in alternatives), re.IGNORECASE)
+
+    def spans(self, analysis):
+        """
+        Return (word index, first character, end character) for every part of a word
+        that boilerplate covers, in page order; a word covered whole gives (index, 0, len).
+        """
+        if self.regex is None or not analysis.words:
+            return []
+        text, starts = analysis.joined
+        covered = {}  # word index -> [(first, end)]
+        for match in self.regex.finditer(text):
+            if match.end() == match.start():
+                continue
+            first = bisect_right(starts, match.start()) - 1
+            last = bisect_right(starts, match.end() - 1) - 1
+            for index in range(first, last + 1):
+                begin = max(match.start() - starts[index], 0)
+                end = min(match.end() - starts[index], len(analysis.words[index].text))
+                if begin < end:  # a hit starting on the space after a word leaves it alone
+                    covered.setdefault(index, []).append((begin, end))
+        spans = []
+        for index in sorted(covered):
+            merged = []
+            for begin, end in sorted(covered[index]):
+                if merged and begin <= merged[-1][1]:
+                    merged[-1][1] = max(merged[-1][1], end)
+                else:
+                    merged.append([begin, end])
+            spans.extend((index, begin, end) for begin, end in merged)
+        return spans
+
+    def rects(self, analysis):
+        """Return the boxes of the boilerplate, ready for add_redact_annot."""
+        rects = []
+        for index, begin, end in self.spans(analysis):
+            word = analysis.words[index]
+            box = fitz.Rect(word[:4])
+            if begin == 0 and end == len(word.text):
+                rects.append(box)
+                continue
+            # Part of a word: MuPDF knows where the glyphs are; without a hit there, split
+            # the word's box in proportion to its characters
+            found = analysis.page.search_for(word.text[begin:end], clip=box)
+            if found:
+                rects.extend(found)
+            else:
+                width = (box.x1 - box.x0) / len(word.text)
+                rects.append(fitz.Rect(box.x0 + width * begin, box.y0, box.x0 + width * end, box.y1))
+        return rects
+
+class RuleTimer:
+    """Accumulates the time spent in each cleaning rule, across pages and papers."""
+    def __init__(self, seconds=None):
+        self.seconds = dict(seconds or {})
+
+    @contextmanager
+    def time(self, rule):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds[rule] = self.seconds.get(rule, 0.0) + time.perf_counter() - start
+
+    def add(self, seconds):
+        """Add the timings of another timer (e.g. returned by a worker process)."""
+        for rule, spent in seconds.items():
+            self.seconds[rule] = self.seconds.get(rule, 0.0) + spent
+
+    def report(self, pages):
+        """Return one line per rule with its total time and time per page, slowest first."""
+        total = sum(self.seconds.values()) or 1e-9
+        lines = []
+        for rule, spent in sorted(self.seconds.items(), key=lambda item: -item[1]):
+            per_page = spent / pages * 1000 if pages else 0.0
+            lines.append(f"{rule:<18} {spent:8.2f} s  {per_page:7.2f} ms/page  {spent / total:6.1%}")
+        return lines
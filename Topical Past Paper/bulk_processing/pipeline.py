@@ -0,0 +1,567 @@
+import argparse
+import os
+import re
+import tempfile
+import time
+
+import fitz  # PyMuPDF
+
+from clean_papers import (HARD_TIMEOUT_FACTOR, CleanTimeout, check_deadline, clean_document, killed_result,
+                          run_bounded, skip_current)
+from clean_profiles import RULES_PATH, load_profiles, texts_to_remove
+from manifest import DEFAULT_PATH as MANIFEST_PATH, Manifest, rules_version
+from page_analysis import BoilerplateMatcher, PageAnalysis, RuleTimer
+
+# Bump when a change to a stage changes its output, so the manifest reprocesses every paper
+PIPELINE_VERSION = 3
+
+PAPER_PATTERN = r"(?P<code>\d{4})_(?P<letter>[smw])(?P<yy>\d{2})_(?P<kind>qp|ms)_(?P<number>\d{1,2})"
+
+# Session folders, as bulk_split_main.py names them
+MAPPINGS = {'w': 'Oct_Nov', 'm': 'Feb_March', 's': 'May_June'}
+
+QUESTION_MARGIN = 75        # question numbers sit in the left 75 points (bulk_split_main.py)
+MAX_QUESTIONS = 12
+CROP_MARGINS = (60, 85)     # where crop_pdf_temp.py looks for a question number, then retries
+CROP_SAFETY_MARGIN = 5
+PART_BAND = (70, 88)        # (a), (b), ... labels (split_cs(2).py)
+SUBPART_BAND = (88, 107)    # (i), (ii), ... labels (split_cs(3).py)
+SUBPART_QUESTION_MARGIN = 70  # crop_pdf_temp_cs.py looks for the question number here
+MCQ_MARGIN = 60             # split_mcq.py
+MCQ_QUESTIONS = 40
+COLUMN_SEARCH_HEIGHT = 100  # Math_ms/bulk_crop_ms.py searches the bottom 100 points
+
+QUESTION_START = re.compile(r"^(\d+)\s")
+PART_LABEL = re.compile(r"\((\w)\)")
+SUBPART_LABEL = re.compile(r"\((ii?|iii?)\)")
+GUIDANCE = re.compile(r"Guidance\s*(.*)")
+GUIDANCE_QUESTION = re.compile(r"(\d+(\([a-zA-Z]+\)|\([ivx]+\))?)")
+# Labels in the order crop_pdf_temp_cs.py steps through them
+PART_SEQUENCE = ["(a)", "(b)", "(c)", "(d)", "(e)", "(f)"]
+SUBPART_SEQUENCE = ["(i)", "(ii)", "(iii)", "(iv)", "(v)", "(vi)", "(vii)", "(viii)"]
+
+class Question:
+    """One output PDF: its label (file name), its in-memory document and the paper pages it was copied from."""
+    def __init__(self, label, doc, pages):
+        self.label = label
+        self.doc = doc
+        self.pages = pages
+
+class Paper:
+    """
+    A paper moving through a pipeline: its open document, the fields parsed from its
+    file name and the questions split out of it so far.
+
+    Stages after cleaning read the page text through analysis(), which extracts each
+    cleaned page once however many stages look at it.
+    """
+    def __init__(self, doc, file_name, fields):
+        self.doc = doc
+        self.file_name = file_name
+        self.fields = fields
+        self.questions = []
+        self._analyses = {}
+
+    def analysis(self, page_number):
+        if page_number not in self._analyses:
+            self._analyses[page_number] = PageAnalysis(self.doc[page_number])
+        return self._analyses[page_number]
+
+    def question(self, label, pages):
+        """Copy paper pages into a new in-memory question document."""
+        doc = fitz.open()
+        for page_number in pages:
+            doc.insert_pdf(self.doc, from_page=page_number, to_page=page_number)
+        return Question(label, doc, list(pages))
+
+    def close(self):
+        for question in self.questions:
+            question.doc.close()
+        self.questions = []
+
+def _margin_words(analysis, left, right=None):
+    return [word for word in analysis.words if word.x0 >= left and (right is None or word.x0 < right)]
+
+def question_number(analysis, margin=QUESTION_MARGIN):
+    """
+    Return the question number starting a page, or None: the first word in the left
+    margin, when it is a number followed by more text there (bulk_split_main.py's
+    ^(\d+)\s over the margin's text).
+    """
+    words = _margin_words(analysis, 0, margin)
+    # isdecimal, not isdigit: superscripts such as '³' are digits int() rejects
+    if len(words) > 1 and words[0].text.isdecimal():
+        return int(words[0].text)
+    return None
+
+def split_questions(paper):
+    """
+    Split the paper into one question per run of pages starting with a new question
+    number, numbered 1, 2, ... up to MAX_QUESTIONS.
+    """
+    starts = []
+    seen = set()
+    end = len(paper.doc)
+    for page_number in range(len(paper.doc)):
+        number = question_number(paper.analysis(page_number))
+        if number is not None and number not in seen:
+            if len(starts) == MAX_QUESTIONS:
+                end = page_number
+                break
+            seen.add(number)
+            starts.append(page_number)
+    paper.questions = [
+        paper.question(str(index), range(start, stop))
+        for index, (start, stop) in enumerate(zip(starts, starts[1:] + [end]), start=1)
+    ]
+
+def _number_top(analysis, number, margin):
+    """Return the top of question `number` in the left margin of a page, or None."""
+    pattern = re.compile(rf"{number}\b(?!\.\d)")
+    for word in _margin_words(analysis, 0, margin):
+        if pattern.match(word.text):
+            return word.y0
+    return None
+
+def crop_questions(paper):
+    """
+    Crop each page of a question to the space between its question number and the next
+    one, retrying with a wider margin when the number is not found on any page.
+    """
+    for question in paper.questions:
+        if not question.label.isdecimal():
+            continue
+        number = int(question.label)
+        for margin in CROP_MARGINS:
+            found = False
+            for index, page_number in enumerate(question.pages):
+                analysis = paper.analysis(page_number)
+                top = _number_top(analysis, number, margin)
+                if top is None:
+                    continue
+                top = max(0, top - CROP_SAFETY_MARGIN)
+                bottom = _number_top(analysis, number + 1, margin)
+                bottom = min(bottom if bottom is not None else analysis.rect.height, analysis.rect.height)
+                if top < bottom:
+                    page = question.doc[index]
+                    page.set_cropbox(fitz.Rect(0, top, page.mediabox.width, bottom))
+                    found = True
+            if found:
+                break
+
+def _split_labelled(paper, band, label_pattern, single_page):
+    """
+    Replace each question with one question per label found in a band of its pages;
+    a part runs until the next label unless single_page. Questions without labels are
+    kept whole.
+    """
+    split = []
+    for question in paper.questions:
+        parts = []  # (label, [question page indices])
+        for index, page_number in enumerate(question.pages):
+            text = " ".join(word.text for word in _margin_words(paper.analysis(page_number), *band))
+            new_label = False
+            for label in label_pattern.findall(text):
+                if label not in {part[0] for part in parts}:
+                    parts.append((label, [index]))
+                    new_label = True
+            if not new_label and parts and not single_page:
+                parts[-1][1].append(index)
+        if not parts:
+            split.append(question)
+            continue
+        for label, indices in parts:
+            doc = fitz.open()
+            for index in indices:
+                doc.insert_pdf(question.doc, from_page=index, to_page=index)
+            split.append(Question(f"{question.label}({label})", doc, [question.pages[index] for index in indices]))
+        question.doc.close()
+    paper.questions = split
+
+def split_parts(paper):
+    """Computer Science: split each question into its parts (a), (b), ... ."""
+    _split_labelled(paper, PART_BAND, PART_LABEL, single_page=False)
+
+def split_subparts(paper):
+    """Computer Science: split each part into the page of each of its subparts (i), (ii), ... ."""
+    _split_labelled(paper, SUBPART_BAND, SUBPART_LABEL, single_page=True)
+
+def _next_label(sequence, label):
+    if label in sequence and sequence.index(label) + 1 < len(sequence):
+        return sequence[sequence.index(label) + 1]
+    return None
+
+def _first_top(words, label):
+    """Return the top of the first word containing label, as page.search_for(label) would find it."""
+    for word in words:
+        if label in word.text:
+            return word.y0
+    return None
+
+def _subpart_crop(words, main_question, part, subpart):
+    """
+    Return (top, bottom) of a part or subpart on a page, or None for either edge when
+    crop_pdf_temp_cs.py would leave it: the top sits above the label itself (above the
+    question number for (a) and (a)(i)), the bottom at the next subpart or part, or below
+    the last line of text when neither is on the page.
+    """
+    top = None
+    label = subpart if subpart and subpart != "(i)" else part
+    if label and label != "(a)":
+        top = _first_top(words, label)
+    elif label == "(a)":
+        top = _first_top([word for word in words if word.x0 < SUBPART_QUESTION_MARGIN], main_question)
+    if top is not None:
+        top = max(0, top - CROP_SAFETY_MARGIN)
+
+    bottom = None
+    for sequence, current in ((SUBPART_SEQUENCE, subpart), (PART_SEQUENCE, part)):
+        following = _next_label(sequence, current) if current else None
+        if following:
+            bottom = _first_top(words, following)
+            if bottom is not None:
+                break
+    if bottom is None and words:
+        bottom = max(word.y1 for word in words)
+    return top, bottom
+
+def crop_subparts(paper):
+    """
+    Computer Science: crop each part and subpart to its own label and the next one
+    (crop_pdf_temp_cs.py); a question over several pages is only cropped at the top of
+    its first page and the bottom of its last.
+    """
+    for question in paper.questions:
+        main_question, *labels = question.label.split("(")
+        part = f"({labels[0].strip(')')})" if len(labels) > 0 else None
+        subpart = f"({labels[1].strip(')')})" if len(labels) > 1 else None
+        if part is None:
+            continue
+        last = len(question.pages) - 1
+        for index, page_number in enumerate(question.pages):
+            page = question.doc[index]
+            box = page.cropbox
+            # Only the words still showing after crop_questions, as search_for sees them
+            words = [word for word in paper.analysis(page_number).words if word.y0 >= box.y0 and word.y1 <= box.y1]
+            top, bottom = _subpart_crop(words, main_question, part, subpart)
+            top = box.y0 if top is None or index > 0 else max(box.y0, top)
+            bottom = box.y1 if bottom is None or index < last else min(box.y1, bottom)
+            if top < bottom:
+                page.set_cropbox(fitz.Rect(box.x0, top, box.x1, bottom))
+
+def split_mcq(paper):
+    """
+    Physics MCQ mark schemes: one single-page PDF per question, found as split_mcq.py
+    finds them. First, blocks in the left margin starting with the next question number;
+    then, if fewer than MCQ_QUESTIONS were found, lines anywhere starting with the number
+    after the highest found, in page order.
+
+    split_mcq.py also searched for questions missing between two found ones before reading
+    lines. Its margin pass, like this one, only takes the next number, so the numbers found
+    are always 1 to n with no gap between them and that search never ran; it is left out.
+    """
+    found = {}  # question number -> page
+    for page_number in range(len(paper.doc)):
+        for rect, text in paper.analysis(page_number).blocks:
+            match = QUESTION_START.match(text.strip())
+            if rect.x0 <= MCQ_MARGIN and match and int(match.group(1)) == len(found) + 1:
+                found[len(found) + 1] = page_number
+    if len(found) < MCQ_QUESTIONS:
+        for page_number in range(len(paper.doc)):
+            for line in paper.analysis(page_number).text.splitlines():
+                words = line.split()
+                if words and words[0].isdecimal() and int(words[0]) == len(found) + 1 <= MCQ_QUESTIONS:
+                    found[len(found) + 1] = page_number
+    paper.questions = [paper.question(str(number), [page_number]) for number, page_number in sorted(found.items())]
+
+def _main_question(label):
+    return re.match(r"(\d+)", label).group(1)
+
+def split_guidance(paper):
+    """
+    Maths mark schemes: split at the question numbers following each "Guidance" heading,
+    keeping a question's parts (1(a), 1(b)) together.
+    """
+    groups = []  # [label, [pages]]
+    for page_number in range(len(paper.doc)):
+        labels = []
+        for heading in GUIDANCE.findall(paper.analysis(page_number).text):
+            match = GUIDANCE_QUESTION.match(heading.strip())
+            if match:
+                labels.append(match.group(1))
+        if not labels and groups:
+            groups[-1][1].append(page_number)
+        for label in labels:
+            if groups and _main_question(groups[-1][0]) == _main_question(label):
+                if page_number not in groups[-1][1]:
+                    groups[-1][1].append(page_number)
+            else:
+                groups.append([label, [page_number]])
+    paper.questions = [paper.question(label, pages) for label, pages in groups]
+
+def _next_question(label):
+    return str(int(_main_question(label)) + 1)
+
+def _column_edge(page, patterns, search_rect, offset):
+    for pattern in patterns:
+        rects = page.search_for(pattern, clip=search_rect)
+        if rects:
+            return max(0, rects[0].x0 - offset) - 5
+    return None
+
+def crop_columns(paper):
+    """
+    Maths mark schemes: crop the first page left of the question's own number and the
+    last page at the next question's number, both found along the bottom of the page.
+    """
+    for question in paper.questions:
+        doc = question.doc
+        width, height = doc[0].rect.width, doc[0].rect.height
+        search_rect = fitz.Rect(0, height - COLUMN_SEARCH_HEIGHT, width, height)
+        label = question.label
+        left = _column_edge(doc[0], [f"{label}(a)", f"{label}(i)", label], search_rect, 5)
+        right = None
+        if left is not None:
+            following = _next_question(label)
+            right = _column_edge(doc[-1], [f"{following}(i)", f"{following}(a)", following], search_rect, 35)
+        if left is not None and left >= width:
+            left = None
+        if right is not None and right <= 0:
+            right = None
+
+        cropped = fitz.open()
+        for page_number in range(doc.page_count):
+            x0 = left if left is not None and page_number == 0 else 0
+            x1 = right if right is not None and page_number == doc.page_count - 1 else width
+            if x1 <= x0:
+                x0, x1 = 0, width
+            page = cropped.new_page(width=width, height=height)
+            page.show_pdf_page(fitz.Rect(0, 0, x1 - x0, height), doc, page_number, clip=fitz.Rect(x0, 0, x1, height))
+        doc.close()
+        question.doc = cropped
+
+def rotate(paper):
+    """Maths mark schemes: turn every page 90 degrees clockwise."""
+    for question in paper.questions:
+        for page in question.doc:
+            page.set_rotation((page.rotation + 90) % 360)
+
+STAGES = {
+    "split_questions": split_questions,
+    "crop_questions": crop_questions,
+    "split_parts": split_parts,
+    "split_subparts": split_subparts,
+    "crop_subparts": crop_subparts,
+    "split_mcq": split_mcq,
+    "split_guidance": split_guidance,
+    "crop_columns": crop_columns,
+    "rotate": rotate,
+}
+
+# What happens to each kind of paper after cleaning (clean: profile in clean_rules.json),
+# and the folder, under the output folder, its question PDFs are written to. A pipeline
+# with a kind only takes papers of that kind (qp or ms) from the input folder.
+PIPELINES = {
+    "qp": {
+        "description": "Question papers: clean, split into questions, crop each question",
+        "clean": "qp",
+        "stages": ["split_questions", "crop_questions"],
+        "layout": "{code}/{year}/{mapping}/{kind}/{number}",
+    },
+    "ms": {
+        "description": "Mark schemes: clean, split into questions, crop each question",
+        "clean": "ms",
+        "stages": ["split_questions", "crop_questions"],
+        "layout": "{code}/{year}/{mapping}/{kind}/{number}",
+    },
+    "phy": {
+        "description": "Physics question papers: clean, split into questions, crop each question",
+        "clean": "phy",
+        "stages": ["split_questions", "crop_questions"],
+        "layout": "{code}/{year}/{mapping}/{kind}/{number}",
+    },
+    "cs": {
+        "description": "Computer Science question papers: as qp, then split into parts (a) and subparts (i) and crop each",
+        "clean": "qp",
+        "stages": ["split_questions", "crop_questions", "split_parts", "split_subparts", "crop_subparts"],
+        "layout": "{code}/{year}/{mapping}/{kind}/{number}",
+    },
+    "maths_ms": {
+        "description": "Maths mark schemes: clean, split at each Guidance heading, crop, rotate",
+        "clean": "maths_ms",
+        "stages": ["split_guidance", "crop_columns", "rotate"],
+        "layout": "ms/{code}/{year}/{mapping}/{number}",
+    },
+    "phy_mcq": {
+        "description": "Physics MCQ mark schemes: clean, one single-page PDF per question",
+        "clean": "mcq_ms",
+        "kind": "ms",
+        "stages": ["split_mcq"],
+        "layout": "{code}/{year}/{mapping}/{number}",
+    },
+}
+
+def paper_fields(file_name):
+    """Return the fields of a paper's file name used in output folders, or None if it does not match."""
+    match = re.match(PAPER_PATTERN, file_name)
+    if not match:
+        return None
+    fields = match.groupdict()
+    fields.update(year=f"20{fields['yy']}", mapping=MAPPINGS[fields["letter"]])
+    return fields
+
+def save_pdf(doc, path):
+    """Save a document through a temporary file, so a failed save leaves no partial PDF."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp")
+    os.close(fd)
+    try:
+        doc.save(temp_path, garbage=3, deflate=True)
+        os.replace(temp_path, path)
+    except Exception:
+        os.unlink(temp_path)
+        raise
+
+def process_paper(input_pdf, output_dir, pipeline, profile, timeout=None):
+    """
+    Run a paper through a pipeline on one open document and write its question PDFs;
+    runs in a worker process. Nothing is written between stages.
+
+    Errors are returned rather than raised, like clean_papers.clean_file.
+
+    Returns:
+        dict: file, pages_in, outputs (question PDFs written), seconds, timings
+        (seconds per cleaning rule and per stage) and error (None on success).
+    """
+    start = time.monotonic()
+    file_name = os.path.basename(input_pdf)
+    deadline = start + timeout if timeout else None
+    result = {"file": file_name, "pages_in": 0, "outputs": [], "seconds": 0.0, "timings": {}, "error": None}
+    timer = RuleTimer()
+    try:
+        fields = paper_fields(file_name)
+        if fields is None:
+            raise ValueError("file name not recognized")
+        with fitz.open(input_pdf) as doc:
+            result["pages_in"] = len(doc)
+            paper = Paper(doc, file_name, fields)
+            try:
+                matcher = BoilerplateMatcher(texts_to_remove(profile, file_name), profile["patterns"])
+                clean_document(doc, profile, matcher, deadline, file_name, timer)
+                for stage in pipeline["stages"]:
+                    with timer.time(stage):
+                        STAGES[stage](paper)
+                    check_deadline(deadline, file_name)
+
+                folder = os.path.join(output_dir, pipeline["layout"].format(**fields))
+                with timer.time("save"):
+                    for question in paper.questions:
+                        path = os.path.join(folder, f"{question.label}.pdf")
+                        save_pdf(question.doc, path)
+                        result["outputs"].append(path)
+            finally:
+                paper.close()
+    except CleanTimeout as e:
+        result["error"] = f"timeout: {e}"
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    result["seconds"] = time.monotonic() - start
+    result["timings"] = timer.seconds
+    return result
+
+def run_pipeline(input_dir, output_dir, pipeline, profile, workers=None, timeout=120, max_in_flight=None,
+                 manifest_path=MANIFEST_PATH, force=False):
+    """
+    Run every PDF in input_dir (of the pipeline's kind, if it has one) through a pipeline
+    in a process pool, skipping papers the manifest records as processed, unchanged, with
+    the same pipeline and profile. A worker stuck on a paper is killed as in
+    clean_papers.clean_folder.
+
+    Returns:
+        dict: Counters for papers, skipped and failed papers, pages read and questions
+        written, the elapsed time and the seconds spent per rule and stage.
+    """
+    file_names = sorted(name for name in os.listdir(input_dir) if name.endswith(".pdf"))
+    if pipeline.get("kind"):
+        file_names = [name for name in file_names if (paper_fields(name) or {}).get("kind") == pipeline["kind"]]
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = max_in_flight or workers * 2
+    stats = {"papers": 0, "skipped": 0, "failed": 0, "pages_in": 0, "questions": 0, "seconds": 0.0}
+    timer = RuleTimer()
+
+    manifest = Manifest(manifest_path) if manifest_path else None
+    stage = f"pipeline:{os.path.normpath(output_dir)}"
+    version = rules_version(PIPELINE_VERSION, pipeline, profile)
+    if manifest is not None and not force:
+        file_names = skip_current(manifest, stage, version, input_dir, file_names, stats)
+
+    start = time.perf_counter()
+    last_report = start
+    jobs = ((os.path.join(input_dir, file_name), output_dir, pipeline, profile, timeout) for file_name in file_names)
+    hard_timeout = timeout * HARD_TIMEOUT_FACTOR if timeout else None
+    try:
+        for result in run_bounded(process_paper, jobs, workers, max_in_flight, hard_timeout, killed_result):
+            stats["papers"] += 1
+            if result["error"]:
+                stats["failed"] += 1
+                print(f"Failed {result['file']}: {result['error']}")
+                if result.get("killed") and manifest is not None:
+                    manifest.record_failure(stage, os.path.join(input_dir, result["file"]), version, result["error"])
+                continue
+            stats["pages_in"] += result["pages_in"]
+            stats["questions"] += len(result["outputs"])
+            timer.add(result["timings"])
+            if manifest is not None:
+                manifest.record(stage, os.path.join(input_dir, result["file"]), version, result["outputs"])
+            if time.perf_counter() - last_report >= 5:
+                last_report = time.perf_counter()
+                print(f"Processed {stats['papers']} of {len(file_names)} papers")
+    finally:
+        if manifest is not None:
+            manifest.close()
+    stats["seconds"] = time.perf_counter() - start
+    stats["timings"] = timer.seconds
+    return stats
+
+def main():
+    parser = argparse.ArgumentParser(description="Clean, split, crop and rotate papers into question PDFs in one pass.")
+    parser.add_argument("--pipeline", help="Pipeline to run (see --list-pipelines).")
+    parser.add_argument("--rules", default=RULES_PATH, help="Rules file the cleaning profiles are read from.")
+    parser.add_argument("--input", default="input_pdfs", help="Folder of papers to process.")
+    parser.add_argument("--output", default="final", help="Folder the question PDFs are written to.")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: one per CPU).")
+    parser.add_argument("--timeout", type=float, default=120,
+                        help="Seconds a single paper may take before it is given up (a stuck worker is killed after twice this).")
+    parser.add_argument("--max-in-flight", type=int, default=None, help="Papers queued at once (default: two per worker).")
+    parser.add_argument("--manifest", default=MANIFEST_PATH, help="Manifest of papers already processed.")
+    parser.add_argument("--force", action="store_true", help="Process papers the manifest records as up to date.")
+    parser.add_argument("--timings", action="store_true", help="Print the time spent in each rule and stage.")
+    parser.add_argument("--list-pipelines", action="store_true", help="List the pipelines and exit.")
+    args = parser.parse_args()
+
+    if args.list_pipelines:
+        for name in sorted(PIPELINES):
+            print(f"{name:<10} {PIPELINES[name]['description']}")
+        return
+    if args.pipeline not in PIPELINES:
+        parser.error(f"--pipeline must be one of {', '.join(sorted(PIPELINES))} (see --list-pipelines)")
+    try:
+        profiles = load_profiles(args.rules)
+    except (OSError, ValueError) as e:
+        parser.error(f"cannot load the rules: {e}")
+    pipeline = PIPELINES[args.pipeline]
+
+    stats = run_pipeline(args.input, args.output, pipeline, profiles[pipeline["clean"]], args.workers, args.timeout,
+                         args.max_in_flight, args.manifest, args.force)
+    seconds = stats["seconds"] or 1e-9
+    processed = stats["papers"] - stats["failed"]
+    print(f"Processed {processed} papers ({stats['failed']} failed) in {stats['seconds']:.1f} s: "
+          f"{processed / seconds:.1f} papers/s, {stats['pages_in'] / seconds:.1f} pages/s "
+          f"({stats['questions']} question PDFs written, {stats['skipped']} papers up to date)")
+    if args.timings:
+        print("Time per rule and stage (CPU seconds over all workers):")
+        for line in RuleTimer(stats["timings"]).report(stats["pages_in"]):
+            print(f"  {line}")
+
+if __name__ == "__main__":
+    main()
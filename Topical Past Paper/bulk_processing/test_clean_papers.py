@@ -0,0 +1,69 @@
+import importlib.util
+import io
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from contextlib import redirect_stdout
+from unittest import mock
+
+if importlib.util.find_spec("fitz") is None:
+    raise unittest.SkipTest("PyMuPDF is not installed")
+
+import clean_papers
+from clean_papers import killed_result, run_bounded, skip_current
+from manifest import Manifest
+
+def work(name, seconds):
+    """Job for run_bounded: sleep, then succeed. An hour stands in for a MuPDF call that hangs."""
+    time.sleep(seconds)
+    return {"file": name, "error": None}
+
+class RunBoundedTest(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.object(clean_papers, "POLL_SECONDS", 0.05)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_every_job_is_yielded(self):
+        jobs = [(f"{number}.pdf", 0) for number in range(6)]
+        results = run_bounded(work, jobs, workers=2, max_in_flight=3)
+        self.assertEqual(sorted(result["file"] for result in results), sorted(name for name, _ in jobs))
+
+    def test_a_stuck_job_is_killed_and_the_others_still_run(self):
+        jobs = [("hung.pdf", 3600), ("1.pdf", 0), ("2.pdf", 0.2), ("3.pdf", 0)]
+        start = time.monotonic()
+        results = list(run_bounded(work, jobs, workers=2, max_in_flight=2, hard_timeout=0.5, timed_out=killed_result))
+        self.assertLess(time.monotonic() - start, 30)
+        killed = [result for result in results if result.get("killed")]
+        self.assertEqual([result["file"] for result in killed], ["hung.pdf"])
+        self.assertTrue(killed[0]["error"].startswith("timeout: worker killed"))
+        self.assertEqual(sorted(result["file"] for result in results if not result.get("killed")),
+                         ["1.pdf", "2.pdf", "3.pdf"])
+
+class SkipCurrentTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.manifest = Manifest(os.path.join(self.folder, "manifest.db"))
+        for name in ("9702_s21_qp_11.pdf", "9702_s21_qp_12.pdf"):
+            with open(os.path.join(self.folder, name), "wb") as f:
+                f.write(b"%PDF")
+
+    def tearDown(self):
+        self.manifest.close()
+        shutil.rmtree(self.folder)
+
+    def test_papers_that_hung_a_worker_are_skipped_by_name(self):
+        hung = os.path.join(self.folder, "9702_s21_qp_12.pdf")
+        self.manifest.record_failure("clean", hung, "v1", "timeout: worker killed after 240 s")
+        stats = {}
+        output = io.StringIO()
+        with redirect_stdout(output):
+            stale = skip_current(self.manifest, "clean", "v1", self.folder, ["9702_s21_qp_11.pdf", "9702_s21_qp_12.pdf"], stats)
+        self.assertEqual(stale, ["9702_s21_qp_11.pdf"])
+        self.assertEqual(stats["skipped"], 1)
+        self.assertIn("Skipped 9702_s21_qp_12.pdf: timeout: worker killed after 240 s (use --force to retry)", output.getvalue())
+
+if __name__ == "__main__":
+    unittest.main()
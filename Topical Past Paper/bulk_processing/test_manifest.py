@@ -0,0 +1,117 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from manifest import Manifest, rules_version, run_stage
+
+class RunStageTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.manifest = Manifest(os.path.join(self.folder, "manifest.db"))
+        self.inputs = []
+        for number in range(3):
+            path = os.path.join(self.folder, f"9702_s21_qp_1{number}.pdf")
+            with open(path, "wb") as f:
+                f.write(f"%PDF paper {number}".encode("ascii"))
+            self.inputs.append(path)
+        self.processed = []
+
+    def tearDown(self):
+        self.manifest.close()
+        shutil.rmtree(self.folder)
+
+    def process(self, path):
+        """Write one output per input, as a cleaning stage does."""
+        self.processed.append(os.path.basename(path))
+        output = path.replace(".pdf", "_cleaned.pdf")
+        with open(output, "wb") as f:
+            f.write(b"%PDF cleaned")
+        return [output]
+
+    def run_stage(self, version="v1", **options):
+        self.processed = []
+        return run_stage(self.manifest, "clean", version, self.inputs, self.process, **options)
+
+    def test_a_second_run_skips_every_input(self):
+        self.assertEqual(self.run_stage(), {"processed": 3, "skipped": 0, "failed": 0})
+        self.assertEqual(self.run_stage(), {"processed": 0, "skipped": 3, "failed": 0})
+
+    def test_changed_inputs_are_reprocessed(self):
+        self.run_stage()
+        with open(self.inputs[1], "ab") as f:
+            f.write(b" corrected")
+        self.run_stage()
+        self.assertEqual(self.processed, [os.path.basename(self.inputs[1])])
+
+    def test_touched_inputs_with_the_same_contents_are_skipped(self):
+        self.run_stage()
+        later = time.time() + 60
+        os.utime(self.inputs[0], (later, later))
+        self.assertEqual(self.run_stage()["skipped"], 3)
+        self.assertTrue(self.manifest.is_current("clean", self.inputs[0], "v1"))
+
+    def test_new_rules_reprocess_everything(self):
+        self.run_stage(rules_version(1, {"texts": ["PUBLISHED"]}))
+        stats = self.run_stage(rules_version(1, {"texts": ["PUBLISHED", "[Turn over"]}))
+        self.assertEqual(stats["processed"], 3)
+
+    def test_deleted_outputs_are_written_again(self):
+        self.run_stage()
+        os.unlink(self.inputs[2].replace(".pdf", "_cleaned.pdf"))
+        self.run_stage()
+        self.assertEqual(self.processed, [os.path.basename(self.inputs[2])])
+
+    def test_force_reprocesses_current_inputs(self):
+        self.run_stage()
+        self.assertEqual(self.run_stage(force=True)["processed"], 3)
+
+    def test_failed_inputs_are_retried(self):
+        def fail_first(path):
+            if path == self.inputs[0]:
+                raise ValueError("cannot open")
+            return self.process(path)
+
+        stats = run_stage(self.manifest, "clean", "v1", self.inputs, fail_first)
+        self.assertEqual((stats["processed"], stats["failed"]), (2, 1))
+        self.run_stage()
+        self.assertEqual(self.processed, [os.path.basename(self.inputs[0])])
+
+    def test_stages_are_recorded_separately(self):
+        self.run_stage()
+        stats = run_stage(self.manifest, "split", "v1", self.inputs, self.process)
+        self.assertEqual(stats["processed"], 3)
+
+class FailureTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.manifest = Manifest(os.path.join(self.folder, "manifest.db"))
+        self.paper = os.path.join(self.folder, "9702_s21_qp_12.pdf")
+        with open(self.paper, "wb") as f:
+            f.write(b"%PDF malformed")
+
+    def tearDown(self):
+        self.manifest.close()
+        shutil.rmtree(self.folder)
+
+    def test_recorded_failures_are_not_retried(self):
+        self.manifest.record_failure("clean", self.paper, "v1", "timeout: worker killed after 240 s")
+        self.assertTrue(self.manifest.is_current("clean", self.paper, "v1"))
+        self.assertEqual(self.manifest.failures("clean"), {self.paper: "timeout: worker killed after 240 s"})
+        self.assertEqual(self.manifest.failures("split"), {})
+
+    def test_failures_are_retried_once_the_paper_or_rules_change(self):
+        self.manifest.record_failure("clean", self.paper, "v1", "timeout: worker killed after 240 s")
+        self.assertFalse(self.manifest.is_current("clean", self.paper, "v2"))
+        with open(self.paper, "ab") as f:
+            f.write(b" repaired")
+        self.assertFalse(self.manifest.is_current("clean", self.paper, "v1"))
+
+    def test_a_success_replaces_the_failure(self):
+        self.manifest.record_failure("clean", self.paper, "v1", "timeout: worker killed after 240 s")
+        self.manifest.record("clean", self.paper, "v2", [])
+        self.assertEqual(self.manifest.failures("clean"), {})
+
+if __name__ == "__main__":
+    unittest.main()
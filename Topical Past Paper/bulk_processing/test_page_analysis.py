@@ -0,0 +1,69 @@
+import importlib.util
+import unittest
+
+if importlib.util.find_spec("fitz") is None:
+    raise unittest.SkipTest("PyMuPDF is not installed")
+
+import fitz
+
+from page_analysis import BoilerplateMatcher, PageAnalysis
+
+class StubPage:
+    """A page holding one line of words, 10 points per character, with search_for over them."""
+    def __init__(self, text, found=True):
+        self.rect = fitz.Rect(0, 0, 600, 800)
+        self.found = found
+        self.searches = []
+        self.entries = []
+        x = 0
+        for number, word in enumerate(text.split()):
+            self.entries.append((x, 100, x + 10 * len(word), 110, word, 0, 0, number))
+            x += 10 * (len(word) + 1)
+
+    def get_text(self, kind):
+        return self.entries
+
+    def search_for(self, text, clip=None):
+        self.searches.append((text, clip))
+        if not self.found:
+            return []
+        for x0, y0, x1, y1, word, *_ in self.entries:
+            start = word.lower().find(text.lower())
+            if start >= 0 and clip is not None and clip.x0 <= x0 and x1 <= clip.x1:
+                return [fitz.Rect(x0 + 10 * start, y0, x0 + 10 * (start + len(text)), y1)]
+        return []
+
+def spans(texts, line, patterns=()):
+    return BoilerplateMatcher(texts, patterns).spans(PageAnalysis(StubPage(line)))
+
+class BoilerplateMatcherTest(unittest.TestCase):
+    def test_whole_words_are_covered_whole(self):
+        self.assertEqual(spans(["[Turn over"], "see below [Turn over"), [(2, 0, 5), (3, 0, 4)])
+
+    def test_literal_inside_a_longer_word_covers_only_its_characters(self):
+        # The mcq_ms rules hold bare years and fragments such as "icpa"
+        self.assertEqual(spans(["2023", "icpa"], "x=12023 Epicpal 2023"), [(0, 3, 7), (1, 2, 6), (2, 0, 4)])
+
+    def test_matching_ignores_case_and_words_without_hits(self):
+        self.assertEqual(spans(["PUBLISHED"], "Published results were 2022"), [(0, 0, 9)])
+
+    def test_regex_patterns_match_alongside_literals(self):
+        self.assertEqual(spans(["UCLES 2019"], "© UCLES 2019 March 2019", ["March 20(?:1[7-9]|2[01])"]),
+                         [(1, 0, 5), (2, 0, 4), (3, 0, 5), (4, 0, 4)])
+
+    def test_adjacent_hits_in_a_word_merge(self):
+        self.assertEqual(spans(["20", "23"], "x2023"), [(0, 1, 5)])
+
+    def test_partial_hits_are_redacted_at_the_glyphs_mupdf_finds(self):
+        page = StubPage("x=12023 total")
+        rects = BoilerplateMatcher(["2023"]).rects(PageAnalysis(page))
+        self.assertEqual([tuple(rect) for rect in rects], [(30, 100, 70, 110)])
+        self.assertEqual(page.searches[0][0], "2023")
+
+    def test_partial_hits_fall_back_to_a_share_of_the_word_box(self):
+        page = StubPage("x=12023 total", found=False)
+        rects = BoilerplateMatcher(["2023"]).rects(PageAnalysis(page))
+        self.assertEqual([tuple(rect) for rect in rects], [(30, 100, 70, 110)])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+import importlib.util
+import unittest
+
+if importlib.util.find_spec("fitz") is None:
+    raise unittest.SkipTest("PyMuPDF is not installed")
+
+import fitz
+
+from pipeline import MCQ_QUESTIONS, PIPELINES, split_mcq
+
+class StubAnalysis:
+    def __init__(self, blocks):
+        self.blocks = [(fitz.Rect(x, 0, x + 100, 20), text) for x, text in blocks]
+        self.text = "\n".join(text for x, text in blocks)
+
+class StubPaper:
+    """A paper whose pages are lists of (x0, text) blocks; questions are (label, pages)."""
+    def __init__(self, pages):
+        self.doc = pages
+        self.pages = [StubAnalysis(blocks) for blocks in pages]
+        self.questions = []
+
+    def analysis(self, page_number):
+        return self.pages[page_number]
+
+    def question(self, label, pages):
+        return label, pages
+
+def split(pages):
+    paper = StubPaper(pages)
+    split_mcq(paper)
+    return paper.questions
+
+def numbered(first, last, x=40):
+    return [(x, f"{number} B") for number in range(first, last + 1)]
+
+class SplitMcqTest(unittest.TestCase):
+    def test_margin_blocks_are_taken_in_order(self):
+        questions = split([numbered(1, 20), numbered(21, MCQ_QUESTIONS)])
+        self.assertEqual(len(questions), MCQ_QUESTIONS)
+        self.assertEqual(questions[19], ("20", [0]))
+        self.assertEqual(questions[20], ("21", [1]))
+
+    def test_lines_pick_up_where_the_margin_blocks_stop(self):
+        # 5 is indented past the margin, so the margin pass stops at 4
+        pages = [numbered(1, 4), [(200, "5 C")] + numbered(6, 20), [(200, "5 D")] + numbered(21, MCQ_QUESTIONS)]
+        questions = dict(split(pages))
+        self.assertEqual(len(questions), MCQ_QUESTIONS)
+        self.assertEqual(questions["5"], [1])
+        self.assertEqual(questions["21"], [2])
+
+    def test_lines_are_read_from_the_first_page(self):
+        pages = [numbered(1, 4) + [(200, "7 A")], numbered(5, 6) + [(200, "7 B")] + numbered(8, 9)]
+        questions = dict(split(pages))
+        self.assertEqual(questions["7"], [0])
+        self.assertEqual(sorted(questions, key=int), [str(number) for number in range(1, 10)])
+
+    def test_lines_continue_after_the_highest_question_found(self):
+        pages = [numbered(1, 3), [(200, "4 A"), (200, "6 C"), (200, "5 B")]]
+        questions = dict(split(pages))
+        self.assertEqual(sorted(questions, key=int), ["1", "2", "3", "4", "5"])
+        self.assertEqual(questions["4"], [1])
+
+    def test_superscripts_do_not_count_as_question_numbers(self):
+        self.assertEqual(split([[(200, "¹ note")]]), [])
+
+class PipelinesTest(unittest.TestCase):
+    def test_mcq_pipeline_takes_mark_schemes_with_the_mark_scheme_profile(self):
+        pipeline = PIPELINES["phy_mcq"]
+        self.assertEqual((pipeline["kind"], pipeline["clean"]), ("ms", "mcq_ms"))
+
+if __name__ == "__main__":
+    unittest.main()
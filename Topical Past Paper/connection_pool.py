@@ -0,0 +1,132 @@
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from urllib.request import pathname2url
+
+from facet_index import file_signature
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+class ConnectionPool:
+    """
+    Process-wide pool of read-only SQLite connections to one database file.
+
+    Streamlit runs every rerun of every session on its own script thread, so connections
+    are opened with check_same_thread=False and handed to one thread at a time. Idle
+    connections are reused (a "hit") instead of reopening the file on every click; when
+    the file changes on disk, idle connections are closed so readers see the new data.
+    """
+    def __init__(self, db_name, max_idle=8, immutable=False, mmap_size=256 * 1024 * 1024, cache_size_kib=64 * 1024):
+        self.path = os.path.abspath(db_name)
+        self.max_idle = max_idle
+        self.immutable = immutable
+        self.mmap_size = mmap_size
+        self.cache_size_kib = cache_size_kib
+
+        self._lock = threading.Lock()
+        self._idle = []
+        self._generation = 0
+        self._signature = file_signature(self.path)
+        self._in_use = 0
+        self.opens = 0
+        self.hits = 0
+        self.recycled = 0
+
+    def _open(self):
+        """Open a read-only connection through a URI and apply the read-path pragmas."""
+        uri = f"file:{pathname2url(self.path)}?mode=ro"
+        if self.immutable:
+            # No locking or change detection at all; only safe while nothing writes the file.
+            uri += "&immutable=1"
+        try:
+            conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+            conn.execute(f"PRAGMA mmap_size = {int(self.mmap_size)}")
+            conn.execute(f"PRAGMA cache_size = -{int(self.cache_size_kib)}")
+            conn.execute("PRAGMA query_only = ON")
+        except sqlite3.Error as e:
+            raise Exception(f"Database connection error: {e}")
+        return conn
+
+    def _check_for_changes(self):
+        """Drop idle connections opened before the database file last changed. Caller holds the lock."""
+        signature = file_signature(self.path)
+        if signature != self._signature:
+            self._signature = signature
+            self._generation += 1
+            for _, conn in self._idle:
+                conn.close()
+                self.recycled += 1
+            self._idle.clear()
+
+    def acquire(self):
+        """Check out a connection; returns (generation, connection)."""
+        with self._lock:
+            self._check_for_changes()
+            self._in_use += 1
+            if self._idle:
+                self.hits += 1
+                return self._idle.pop()
+            self.opens += 1
+            generation = self._generation
+        try:
+            return generation, self._open()
+        except Exception:
+            with self._lock:
+                self._in_use -= 1
+            raise
+
+    def release(self, entry):
+        """Return a checked-out connection, closing it if it is stale or the pool is full."""
+        generation, conn = entry
+        if conn.in_transaction:
+            conn.rollback()
+        with self._lock:
+            self._in_use -= 1
+            if generation == self._generation and len(self._idle) < self.max_idle:
+                self._idle.append(entry)
+                return
+            if generation != self._generation:
+                self.recycled += 1
+        conn.close()
+
+    @contextmanager
+    def connection(self):
+        """Context manager that checks a connection out for the duration of the block."""
+        entry = self.acquire()
+        try:
+            yield entry[1]
+        finally:
+            self.release(entry)
+
+    def stats(self):
+        """Return open/hit counters and current pool occupancy."""
+        with self._lock:
+            requests = self.opens + self.hits
+            return {
+                'opens': self.opens,
+                'hits': self.hits,
+                'hit_rate': self.hits / requests if requests else 0.0,
+                'recycled': self.recycled,
+                'idle': len(self._idle),
+                'in_use': self._in_use,
+            }
+
+    def close(self):
+        """Close every idle connection."""
+        with self._lock:
+            for _, conn in self._idle:
+                conn.close()
+            self._idle.clear()
+
+def get_pool(db_name='past_papers.db', **options):
+    """Return the process-wide pool for a database file, creating it on first use."""
+    key = (os.path.abspath(db_name), tuple(sorted(options.items())))
+    pool = _pools.get(key)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(key)
+            if pool is None:
+                pool = _pools[key] = ConnectionPool(db_name, **options)
+    return pool
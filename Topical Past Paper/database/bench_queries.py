@@ -0,0 +1,139 @@
+import argparse
+import os
+import shutil
+import sqlite3
+import statistics
+import tempfile
+import time
+
+from migrations import migrate
+
+PAPER_COLUMNS = ("Subject_name, Subject_code, Topic, Sub_topic, Paper_number, Paper_variant, Variant, "
+                 "Difficulty, Year, Marks, Question_Number, Question, Answer")
+
+# Sidebar and filter queries as issued by filter_logic.py for one subject, each as
+# (name, SQL against the flat past_papers table, SQL against the normalized schema, params).
+def build_queries(conn, subject):
+    """Build the cascade of queries the sidebar runs for the given subject."""
+    topics = [row[0] for row in conn.execute(
+        "SELECT DISTINCT Topic FROM past_papers WHERE Subject_name = ? AND Question IS NOT NULL LIMIT 2", (subject,))]
+    years = [row[0] for row in conn.execute(
+        "SELECT DISTINCT Year FROM past_papers WHERE Subject_name = ? AND Question IS NOT NULL LIMIT 3", (subject,))]
+    variants = ["May/June", "Oct/Nov"]
+    paper_numbers = [1]
+
+    def placeholders(values):
+        return ",".join("?" * len(values))
+
+    subject_id = "subject_id = (SELECT id FROM subjects WHERE name = ?)"
+    topic_ids = f"topic_id IN (SELECT id FROM topics WHERE name IN ({placeholders(topics)}))"
+    session_ids = f"session_id IN (SELECT id FROM sessions WHERE name IN ({placeholders(variants)}))"
+
+    return [
+        ("subjects",
+         "SELECT DISTINCT Subject_name FROM past_papers WHERE question IS NOT NULL",
+         "SELECT name FROM subjects s WHERE EXISTS (SELECT 1 FROM questions q WHERE q.subject_id = s.id AND q.has_question = 1)",
+         []),
+        ("topics",
+         "SELECT DISTINCT topic FROM past_papers WHERE question IS NOT NULL AND Subject_name = ?",
+         f"SELECT DISTINCT topic_id FROM questions WHERE has_question = 1 AND {subject_id}",
+         [subject]),
+        ("subtopics",
+         f"SELECT DISTINCT sub_topic FROM past_papers WHERE Subject_name = ? AND topic IN ({placeholders(topics)}) AND question IS NOT NULL",
+         f"SELECT DISTINCT subtopic_id FROM questions WHERE {subject_id} AND {topic_ids} AND has_question = 1",
+         [subject] + topics),
+        ("years",
+         f"SELECT DISTINCT Year FROM past_papers WHERE question IS NOT NULL AND Subject_name = ? AND topic IN ({placeholders(topics)})",
+         f"SELECT DISTINCT year FROM questions WHERE has_question = 1 AND {subject_id} AND {topic_ids}",
+         [subject] + topics),
+        ("variants",
+         f"SELECT DISTINCT Variant FROM past_papers WHERE question IS NOT NULL AND Subject_name = ? AND Year IN ({placeholders(years)})",
+         f"SELECT DISTINCT session_id FROM questions WHERE has_question = 1 AND {subject_id} AND year IN ({placeholders(years)})",
+         [subject] + years),
+        ("paper_numbers",
+         f"SELECT DISTINCT paper_number FROM past_papers WHERE question IS NOT NULL AND Subject_name = ? AND Year IN ({placeholders(years)}) AND Variant IN ({placeholders(variants)})",
+         f"SELECT DISTINCT paper_number FROM questions WHERE has_question = 1 AND {subject_id} AND year IN ({placeholders(years)}) AND {session_ids}",
+         [subject] + years + variants),
+        ("difficulties",
+         f"SELECT DISTINCT Difficulty FROM past_papers WHERE question IS NOT NULL AND Subject_name = ? AND Year IN ({placeholders(years)}) AND Variant IN ({placeholders(variants)}) AND paper_number IN ({placeholders(paper_numbers)})",
+         f"SELECT DISTINCT difficulty_id FROM questions WHERE has_question = 1 AND {subject_id} AND year IN ({placeholders(years)}) AND {session_ids} AND paper_number IN ({placeholders(paper_numbers)})",
+         [subject] + years + variants + paper_numbers),
+        ("filter_papers",
+         f"SELECT * FROM past_papers WHERE Subject_name = ? AND Year IN ({placeholders(years)}) AND topic IN ({placeholders(topics)}) AND question IS NOT NULL",
+         f"SELECT {PAPER_COLUMNS} FROM question_facts WHERE {subject_id} AND year IN ({placeholders(years)}) AND {topic_ids} AND has_question = 1",
+         [subject] + years + topics),
+        ("quiz_subjects",
+         "SELECT DISTINCT Subject_name FROM past_papers WHERE Paper_number = '1' AND Answer IN ('A', 'B', 'C', 'D')",
+         "SELECT name FROM subjects s WHERE EXISTS (SELECT 1 FROM questions q WHERE q.subject_id = s.id AND q.paper_number = 1 AND q.answer_key IN ('A', 'B', 'C', 'D'))",
+         []),
+    ]
+
+def make_flat_copy(db_path, flat_path):
+    """Copy the past_papers rows into a plain, unindexed table, whatever the source schema version."""
+    conn = sqlite3.connect(flat_path)
+    conn.execute("ATTACH DATABASE ? AS source", (db_path,))
+    columns = [row[1] for row in conn.execute("PRAGMA source.table_info(past_papers)")]
+    conn.execute(f"CREATE TABLE past_papers AS SELECT {', '.join(columns)} FROM source.past_papers")
+    conn.commit()
+    conn.execute("DETACH DATABASE source")
+    conn.execute("VACUUM")
+    return conn
+
+def time_query(conn, sql, params, repeat):
+    """Return the median wall time of a query in milliseconds."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        conn.execute(sql, params).fetchall()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+def query_plan(conn, sql, params):
+    """Return the EXPLAIN QUERY PLAN details as a single string."""
+    return "; ".join(row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params))
+
+def run(db_path, subject, repeat):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        flat_path = os.path.join(tmp_dir, "flat.db")
+        indexed_path = os.path.join(tmp_dir, "indexed.db")
+        normalized_path = os.path.join(tmp_dir, "normalized.db")
+
+        flat = make_flat_copy(db_path, flat_path)
+        shutil.copyfile(flat_path, indexed_path)
+        shutil.copyfile(flat_path, normalized_path)
+
+        indexed = sqlite3.connect(indexed_path)
+        migrate(indexed, target=1)
+        normalized = sqlite3.connect(normalized_path)
+        migrate(normalized)
+
+        totals = [0.0, 0.0, 0.0]
+        for name, flat_sql, normalized_sql, params in build_queries(flat, subject):
+            runs = [
+                ("flat", flat, flat_sql),
+                ("indexed", indexed, flat_sql),
+                ("normalized", normalized, normalized_sql),
+            ]
+            print(f"== {name}")
+            for position, (label, conn, sql) in enumerate(runs):
+                ms = time_query(conn, sql, params, repeat)
+                totals[position] += ms
+                print(f"   {label:<10} {ms:8.3f} ms  {query_plan(conn, sql, params)}")
+
+        print(f"\nTotal per sidebar render: {totals[0]:.3f} ms flat, {totals[1]:.3f} ms indexed, {totals[2]:.3f} ms normalized")
+        for label, path in (("flat", flat_path), ("indexed", indexed_path), ("normalized", normalized_path)):
+            print(f"File size {label:<10} {os.path.getsize(path) / 1024:8.0f} KiB")
+        flat.close()
+        indexed.close()
+        normalized.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare query plans, latency and file size of the flat, indexed and normalized schemas.")
+    parser.add_argument("--db", default="past_papers.db", help="Path to the SQLite database file (left untouched).")
+    parser.add_argument("--subject", default="Physics", help="Subject used to build the filter cascade.")
+    parser.add_argument("--repeat", type=int, default=50, help="Runs per query; the median is reported.")
+    args = parser.parse_args()
+    run(args.db, args.subject, args.repeat)
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,19 @@
 import sqlite3
 
+from migrations import migrate
+
 def create_connection(db_file):
     """Create a database connection to the SQLite database specified by db_file."""
     conn = sqlite3.connect(db_file)
     return conn
 
 def create_past_papers_table(conn):
-    """Create the past_papers table in the database."""
+    """
+    Create an empty past_papers database at the latest schema version.
+
+    The flat past_papers table below is the version 0 layout; the migrations then build
+    the normalized tables from it and replace it with a view of the same name.
+    """
     create_table_sql = """
     CREATE TABLE IF NOT EXISTS past_papers (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -27,6 +34,7 @@ def create_past_papers_table(conn):
     """
     conn.execute(create_table_sql)
     conn.commit()
+    migrate(conn)
 
 def main():
     # Specify the database file name
@@ -1,106 +1,172 @@
+import argparse
 import sqlite3
-import pandas as pd
+from itertools import islice
+
+from migrations import migrate
+
+# STATS.xlsx columns, in sheet order (the header row is skipped)
+EXCEL_COLUMNS = (
+    "Subject_name", "Subject_code", "Topic", "Sub_topic", "Paper_number",
+    "Paper_variant", "Variant", "Difficulty", "Year", "Marks", "Question_Number"
+)
 
 def create_connection(db_file):
     """Create a database connection to the SQLite database specified by db_file."""
     conn = sqlite3.connect(db_file)
     return conn
 
-def remove_not_null_constraint(conn):
-    """Remove the NOT NULL constraint from the Topic column."""
-    # Creating a new table without the NOT NULL constraint on Topic column
-    create_table_sql = """
-    CREATE TABLE IF NOT EXISTS past_papers_new (
-        Subject_name TEXT,
-        Subject_code TEXT,
-        Topic TEXT,
-        Sub_topic TEXT,
-        Paper_number INTEGER,
-        Paper_variant TEXT,
-        Variant TEXT,
-        Difficulty TEXT,
-        Year INTEGER,
-        Marks INTEGER,
-        Question_Number INTEGER,
-        Question TEXT,
-        Answer TEXT
-    );
-    """
+def clean_text(value):
+    """Return a trimmed string, None for blank cells; whole numbers lose Excel's '.0'."""
+    if value is None:
+        return None
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    value = str(value).strip()
+    return value or None
 
-    # Execute the SQL to create a new table
-    conn.execute(create_table_sql)
+def clean_int(value):
+    """Return a cell as an int ('12', 12 and 12.0 all become 12), None for blank cells."""
+    value = clean_text(value)
+    return None if value is None else int(value)
 
-    # Copy data from old table to new table (ignore the constraint)
-    insert_sql = """
-    INSERT INTO past_papers_new (
-        Subject_name, Subject_code, Topic, Sub_topic, Paper_number, Paper_variant, 
-        Variant, Difficulty, Year, Marks, Question_Number, Question, Answer
+def clean_row(row):
+    """Normalize one worksheet row to the staging layout; returns None for blank rows."""
+    (subject_name, subject_code, topic, sub_topic, paper_number, paper_variant,
+     variant, difficulty, year, marks, question_number) = (tuple(row) + (None,) * 11)[:11]
+    subject_name = clean_text(subject_name)
+    if subject_name is None:
+        return None
+    return (
+        subject_name,
+        clean_text(subject_code),
+        clean_text(topic) or 'Unknown',  # Missing topics were always imported as 'Unknown'
+        clean_text(sub_topic),
+        clean_int(paper_number),
+        clean_int(paper_variant),
+        clean_text(variant),
+        clean_text(difficulty),
+        clean_int(year),
+        clean_int(marks),
+        clean_text(question_number),
     )
-    SELECT 
-        Subject_name, Subject_code, Topic, Sub_topic, Paper_number, Paper_variant, 
-        Variant, Difficulty, Year, Marks, Question_Number, Question, Answer
-    FROM past_papers;
+
+def read_excel_chunks(excel_file, chunk_size=1000):
     """
-    conn.execute(insert_sql)
-
-    # Drop the old table
-    conn.execute("DROP TABLE past_papers;")
-
-    # Rename the new table to the original table name
-    conn.execute("ALTER TABLE past_papers_new RENAME TO past_papers;")
-
-    # Commit the changes
-    conn.commit()
-    print("NOT NULL constraint removed from 'Topic' column.")
-
-def insert_data_from_excel(conn, excel_file):
-    """Insert data from an Excel file into the past_papers table."""
-    # Load the Excel file into a DataFrame
-    df = pd.read_excel(excel_file)
-    
-    # Check for missing values in the Topic column and handle them
-    if df['Topic'].isnull().any():
-        print("Warning: Missing 'Topic' values found. Replacing with 'Unknown'.")
-        df['Topic'].fillna('Unknown', inplace=True)  # Replace missing values with 'Unknown'
-    
-    # Rename columns in DataFrame to match the database table exactly
-    df.columns = [
-        "Subject_name", "Subject_code", "Topic", "Sub_topic", "Paper_number", 
-        "Paper_variant", "Variant", "Difficulty", "Year", "Marks", "Question_Number"
-    ]
-
-    # Prepare the SQL insertion command
-    insert_sql = """
-    INSERT INTO past_papers (
-        Subject_name, Subject_code, Topic, Sub_topic, Paper_number, Paper_variant, 
-        Variant, Difficulty, Year, Marks, Question_Number
-    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?);
+    Yield the worksheet's rows as lists of cleaned tuples, chunk_size rows at a time.
+
+    openpyxl's read-only mode streams the sheet instead of loading the whole workbook.
     """
+    from openpyxl import load_workbook
 
-    # Insert each row of data
-    for row in df.itertuples(index=False):
-        conn.execute(insert_sql, row)
+    workbook = load_workbook(excel_file, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(min_row=2, max_col=len(EXCEL_COLUMNS), values_only=True)
+        while True:
+            raw = list(islice(rows, chunk_size))
+            if not raw:
+                break
+            chunk = [cleaned for cleaned in map(clean_row, raw) if cleaned]
+            if chunk:
+                yield chunk
+    finally:
+        workbook.close()
 
-    # Commit changes
-    conn.commit()
-    print("Data inserted successfully from Excel file.")
+def ingest(conn, chunks):
+    """
+    Load row chunks into the normalized tables in a single transaction.
 
-def main():
-    # Specify the database and Excel file names
-    database = 'past_papers.db'
-    excel_file = 'STATS.xlsx'  # File is in the same folder
-    
-    # Create a database connection
-    conn = create_connection(database)
+    Rows go into a temporary staging table through executemany; new names are then
+    added to the lookup tables and questions is upserted on its natural key (subject,
+    year, session, paper variant, question number, topic, subtopic) with set-based
+    statements, so importing the same workbook twice leaves the database unchanged.
+    A question with several topics keeps one row per topic.
 
-    # Remove the NOT NULL constraint from the Topic column (if it exists)
-    remove_not_null_constraint(conn)
+    Returns:
+        tuple: (rows read, questions inserted, questions updated)
+    """
+    insert_staging = f"INSERT INTO staging ({', '.join(EXCEL_COLUMNS)}) VALUES ({', '.join('?' * len(EXCEL_COLUMNS))})"
+    conn.execute("PRAGMA synchronous = OFF")  # Only for the load; a crash means re-running it
+    try:
+        conn.execute("BEGIN")
+        conn.execute(f"CREATE TEMP TABLE staging ({', '.join(EXCEL_COLUMNS)})")
+        rows_read = 0
+        for chunk in chunks:
+            conn.executemany(insert_staging, chunk)
+            rows_read += len(chunk)
+
+        # New names get the next ids, in the order they first appear in the workbook
+        conn.execute("""
+            INSERT INTO subjects (name, code)
+            SELECT Subject_name, Subject_code FROM staging WHERE true
+            GROUP BY Subject_name ORDER BY MIN(rowid)
+            ON CONFLICT (name) DO UPDATE SET code = excluded.code
+        """)
+        for table, column in (("topics", "Topic"), ("subtopics", "Sub_topic"), ("difficulties", "Difficulty")):
+            conn.execute(f"""
+                INSERT OR IGNORE INTO {table} (name)
+                SELECT {column} FROM staging WHERE {column} IS NOT NULL
+                GROUP BY {column} ORDER BY MIN(rowid)
+            """)
+        conn.execute("""
+            INSERT OR IGNORE INTO sessions (name, letter)
+            SELECT Variant, CASE Variant WHEN 'Feb/March' THEN 'm' WHEN 'May/June' THEN 's' WHEN 'Oct/Nov' THEN 'w' ELSE '' END
+            FROM staging GROUP BY Variant ORDER BY MIN(rowid)
+        """)
+
+        before = conn.execute("SELECT COUNT(*) FROM questions").fetchone()[0]
+        # has_question and the answer columns belong to the path and answer tools; keep them
+        cursor = conn.execute("""
+            INSERT INTO questions (
+                subject_id, topic_id, subtopic_id, session_id, difficulty_id,
+                year, paper_number, paper_variant, marks, question_number
+            )
+            SELECT s.id, t.id, st.id, se.id, d.id,
+                   g.Year, g.Paper_number, g.Paper_variant, g.Marks, g.Question_Number
+            FROM staging g
+            JOIN subjects s ON s.name = g.Subject_name
+            JOIN topics t ON t.name = g.Topic
+            LEFT JOIN subtopics st ON st.name = g.Sub_topic
+            JOIN sessions se ON se.name = g.Variant
+            JOIN difficulties d ON d.name = g.Difficulty
+            WHERE true
+            ORDER BY g.rowid
+            ON CONFLICT (subject_id, year, session_id, paper_variant, question_number, topic_id, ifnull(subtopic_id, 0)) DO UPDATE SET
+                difficulty_id = excluded.difficulty_id,
+                paper_number = excluded.paper_number,
+                marks = excluded.marks
+        """)
+        written = cursor.rowcount
+        inserted = conn.execute("SELECT COUNT(*) FROM questions").fetchone()[0] - before
+
+        conn.execute("DROP TABLE temp.staging")
+        conn.commit()
+    except (sqlite3.Error, ValueError) as e:
+        conn.rollback()
+        raise Exception(f"Import failed: {e}")
+    finally:
+        conn.execute("PRAGMA synchronous = FULL")
 
-    # Insert data from Excel into the past_papers table
-    insert_data_from_excel(conn, excel_file)
-    
-    # Close the database connection
-    conn.close()
+    return rows_read, inserted, written - inserted
+
+def main():
+    parser = argparse.ArgumentParser(description="Import or re-import question metadata from an Excel workbook.")
+    parser.add_argument("--db", default="past_papers.db", help="Path to the SQLite database file.")
+    parser.add_argument("--excel", default="STATS.xlsx", help="Workbook to import (first sheet, header in row 1).")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="Rows read from the workbook per executemany call.")
+    args = parser.parse_args()
+
+    # Create a database connection
+    conn = create_connection(args.db)
+    try:
+        # The upsert needs the natural key added by the migrations
+        migrate(conn)
+        rows_read, inserted, updated = ingest(conn, read_excel_chunks(args.excel, args.chunk_size))
+        conn.execute("ANALYZE")
+        skipped = rows_read - inserted - updated
+        print(f"Read {rows_read} rows: {inserted} questions inserted, {updated} updated, {skipped} without a session or difficulty skipped.")
+    finally:
+        # Close the database connection
+        conn.close()
 
 if __name__ == "__main__":
     main()
@@ -5,11 +5,11 @@ def clear_answers_in_db(db_path, subject_name="Physics"):
     conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
     
-    # Update the 'Answer' column to NULL (or empty string) for all rows where the subject is Physics
+    # Mark every question of the subject as having no answer (clears the answer key too)
     cursor.execute("""
-        UPDATE past_papers
-        SET Answer = ''
-        WHERE subject_name = ?
+        UPDATE questions
+        SET answer_kind = 0, answer_key = NULL
+        WHERE subject_id = (SELECT id FROM subjects WHERE name = ?)
     """, (subject_name,))
     
     # Commit the changes and close the connection
@@ -6,8 +6,8 @@ cursor = connection.cursor()
 
 # SQL query to delete the records
 delete_query = """
-DELETE FROM past_papers
-WHERE Variant = 'Oct/Nov' AND Year = 2024;
+DELETE FROM questions
+WHERE session_id = (SELECT id FROM sessions WHERE name = 'Oct/Nov') AND year = 2024;
 """
 
 try:
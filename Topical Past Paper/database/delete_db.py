@@ -6,9 +6,12 @@ def create_connection(db_file):
     return conn
 
 def drop_past_papers_table(conn):
-    """Drop the past_papers table from the database."""
-    query = "DROP TABLE IF EXISTS past_papers"
-    conn.execute(query)
+    """Drop the past_papers views and tables and reset the schema version."""
+    conn.execute("DROP VIEW IF EXISTS past_papers")
+    conn.execute("DROP VIEW IF EXISTS question_facts")
+    for table in ("questions", "subjects", "topics", "subtopics", "sessions", "difficulties", "settings"):
+        conn.execute(f"DROP TABLE IF EXISTS {table}")
+    conn.execute("PRAGMA user_version = 0")
     conn.commit()
 
 def main():
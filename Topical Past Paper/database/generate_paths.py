@@ -0,0 +1,88 @@
+import argparse
+import sqlite3
+import time
+
+# Question and mark-scheme paths are not stored: the question_facts view builds them as
+#   {storage_root}/output_questions/{qp|ms}/{code}/{year}/{session}/{paper variant}/{question}.pdf
+# This tool flips the flags that say which of those files exist, one UPDATE per run,
+# and changes storage_root when the output folder moves.
+
+def create_connection(db_file):
+    """Create a database connection to the SQLite database specified by db_file."""
+    conn = sqlite3.connect(db_file)
+    return conn
+
+def set_storage_root(conn, root):
+    """Point every derived path at a new output folder (the one holding output_questions)."""
+    root = root.replace("\\", "/").rstrip("/")
+    conn.execute("""
+        INSERT INTO settings (key, value) VALUES ('storage_root', ?)
+        ON CONFLICT (key) DO UPDATE SET value = excluded.value
+    """, (root,))
+    conn.commit()
+    return root
+
+def build_scope(subjects=None, paper_numbers=None):
+    """Return the WHERE clause and parameters selecting the questions to update."""
+    query_parts = ["1 = 1"]
+    params = []
+    if subjects:
+        query_parts.append(f"subject_id IN (SELECT id FROM subjects WHERE name IN ({','.join('?' * len(subjects))}))")
+        params.extend(subjects)
+    if paper_numbers:
+        query_parts.append(f"paper_number IN ({','.join('?' * len(paper_numbers))})")
+        params.extend(paper_numbers)
+    return " AND ".join(query_parts), params
+
+def generate_paths(conn, kind, subjects=None, paper_numbers=None, clear=False):
+    """
+    Mark the question ('qp') or mark scheme ('ms') PDFs of the selected questions as generated.
+
+    With clear=True the paths are removed instead. Returns the number of questions updated.
+    """
+    where, params = build_scope(subjects, paper_numbers)
+    if kind == "qp":
+        assignment = "has_question = 0" if clear else "has_question = 1"
+    elif kind == "ms":
+        # A mark scheme path replaces an answer letter, as the per-row scripts did
+        assignment = "answer_kind = 0, answer_key = NULL" if clear else "answer_kind = 1, answer_key = NULL"
+        if clear:
+            where += " AND answer_kind = 1"
+    else:
+        raise ValueError(f"Unknown path kind: {kind}")
+
+    try:
+        cursor = conn.execute(f"UPDATE questions SET {assignment} WHERE {where}", params)
+        conn.commit()
+    except sqlite3.Error as e:
+        conn.rollback()
+        raise Exception(f"Error updating the database: {e}")
+    return cursor.rowcount
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate question and mark scheme paths for every subject in one statement.")
+    parser.add_argument("--db", default="past_papers.db", help="Path to the SQLite database file.")
+    parser.add_argument("--kind", choices=("qp", "ms", "both"), help="Question papers, mark schemes or both.")
+    parser.add_argument("--subject", action="append", help="Limit to a subject (repeatable; default: all subjects).")
+    parser.add_argument("--paper-number", type=int, action="append", help="Limit to a paper number (repeatable).")
+    parser.add_argument("--root", help="Set the storage root the paths are built from, e.g. C:/Users/Projects/TPP.")
+    parser.add_argument("--clear", action="store_true", help="Remove the paths instead of setting them.")
+    args = parser.parse_args()
+    if args.kind is None and not args.root:
+        parser.error("nothing to do: pass --kind and/or --root")
+
+    conn = create_connection(args.db)
+    try:
+        if args.root:
+            print(f"Storage root set to {set_storage_root(conn, args.root)}")
+        kinds = {"qp": ("qp",), "ms": ("ms",), "both": ("qp", "ms"), None: ()}[args.kind]
+        for kind in kinds:
+            start = time.perf_counter()
+            updated = generate_paths(conn, kind, args.subject, args.paper_number, args.clear)
+            elapsed = (time.perf_counter() - start) * 1000
+            print(f"{'Cleared' if args.clear else 'Generated'} {kind} paths for {updated} questions in {elapsed:.1f} ms")
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+import argparse
+import os
+import re
+import sqlite3
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+from docx import Document
+
+# Cleaned mark schemes, e.g. cleaned_9708_s22_ms_12.docx for Economics May/June 2022 paper 12
+DEFAULT_DOCX_DIR = "C:/Users/Dev Joshi/Desktop/Topical Past Paper/temp"
+ANSWER_KEYS = {"A", "B", "C", "D"}
+
+def create_connection(db_file):
+    """Create a database connection to the SQLite database specified by db_file."""
+    conn = sqlite3.connect(db_file)
+    return conn
+
+def get_file_path(docx_dir, subject_code, session_letter, year, paper_variant):
+    """Return the mark scheme document for one paper (only the last two digits of the year are used)."""
+    return f"{docx_dir}/cleaned_{subject_code}_{session_letter}{str(year)[-2:]}_ms_{paper_variant:02d}.docx"
+
+def question_key(text):
+    """Return the question number a cell starts with ('12', '12.' and '12 ' all give '12'), or None."""
+    match = re.match(r"\s*(\d+)", text)
+    return str(int(match.group(1))) if match else None
+
+def parse_answer_key(docx_path):
+    """
+    Parse a mark scheme once into {question number: answer}; None if the file does not exist.
+
+    Tables are either Question | Answer | Marks or Question | Key | Question | Key. The
+    second pair of a row is only read when it holds a single answer letter, so a Marks
+    column is never taken for a question number. The first answer found for a question wins.
+    """
+    if not os.path.exists(docx_path):
+        return None
+
+    answers = {}
+    for table in Document(docx_path).tables:
+        for row in table.rows:
+            cells = [cell.text.strip() for cell in row.cells]
+            pairs = [(0, 1)]
+            if len(cells) >= 4 and cells[3] in ANSWER_KEYS:
+                pairs.append((2, 3))
+            for question_column, answer_column in pairs:
+                if len(cells) <= answer_column:
+                    continue
+                question = question_key(cells[question_column])
+                if question is not None and cells[answer_column]:
+                    answers.setdefault(question, cells[answer_column])
+    return answers
+
+def load_questions(conn, subjects, paper_numbers, docx_dir):
+    """Group the selected questions by mark scheme: {docx path: [(subject, id, question number)]}."""
+    query = """
+        SELECT s.name, q.id, s.code, se.letter, q.year, q.paper_variant, q.question_number
+        FROM questions q
+        JOIN subjects s ON s.id = q.subject_id
+        JOIN sessions se ON se.id = q.session_id
+        WHERE s.name IN ({})
+    """.format(",".join("?" * len(subjects)))
+    params = list(subjects)
+    if paper_numbers:
+        query += f" AND q.paper_number IN ({','.join('?' * len(paper_numbers))})"
+        params.extend(paper_numbers)
+
+    documents = defaultdict(list)
+    for subject, question_id, code, letter, year, paper_variant, question_number in conn.execute(query, params):
+        path = get_file_path(docx_dir, code, letter, year, paper_variant)
+        documents[path].append((subject, question_id, question_number))
+    return documents
+
+def ingest_answers(conn, subjects, paper_numbers=None, docx_dir=DEFAULT_DOCX_DIR, workers=None):
+    """
+    Fill in answer keys from the mark scheme documents of the given subjects.
+
+    Each document is parsed once, in a process pool, and the answers are written with
+    one executemany per subject inside a single transaction.
+
+    Returns:
+        dict: Counters for documents parsed/missing and answers written/not found.
+    """
+    documents = load_questions(conn, subjects, paper_numbers, docx_dir)
+    paths = list(documents)
+    stats = {"documents": len(paths), "missing_documents": 0, "answers": 0, "not_found": 0}
+
+    updates = defaultdict(list)  # subject -> [(answer, question id)]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for path, answers in zip(paths, pool.map(parse_answer_key, paths, chunksize=8)):
+            if answers is None:
+                print(f"File not found: {path}")
+                stats["missing_documents"] += 1
+                stats["not_found"] += len(documents[path])
+                continue
+            for subject, question_id, question_number in documents[path]:
+                # Only plain MCQ numbers have a key; '3) a)' style parts never match.
+                # isdecimal, not isdigit: superscripts such as '³' are digits int() rejects
+                number = question_number.strip()
+                answer = answers.get(str(int(number))) if number.isdecimal() else None
+                if answer is None:
+                    stats["not_found"] += 1
+                else:
+                    updates[subject].append((answer, question_id))
+
+    try:
+        for subject, rows in updates.items():
+            conn.executemany("UPDATE questions SET answer_kind = 2, answer_key = ? WHERE id = ?", rows)
+            stats["answers"] += len(rows)
+            print(f"Updated {len(rows)} answers in {subject}")
+        conn.commit()
+    except sqlite3.Error as e:
+        conn.rollback()
+        raise Exception(f"Error updating the database: {e}")
+    return stats
+
+def main():
+    parser = argparse.ArgumentParser(description="Load MCQ answer keys from cleaned mark scheme .docx files.")
+    parser.add_argument("--db", default="past_papers.db", help="Path to the SQLite database file.")
+    parser.add_argument("--subject", action="append", required=True, help="Subject to update (repeatable).")
+    parser.add_argument("--paper-number", type=int, action="append", help="Limit to a paper number (repeatable).")
+    parser.add_argument("--docx-dir", default=DEFAULT_DOCX_DIR, help="Folder holding the cleaned_*_ms_*.docx files.")
+    parser.add_argument("--workers", type=int, default=None, help="Parser processes (default: one per CPU).")
+    args = parser.parse_args()
+
+    conn = create_connection(args.db)
+    try:
+        start = time.perf_counter()
+        stats = ingest_answers(conn, args.subject, args.paper_number, args.docx_dir.rstrip("/\\"), args.workers)
+        elapsed = time.perf_counter() - start
+        print(f"Parsed {stats['documents'] - stats['missing_documents']} of {stats['documents']} mark schemes, "
+              f"wrote {stats['answers']} answers ({stats['not_found']} not found) in {elapsed:.1f} s")
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+import argparse
+import sqlite3
+
+# Schema migrations for past_papers.db.
+# Each entry is (version, description, statements). The applied version is stored
+# in PRAGMA user_version, so running the migrations again only applies new entries.
+MIGRATIONS = [
+    (1, "Composite and partial indexes for the filter cascade", [
+        # Matches the sidebar cascade: subject -> topic -> subtopic -> year -> variant
+        # -> paper number -> paper variant -> difficulty. Every filter_logic query
+        # carries 'question IS NOT NULL', so the index only holds those rows.
+        """
+        CREATE INDEX IF NOT EXISTS idx_past_papers_cascade ON past_papers (
+            Subject_name, Topic, Sub_topic, Year, Variant, Paper_number, Paper_variant, Difficulty
+        ) WHERE Question IS NOT NULL
+        """,
+        # Same columns with the session first, for year/variant filters without topics.
+        """
+        CREATE INDEX IF NOT EXISTS idx_past_papers_session ON past_papers (
+            Subject_name, Year, Variant, Paper_number, Paper_variant, Difficulty, Topic, Sub_topic
+        ) WHERE Question IS NOT NULL
+        """,
+        # Subjects offered in the quiz (MCQ papers with a single letter answer).
+        """
+        CREATE INDEX IF NOT EXISTS idx_past_papers_mcq ON past_papers (Subject_name)
+        WHERE Paper_number = '1' AND Answer IN ('A', 'B', 'C', 'D')
+        """,
+        "ANALYZE past_papers",
+    ]),
+    (2, "Normalize past_papers into dimension tables and an integer fact table", [
+        # Dimensions: every repeated string is stored once. Names are trimmed, which
+        # merges dirty values such as 'Easy ' into 'Easy'.
+        """
+        CREATE TABLE subjects (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL UNIQUE,
+            code TEXT NOT NULL
+        )
+        """,
+        "CREATE TABLE topics (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE)",
+        "CREATE TABLE subtopics (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE)",
+        # letter is the session code used in Cambridge file names (9702_s23_qp_12.pdf)
+        "CREATE TABLE sessions (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE, letter TEXT NOT NULL)",
+        "CREATE TABLE difficulties (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE)",
+        "CREATE TABLE settings (key TEXT PRIMARY KEY, value TEXT NOT NULL) WITHOUT ROWID",
+        # One row per (question, topic) tag. Paths are not stored: has_question and
+        # answer_kind say which files exist and question_facts derives their paths.
+        """
+        CREATE TABLE questions (
+            id INTEGER PRIMARY KEY,
+            subject_id INTEGER NOT NULL REFERENCES subjects (id),
+            topic_id INTEGER NOT NULL REFERENCES topics (id),
+            subtopic_id INTEGER REFERENCES subtopics (id),
+            session_id INTEGER NOT NULL REFERENCES sessions (id),
+            difficulty_id INTEGER NOT NULL REFERENCES difficulties (id),
+            year INTEGER NOT NULL,
+            paper_number INTEGER NOT NULL,
+            paper_variant INTEGER NOT NULL,
+            marks INTEGER,
+            question_number TEXT NOT NULL,
+            has_question INTEGER NOT NULL DEFAULT 0,  -- question PDF has been generated
+            answer_kind INTEGER NOT NULL DEFAULT 0,   -- 0 none, 1 mark scheme PDF, 2 answer key
+            answer_key TEXT                           -- MCQ letter when answer_kind = 2
+        )
+        """,
+        # Ids follow first appearance in the old table so option order is unchanged.
+        """
+        INSERT INTO subjects (name, code)
+        SELECT Subject_name, Subject_code FROM past_papers
+        GROUP BY Subject_name ORDER BY MIN(rowid)
+        """,
+        """
+        INSERT INTO topics (name)
+        SELECT trim(Topic) FROM past_papers WHERE Topic IS NOT NULL
+        GROUP BY trim(Topic) ORDER BY MIN(rowid)
+        """,
+        """
+        INSERT INTO subtopics (name)
+        SELECT trim(Sub_topic) FROM past_papers WHERE Sub_topic IS NOT NULL
+        GROUP BY trim(Sub_topic) ORDER BY MIN(rowid)
+        """,
+        """
+        INSERT INTO sessions (name, letter)
+        SELECT Variant, CASE Variant WHEN 'Feb/March' THEN 'm' WHEN 'May/June' THEN 's' WHEN 'Oct/Nov' THEN 'w' ELSE '' END
+        FROM past_papers GROUP BY Variant ORDER BY MIN(rowid)
+        """,
+        """
+        INSERT INTO difficulties (name)
+        SELECT trim(Difficulty) FROM past_papers
+        GROUP BY trim(Difficulty) ORDER BY MIN(rowid)
+        """,
+        "INSERT INTO settings (key, value) VALUES ('storage_root', 'C:/Users/Projects/TPP')",
+        """
+        INSERT INTO questions (
+            subject_id, topic_id, subtopic_id, session_id, difficulty_id, year, paper_number,
+            paper_variant, marks, question_number, has_question, answer_kind, answer_key
+        )
+        SELECT
+            s.id, t.id, st.id, se.id, d.id, p.Year, p.Paper_number,
+            CAST(p.Paper_variant AS INTEGER), p.Marks, trim(p.Question_Number),
+            p.Question IS NOT NULL,
+            CASE WHEN p.Answer IS NULL THEN 0 WHEN p.Answer LIKE '%.pdf' THEN 1 ELSE 2 END,
+            CASE WHEN p.Answer LIKE '%.pdf' THEN NULL ELSE p.Answer END
+        FROM past_papers p
+        JOIN subjects s ON s.name = p.Subject_name
+        JOIN topics t ON t.name = trim(p.Topic)
+        LEFT JOIN subtopics st ON st.name = trim(p.Sub_topic)
+        JOIN sessions se ON se.name = p.Variant
+        JOIN difficulties d ON d.name = trim(p.Difficulty)
+        ORDER BY p.rowid
+        """,
+        "DROP TABLE past_papers",
+        # The fact table with its dimension names and derived paths, plus the id columns
+        # filter_logic filters on.
+        """
+        CREATE VIEW question_facts AS
+        SELECT
+            q.id, q.subject_id, q.topic_id, q.subtopic_id, q.session_id, q.difficulty_id,
+            q.paper_variant AS paper_variant_number, q.has_question, q.answer_kind,
+            s.name AS Subject_name,
+            s.code AS Subject_code,
+            t.name AS Topic,
+            st.name AS Sub_topic,
+            q.paper_number AS Paper_number,
+            printf('%02d', q.paper_variant) AS Paper_variant,
+            se.name AS Variant,
+            d.name AS Difficulty,
+            q.year AS Year,
+            q.marks AS Marks,
+            q.question_number AS Question_Number,
+            CASE WHEN q.has_question THEN
+                (SELECT value FROM settings WHERE key = 'storage_root') || '/output_questions/qp/'
+                || s.code || '/' || q.year || '/' || replace(se.name, '/', '_') || '/'
+                || printf('%02d', q.paper_variant) || '/' || q.question_number || '.pdf'
+            END AS Question,
+            CASE q.answer_kind
+                WHEN 1 THEN
+                    (SELECT value FROM settings WHERE key = 'storage_root') || '/output_questions/ms/'
+                    || s.code || '/' || q.year || '/' || replace(se.name, '/', '_') || '/'
+                    || printf('%02d', q.paper_variant) || '/' || q.question_number || '.pdf'
+                WHEN 2 THEN q.answer_key
+            END AS Answer
+        FROM questions q
+        JOIN subjects s ON s.id = q.subject_id
+        JOIN topics t ON t.id = q.topic_id
+        LEFT JOIN subtopics st ON st.id = q.subtopic_id
+        JOIN sessions se ON se.id = q.session_id
+        JOIN difficulties d ON d.id = q.difficulty_id
+        """,
+        # The old 13-column layout, for scripts that read past_papers directly.
+        """
+        CREATE VIEW past_papers AS
+        SELECT Subject_name, Subject_code, Topic, Sub_topic, Paper_number, Paper_variant, Variant,
+               Difficulty, Year, Marks, Question_Number, Question, Answer
+        FROM question_facts
+        """,
+        """
+        CREATE INDEX idx_questions_cascade ON questions (
+            subject_id, topic_id, subtopic_id, year, session_id, paper_number, paper_variant, difficulty_id
+        ) WHERE has_question = 1
+        """,
+        """
+        CREATE INDEX idx_questions_session ON questions (
+            subject_id, year, session_id, paper_number, paper_variant, difficulty_id, topic_id, subtopic_id
+        ) WHERE has_question = 1
+        """,
+        """
+        CREATE INDEX idx_questions_mcq ON questions (subject_id)
+        WHERE paper_number = 1 AND answer_key IN ('A', 'B', 'C', 'D')
+        """,
+        "ANALYZE",
+    ]),
+    (3, "Natural key on questions so the Excel ingest can upsert", [
+        # A question tagged with several topics has one row per topic, so the key is the
+        # question plus its topic and subtopic. A few tags appear twice, identical apart
+        # from the difficulty; keep the last one entered.
+        """
+        DELETE FROM questions WHERE id NOT IN (
+            SELECT MAX(id) FROM questions
+            GROUP BY subject_id, year, session_id, paper_variant, question_number, topic_id, ifnull(subtopic_id, 0)
+        )
+        """,
+        # subtopic_id is often NULL, and NULLs never collide in a unique index
+        """
+        CREATE UNIQUE INDEX idx_questions_natural_key ON questions (
+            subject_id, year, session_id, paper_variant, question_number, topic_id, ifnull(subtopic_id, 0)
+        )
+        """,
+        "ANALYZE",
+    ]),
+]
+
+def create_connection(db_file):
+    """Create a database connection to the SQLite database specified by db_file."""
+    conn = sqlite3.connect(db_file)
+    return conn
+
+def get_schema_version(conn):
+    """Return the schema version recorded in the database header."""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+def latest_version():
+    """Return the highest version known to this module."""
+    return MIGRATIONS[-1][0] if MIGRATIONS else 0
+
+def migrate(conn, target=None, vacuum=True):
+    """
+    Apply every migration newer than the database's current version, up to target.
+
+    Each migration runs in its own transaction together with the user_version bump,
+    so a failing step leaves the database at the previous version. With vacuum=True the
+    file is compacted afterwards to give back the space of dropped tables.
+
+    Returns:
+        list: The versions that were applied.
+    """
+    if target is None:
+        target = latest_version()
+
+    current = get_schema_version(conn)
+    applied = []
+    for version, description, statements in MIGRATIONS:
+        if version <= current or version > target:
+            continue
+        try:
+            conn.execute("BEGIN")
+            for statement in statements:
+                conn.execute(statement)
+            conn.execute(f"PRAGMA user_version = {int(version)}")
+            conn.commit()
+        except sqlite3.Error as e:
+            conn.rollback()
+            raise Exception(f"Migration {version} ({description}) failed: {e}")
+        applied.append(version)
+        print(f"Applied migration {version}: {description}")
+
+    if applied and vacuum:
+        conn.execute("VACUUM")
+    return applied
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply schema migrations to past_papers.db.")
+    parser.add_argument("--db", default="past_papers.db", help="Path to the SQLite database file.")
+    parser.add_argument("--target", type=int, default=None, help="Stop at this version (default: latest).")
+    parser.add_argument("--status", action="store_true", help="Only print the current and latest versions.")
+    args = parser.parse_args()
+
+    conn = create_connection(args.db)
+    try:
+        if args.status:
+            print(f"Schema version {get_schema_version(conn)} (latest {latest_version()})")
+            return
+        applied = migrate(conn, args.target)
+        if not applied:
+            print(f"Database already at version {get_schema_version(conn)}.")
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    main()
@@ -5,8 +5,8 @@ def find_rowid_for_answer(file_path):
     conn = sqlite3.connect('past_papers.db')  # Adjust the database path if needed
     cursor = conn.cursor()
 
-    # SQL query to find the ROWID where the Answer column contains the file path
-    query = "SELECT ROWID FROM past_papers WHERE Answer = ?"
+    # SQL query to find the question id whose derived Answer path is the file path
+    query = "SELECT id FROM question_facts WHERE Answer = ?"
 
     # Execute the query with the file path as parameter
     cursor.execute(query, (file_path,))
@@ -17,7 +17,7 @@ def find_rowid_for_answer(file_path):
     if rows:
         # Display the ROWID(s) where the Answer column contains the file path
         for row in rows:
-            print(f"ROWID: {row[0]}")  # row[0] corresponds to the ROWID
+            print(f"ROWID: {row[0]}")  # row[0] corresponds to questions.id
     else:
         print("No matching row found.")
 
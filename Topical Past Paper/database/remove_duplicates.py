@@ -1,5 +1,5 @@
 import sqlite3
-import pandas as pd
+import csv
 
 # Path to your .db file
 db_path = "past_papers.db"  # Replace with your actual .db file path
@@ -8,31 +8,34 @@ db_path = "past_papers.db"  # Replace with your actual .db file path
 conn = sqlite3.connect(db_path)
 cursor = conn.cursor()
 
-# Specify the table name in your database
-table_name = "past_papers"  # Replace with the actual table name
+# Every column of questions except the id; rows matching on all of them are duplicates
+columns = [row[1] for row in cursor.execute("PRAGMA table_info(questions)") if row[1] != "id"]
+key = ", ".join(columns)
 
-# Load the data into a pandas DataFrame
-query = f"SELECT * FROM {table_name}"
-df = pd.read_sql_query(query, conn)
+# Keep the first copy (lowest id) of each group of identical rows
+duplicate_ids = [row[0] for row in cursor.execute(f"""
+    SELECT id FROM questions
+    WHERE id NOT IN (SELECT MIN(id) FROM questions GROUP BY {key})
+""")]
 
-# Check for duplicate rows (all columns must match)
-duplicates = df[df.duplicated(keep=False)]
-
-if duplicates.empty:
+if not duplicate_ids:
     print("No duplicate rows found.")
 else:
-    print(f"{len(duplicates)} duplicate rows found and will be removed.")
-    
+    print(f"{len(duplicate_ids)} duplicate rows found and will be removed.")
+
     # Save duplicates to a separate file for review
-    duplicates.to_csv("duplicate_rows.csv", index=False)
+    placeholders = ",".join("?" * len(duplicate_ids))
+    cursor.execute(f"SELECT * FROM question_facts WHERE id IN ({placeholders})", duplicate_ids)
+    with open("duplicate_rows.csv", "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow([description[0] for description in cursor.description])
+        writer.writerows(cursor.fetchall())
     print("Duplicate rows saved to 'duplicate_rows.csv' for inspection.")
-    
-    # Remove duplicates
-    cleaned_df = df.drop_duplicates()
 
-    # Replace the table with the cleaned data
-    cleaned_df.to_sql(table_name, conn, if_exists="replace", index=False)
-    print(f"Duplicates removed. Cleaned data saved back to the '{table_name}' table.")
+    # Remove duplicates
+    cursor.execute(f"DELETE FROM questions WHERE id IN ({placeholders})", duplicate_ids)
+    conn.commit()
+    print("Duplicates removed from the 'questions' table.")
 
 # Close the connection
 conn.close()
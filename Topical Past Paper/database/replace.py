@@ -5,8 +5,8 @@ def update_subject_code():
     conn = sqlite3.connect('past_papers.db')  # Adjust the database path if needed
     cursor = conn.cursor()
 
-    # SQL query to update the Subject_code where Subject_name is "Pure Math"
-    query = "UPDATE past_papers SET Subject_code = ? WHERE Subject_name = ?"
+    # The code is stored once per subject, so this updates a single row
+    query = "UPDATE subjects SET code = ? WHERE name = ?"
 
     # Execute the query with the new subject code and the condition
     cursor.execute(query, ("9702", "Physics"))
@@ -16,7 +16,7 @@ def update_subject_code():
 
     # Check how many rows were updated
     if cursor.rowcount > 0:
-        print(f"Updated {cursor.rowcount} rows where Subject_name is 'Physics'.")
+        print(f"Updated the subject code of 'Physics'.")
     else:
         print("No rows found with Subject_name 'Physics'.")
 
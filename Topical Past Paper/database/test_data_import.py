@@ -0,0 +1,71 @@
+import sqlite3
+import unittest
+
+from data_import import clean_row, ingest
+from migrations import migrate
+
+# Rows in the original past_papers layout, with the quirks of the shipped data: a
+# question tagged with two topics, a topic with a trailing space, an untrimmed question
+# number and a tag entered twice with different difficulties.
+PAST_PAPERS = [
+    ("Pure Math", "9709", "Chpt - 9 - Further Differentiation", None, 1, "12", "Feb/March", "Easy", 2021, 7, "6"),
+    ("Pure Math", "9709", "Chpt - 5 - Trigonometry ", None, 1, "12", "Feb/March", "Easy", 2021, 7, "6"),
+    ("Computer Science", "9618", "Chpt - 2 - Communication", "2.2 The Internet", 1, "12", "May/June", "Medium", 2024, 2, "3) c) ii) "),
+    ("Accounting", "9706", "Chpt - 1 - Financial Accounting", None, 1, "12", "Oct/Nov", "Easy", 2022, 1, "4"),
+    ("Accounting", "9706", "Chpt - 1 - Financial Accounting", None, 1, "12", "Oct/Nov", "Hard", 2022, 1, "4"),
+]
+
+def migrated_database():
+    """Return an in-memory database holding PAST_PAPERS, migrated to the latest version."""
+    conn = sqlite3.connect(":memory:")
+    conn.execute("""
+        CREATE TABLE past_papers (
+            Subject_name TEXT, Subject_code TEXT, Topic TEXT, Sub_topic TEXT,
+            Paper_number INTEGER, Paper_variant TEXT, Variant TEXT, Difficulty TEXT,
+            Year INTEGER, Marks INTEGER, Question_Number TEXT, Question TEXT, Answer TEXT
+        )
+    """)
+    conn.executemany("INSERT INTO past_papers VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, NULL, NULL)", PAST_PAPERS)
+    conn.commit()
+    migrate(conn, vacuum=False)
+    return conn
+
+def question_rows(conn):
+    return conn.execute("SELECT * FROM questions ORDER BY id").fetchall()
+
+class IngestTest(unittest.TestCase):
+    def setUp(self):
+        self.conn = migrated_database()
+
+    def tearDown(self):
+        self.conn.close()
+
+    def test_migration_keeps_every_topic_tag(self):
+        topics = self.conn.execute("""
+            SELECT Topic FROM question_facts
+            WHERE Subject_name = 'Pure Math' AND Year = 2021 AND Question_Number = '6'
+            ORDER BY Topic
+        """).fetchall()
+        self.assertEqual(topics, [("Chpt - 5 - Trigonometry",), ("Chpt - 9 - Further Differentiation",)])
+
+    def test_migration_keeps_the_last_difficulty_of_a_repeated_tag(self):
+        difficulties = self.conn.execute(
+            "SELECT Difficulty FROM question_facts WHERE Subject_name = 'Accounting'"
+        ).fetchall()
+        self.assertEqual(difficulties, [("Hard",)])
+
+    def test_reimporting_the_same_rows_changes_nothing(self):
+        before = question_rows(self.conn)
+        rows_read, inserted, updated = ingest(self.conn, [[clean_row(row) for row in PAST_PAPERS]])
+        self.assertEqual((rows_read, inserted), (len(PAST_PAPERS), 0))
+        self.assertEqual(question_rows(self.conn), before)
+
+    def test_reimport_updates_a_tag_in_place(self):
+        edited = list(PAST_PAPERS[0])
+        edited[7] = "Hard"
+        rows_read, inserted, updated = ingest(self.conn, [[clean_row(edited)]])
+        self.assertEqual((inserted, updated), (0, 1))
+        self.assertEqual(len(question_rows(self.conn)), 4)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+import unittest
+
+from generate_paths import generate_paths, set_storage_root
+from test_data_import import migrated_database
+
+def paths(conn, subject):
+    return conn.execute(
+        "SELECT Question, Answer FROM question_facts WHERE Subject_name = ? ORDER BY id", (subject,)
+    ).fetchall()
+
+class GeneratePathsTest(unittest.TestCase):
+    def setUp(self):
+        self.conn = migrated_database()
+
+    def tearDown(self):
+        self.conn.close()
+
+    def test_question_paths_follow_the_output_layout(self):
+        self.assertEqual(generate_paths(self.conn, "qp", ["Computer Science"]), 1)
+        self.assertEqual(paths(self.conn, "Computer Science"), [
+            ("C:/Users/Projects/TPP/output_questions/qp/9618/2024/May_June/12/3) c) ii).pdf", None),
+        ])
+        self.assertEqual(paths(self.conn, "Accounting"), [(None, None)])
+
+    def test_scope_combines_subjects_and_paper_numbers(self):
+        self.assertEqual(generate_paths(self.conn, "ms", ["Pure Math", "Accounting"], [1]), 3)
+        self.assertEqual(generate_paths(self.conn, "ms", ["Pure Math"], [2]), 0)
+        answer = paths(self.conn, "Accounting")[0][1]
+        self.assertEqual(answer, "C:/Users/Projects/TPP/output_questions/ms/9706/2022/Oct_Nov/12/4.pdf")
+
+    def test_clearing_mark_schemes_keeps_answer_letters(self):
+        self.conn.execute("UPDATE questions SET answer_kind = 2, answer_key = 'B' WHERE subject_id = (SELECT id FROM subjects WHERE name = 'Pure Math')")
+        generate_paths(self.conn, "ms", ["Accounting"])
+        self.assertEqual(generate_paths(self.conn, "ms", clear=True), 1)
+        self.assertEqual([answer for _, answer in paths(self.conn, "Pure Math")], ["B", "B"])
+        self.assertEqual(paths(self.conn, "Accounting"), [(None, None)])
+
+    def test_storage_root_moves_every_path(self):
+        generate_paths(self.conn, "qp")
+        self.assertEqual(set_storage_root(self.conn, "D:\\TPP\\"), "D:/TPP")
+        question = paths(self.conn, "Accounting")[0][0]
+        self.assertEqual(question, "D:/TPP/output_questions/qp/9706/2022/Oct_Nov/12/4.pdf")
+
+    def test_unknown_kinds_are_rejected(self):
+        with self.assertRaises(ValueError):
+            generate_paths(self.conn, "pdf")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,209 @@
+import os
+import threading
+
+# Filterable columns of past_papers, in the order the sidebar cascades through them.
+FACET_COLUMNS = (
+    'Subject_name', 'Topic', 'Sub_topic', 'Year', 'Variant',
+    'Paper_number', 'Paper_variant', 'Difficulty'
+)
+
+# Where each facet column lives in the normalized schema: (questions column, dimension table).
+# Columns without a dimension table are stored in questions as plain integers.
+FACET_SOURCES = {
+    'Subject_name': ('subject_id', 'subjects'),
+    'Topic': ('topic_id', 'topics'),
+    'Sub_topic': ('subtopic_id', 'subtopics'),
+    'Year': ('year', None),
+    'Variant': ('session_id', 'sessions'),
+    'Paper_number': ('paper_number', None),
+    'Paper_variant': ('paper_variant', None),
+    'Difficulty': ('difficulty_id', 'difficulties'),
+}
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+def database_path(conn):
+    """Return the file backing the connection's main database ('' for in-memory databases)."""
+    for _, name, path in conn.execute("PRAGMA database_list"):
+        if name == 'main':
+            return path or ''
+    return ''
+
+def file_signature(path):
+    """
+    Return a value that changes whenever the database file is rewritten.
+
+    The WAL file is included because commits in WAL mode do not touch the main file
+    until a checkpoint.
+    """
+    signature = []
+    for suffix in ('', '-wal'):
+        try:
+            stat = os.stat(path + suffix)
+            signature.append((stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            signature.append(None)
+    return tuple(signature)
+
+def database_signature(conn):
+    """
+    Return (path, signature) identifying the current contents of the connection's database.
+
+    In-memory databases have no file, so the connection's data version is used instead.
+    """
+    path = database_path(conn)
+    if path:
+        return path, file_signature(path)
+    return path, (id(conn), conn.execute("PRAGMA data_version").fetchone()[0])
+
+class FacetIndex:
+    """
+    Column-oriented, in-memory copy of the filterable past_papers columns.
+
+    For every column, each distinct value maps to a bitset (a Python int) with bit i set
+    when row i holds that value. "Distinct values of X given the selections" is then an
+    AND over the selected bitsets followed by one AND per candidate value of X.
+    """
+    def __init__(self, rows, columns=FACET_COLUMNS):
+        self.columns = tuple(columns)
+        self.row_count = len(rows)
+        self.all_rows = (1 << self.row_count) - 1
+        self._names = {column.lower(): column for column in self.columns}
+
+        # Build one bytearray per value, then convert each to an int in one step.
+        size = (self.row_count + 7) // 8
+        self.bitsets = {}
+        for position, column in enumerate(self.columns):
+            buffers = {}  # Insertion order keeps values in first-occurrence order
+            for row_number, row in enumerate(rows):
+                buffer = buffers.get(row[position])
+                if buffer is None:
+                    buffer = buffers[row[position]] = bytearray(size)
+                buffer[row_number >> 3] |= 1 << (row_number & 7)
+            self.bitsets[column] = {
+                value: int.from_bytes(buffer, 'little') for value, buffer in buffers.items()
+            }
+
+    @classmethod
+    def load(cls, conn, columns=FACET_COLUMNS):
+        """
+        Load the index from every question with a generated question PDF.
+
+        The bitsets are built over the integer keys of the questions table and then
+        relabelled with the dimension names, so the scan never touches a string.
+        """
+        sources = [FACET_SOURCES[column][0] for column in columns]
+        query = f"SELECT {', '.join(sources)} FROM questions WHERE has_question = 1 ORDER BY id"
+        index = cls(conn.execute(query).fetchall(), columns)
+        for column in columns:
+            table = FACET_SOURCES[column][1]
+            if table is not None:
+                names = dict(conn.execute(f"SELECT id, name FROM {table}"))
+                index._relabel(column, names.get)
+            elif column == 'Paper_variant':
+                # Stored as 11, shown and filtered as '11' like the rest of the app
+                index._relabel(column, lambda number: f"{number:02d}")
+        return index
+
+    def _relabel(self, column, label):
+        """Replace a column's keys with label(key), keeping their order; None stays None."""
+        self.bitsets[column] = {
+            None if value is None else label(value): bits
+            for value, bits in self.bitsets[column].items()
+        }
+
+    def column(self, name):
+        """Resolve a column name case-insensitively (filter_logic uses 'topic', 'sub_topic', ...)."""
+        return self._names.get(name.lower())
+
+    def covers(self, column_name, filters=None):
+        """Return True if the column and every filter key are held in the index."""
+        names = [column_name] + list(filters or {})
+        return all(self.column(name) for name in names)
+
+    def _value_bits(self, column, value):
+        if value is None:
+            return 0  # NULL never compares equal in SQL, so keep the same answers here
+        bitsets = self.bitsets[column]
+        bits = bitsets.get(value)
+        if bits is None:
+            # Mirror SQLite's type affinity: '2020' matches 2020 and 11 matches '11'.
+            try:
+                alternative = str(value) if isinstance(value, int) else int(value)
+            except (TypeError, ValueError):
+                return 0
+            bits = bitsets.get(alternative, 0)
+        return bits
+
+    def mask(self, filters=None):
+        """
+        Return the bitset of rows matching every filter.
+
+        A list matches any of its values (an empty list matches nothing, like 'IN ()')
+        and any other value must match exactly. Leave a column out to keep it unconstrained.
+        """
+        mask = self.all_rows
+        for name, value in (filters or {}).items():
+            column = self.column(name)
+            if isinstance(value, (list, tuple, set)):
+                selected = 0
+                for item in value:
+                    selected |= self._value_bits(column, item)
+            else:
+                selected = self._value_bits(column, value)
+            mask &= selected
+            if not mask:
+                break
+        return mask
+
+    def distinct(self, column_name, filters=None):
+        """Return the distinct values of a column among rows matching the filters."""
+        mask = self.mask(filters)
+        if not mask:
+            return []
+        column = self.column(column_name)
+        return [value for value, bits in self.bitsets[column].items() if bits & mask]
+
+    def facets(self, selections=None):
+        """
+        Return {column: {value: row count}} for every column in cascade order.
+
+        Each column is narrowed by the selections of the columns before it, the same way
+        the sidebar's dependent dropdowns are. Missing or empty selections are unconstrained.
+        """
+        selections = {
+            self.column(name): value for name, value in (selections or {}).items()
+            if value not in (None, '', [], (), set())
+        }
+        mask = self.all_rows
+        result = {}
+        for column in self.columns:
+            counts = {}
+            for value, bits in self.bitsets[column].items():
+                matched = bits & mask
+                if matched:
+                    counts[value] = matched.bit_count()
+            result[column] = counts
+            if column in selections:
+                mask &= self.mask({column: selections[column]})
+        return result
+
+def get_facet_index(conn):
+    """
+    Return the process-wide FacetIndex for the connection's database file.
+
+    The index is rebuilt when the file's mtime or size changes, so every Streamlit
+    session shares one copy that follows updates made by the database scripts.
+    """
+    path, signature = database_signature(conn)
+    cached = _indexes.get(path)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+
+    with _indexes_lock:
+        cached = _indexes.get(path)
+        if cached is None or cached[0] != signature:
+            cached = (signature, FacetIndex.load(conn))
+            _indexes[path] = cached
+    return cached[1]
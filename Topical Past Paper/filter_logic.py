@@ -1,16 +1,59 @@
-import sqlite3 as s3
+from collections import namedtuple
+from connection_pool import get_pool
+from facet_index import get_facet_index, database_signature
+from result_cache import ResultCache, canonical_values
 
-def connect_to_db(db_name='past_papers.db'):
-    """Establish a connection to the SQLite database."""
-    try:
-        conn = s3.connect(db_name)
-        return conn
-    except s3.Error as e:
-        raise Exception(f"Database connection error: {e}")
+# Shared by every session in the process; both are emptied when the database file changes.
+_options_cache = ResultCache(max_entries=2048, ttl=600)
+_papers_cache = ResultCache(max_entries=256, ttl=600)
+
+# Columns of the past_papers layout (question_facts view) that select_papers and iter_papers can project
+PAPER_COLUMNS = (
+    'Subject_name', 'Subject_code', 'Topic', 'Sub_topic', 'Paper_number', 'Paper_variant',
+    'Variant', 'Difficulty', 'Year', 'Marks', 'Question_Number', 'Question', 'Answer'
+)
+_record_types = {}
+
+def connect_to_db(db_name='past_papers.db', immutable=False):
+    """
+    Check out a pooled, read-only connection to the SQLite database.
+
+    Use as 'with connect_to_db() as conn:'; the connection goes back to the process-wide
+    pool at the end of the block. Pass immutable=True when nothing writes the file while
+    the app runs, to skip SQLite's file locking entirely.
+    """
+    return get_pool(db_name, immutable=immutable).connection()
+
+def connection_stats(db_name='past_papers.db', immutable=False):
+    """Return the pool's open/hit counters for the database."""
+    return get_pool(db_name, immutable=immutable).stats()
+
+def cache_stats():
+    """Return hit/miss counters for the dropdown-options and filter_papers caches."""
+    return {'options': _options_cache.stats(), 'papers': _papers_cache.stats()}
 
 def get_distinct_values(conn, column_name, filters=None):
-    """Generic method to get distinct values for a given column with optional filters."""
-    base_query = f"SELECT DISTINCT {column_name} FROM past_papers WHERE question IS NOT NULL"
+    """
+    Generic method to get distinct values for a given column with optional filters.
+
+    Answered from the process-wide FacetIndex; columns it does not hold fall back to SQL.
+    """
+    def compute():
+        index = get_facet_index(conn)
+        if index.covers(column_name, filters):
+            return index.distinct(column_name, filters)
+        return query_distinct_values(conn, column_name, filters)
+
+    # Lists mean 'IN (...)' (so [] matches nothing) and scalars mean '=', so keep them apart
+    key = ('distinct', column_name.lower(), tuple(sorted(
+        (name.lower(), 'in' if isinstance(value, list) else '=', canonical_values(value))
+        for name, value in (filters or {}).items()
+    )))
+    return list(_options_cache.get_or_compute(key, compute, database_signature(conn)))
+
+def query_distinct_values(conn, column_name, filters=None):
+    """Run the SELECT DISTINCT behind get_distinct_values directly against the database."""
+    base_query = f"SELECT DISTINCT {column_name} FROM question_facts WHERE has_question = 1"
     params = []
     if filters:
         query_parts = []
@@ -29,6 +72,26 @@ def get_distinct_values(conn, column_name, filters=None):
     c.execute(base_query, tuple(params))
     return [row[0] for row in c.fetchall()]
 
+def get_facets(conn, selections=None):
+    """
+    Return every filter column's available values with their question counts in one call.
+
+    The result maps each column (Subject_name, Topic, Sub_topic, Year, Variant, Paper_number,
+    Paper_variant, Difficulty) to {value: count}, where each column is narrowed by the
+    selections made before it in the sidebar. Missing or empty selections are ignored.
+    """
+    key = ('facets', tuple(sorted(
+        (name.lower(), canonical_values(value)) for name, value in (selections or {}).items()
+        if canonical_values(value)
+    )))
+    return _options_cache.get_or_compute(key, lambda: get_facet_index(conn).facets(selections), database_signature(conn))
+
+def facet_label(counts):
+    """Return a format function that shows an option with its question count, e.g. '2021 (42 questions)'."""
+    def label(value):
+        return f"{value} ({counts.get(value, 0)} questions)"
+    return label
+
 def get_subjects(conn):
     """Retrieve distinct subjects from the database with valid 'question' values."""
     return get_distinct_values(conn, 'Subject_name')
@@ -41,14 +104,7 @@ def get_subtopics(conn, selected_subject, selected_topics):
     """Fetch subtopics based on selected topics, ensuring valid 'question' values."""
     filters = {'Subject_name': selected_subject}
     if selected_topics:
-        if isinstance(selected_topics, list):
-            # Use IN for multiple topics
-            query = "SELECT DISTINCT sub_topic FROM past_papers WHERE Subject_name = ? AND topic IN ({}) AND question IS NOT NULL".format(','.join(['?'] * len(selected_topics)))
-            c = conn.cursor()
-            c.execute(query, [selected_subject] + selected_topics)  # Pass selected_subject and the list of selected_topics
-            return [row[0] for row in c.fetchall()]
-        else:
-            filters['topic'] = selected_topics
+        filters['topic'] = selected_topics
     return get_distinct_values(conn, 'sub_topic', filters)
 
 def get_years(conn, selected_subject, selected_topics, selected_subtopics):
@@ -97,46 +153,129 @@ def get_difficulties(conn, selected_subject, selected_years, selected_variants,
     return get_distinct_values(conn, 'Difficulty', filters)
 
 def filter_papers(conn, subject, years, variants, difficulties, topics, subtopics, paper_numbers, paper_variants):
-    """Filters the past papers database table based on the selected criteria and valid 'question' values."""
-    query_parts = ["Subject_name = ?"]
+    """
+    Filters the past papers database table based on the selected criteria and valid 'question' values.
+
+    Results are cached per normalized selection (order and duplicates in the lists do not
+    matter), so students picking the same combination share one query.
+    """
+    key = ('filter_papers',) + tuple(canonical_values(values) for values in (
+        subject, years, variants, difficulties, topics, subtopics, paper_numbers, paper_variants
+    ))
+    result = _papers_cache.get_or_compute(
+        key,
+        lambda: query_papers(conn, subject, years, variants, difficulties, topics, subtopics, paper_numbers, paper_variants),
+        database_signature(conn)
+    )
+    return list(result)
+
+def query_papers(conn, subject, years, variants, difficulties, topics, subtopics, paper_numbers, paper_variants):
+    """Run the query behind filter_papers directly against the database."""
+    where, params = build_paper_filter(subject, years, variants, difficulties, topics, subtopics, paper_numbers, paper_variants)
+    query = f"SELECT {', '.join(PAPER_COLUMNS)} FROM question_facts WHERE {where}"
+    
+    c = conn.cursor()
+    result = c.execute(query, params).fetchall()
+    return result
+
+def build_paper_filter(subject, years, variants, difficulties, topics, subtopics, paper_numbers, paper_variants):
+    """
+    Build the WHERE clause and parameters shared by filter_papers, select_papers and iter_papers.
+
+    The clause runs against question_facts and compares integer keys only: names are looked
+    up once in their dimension table and paper variants are cast to the stored number.
+    """
+    query_parts = ["subject_id = (SELECT id FROM subjects WHERE name = ?)"]
     params = [subject]
 
-    # Dynamically append filter conditions to the query
+    # Column to compare -> (selected values, dimension table holding the names or None)
     filters = {
-        'Year': years,
-        'Variant': variants,
-        'Difficulty': difficulties,
-        'topic': topics,
-        'sub_topic': subtopics,
-        'paper_number': paper_numbers,
-        'paper_variant': paper_variants
+        'Year': (years, None),
+        'session_id': (variants, 'sessions'),
+        'difficulty_id': (difficulties, 'difficulties'),
+        'topic_id': (topics, 'topics'),
+        'subtopic_id': (subtopics, 'subtopics'),
+        'Paper_number': (paper_numbers, None),
+        'paper_variant_number': (paper_variants, None),
     }
 
-    for key, values in filters.items():
+    for key, (values, table) in filters.items():
         if values:
-            # Check if values is a list (i.e., multiple options selected)
-            if isinstance(values, list):
-                # Use the IN clause for lists
-                query_parts.append(f"{key} IN ({','.join(['?'] * len(values))})")
-                params.extend(values)
+            if not isinstance(values, list):
+                values = [values]
+            placeholders = ','.join(['?'] * len(values))
+            if table is not None:
+                query_parts.append(f"{key} IN (SELECT id FROM {table} WHERE name IN ({placeholders}))")
+            elif key == 'paper_variant_number':
+                # '11' -> 11; text that is not a number casts to 0 and matches nothing
+                query_parts.append(f"{key} IN ({','.join(['CAST(? AS INTEGER)'] * len(values))})")
             else:
-                # Otherwise, just add a single value
-                query_parts.append(f"{key} = ?")
-                params.append(values)
+                query_parts.append(f"{key} IN ({placeholders})")
+            params.extend(values)
 
-    query = f"SELECT * FROM past_papers WHERE " + " AND ".join(query_parts) + " AND question IS NOT NULL"  # Ensure 'question' is not null
-    
+    query_parts.append("has_question = 1")  # Only questions whose PDF has been generated
+    return " AND ".join(query_parts), tuple(params)
+
+def paper_record_type(columns):
+    """Return the namedtuple class for a projection, e.g. PaperRecord(Question, Answer)."""
+    columns = tuple(columns)
+    record_type = _record_types.get(columns)
+    if record_type is None:
+        unknown = [column for column in columns if column not in PAPER_COLUMNS]
+        if unknown:
+            raise ValueError(f"Unknown past_papers columns: {', '.join(unknown)}")
+        record_type = _record_types[columns] = namedtuple('PaperRecord', columns)
+    return record_type
+
+def iter_papers(conn, columns, subject, years=None, variants=None, difficulties=None, topics=None, subtopics=None, paper_numbers=None, paper_variants=None, batch_size=500):
+    """
+    Yield matching papers as PaperRecord namedtuples holding only the requested columns.
+
+    Rows are streamed from the cursor in batches instead of materializing every column of
+    every row, e.g. iter_papers(conn, ('Question', 'Answer'), 'Physics').
+    """
+    record_type = paper_record_type(columns)
+    where, params = build_paper_filter(subject, years, variants, difficulties, topics, subtopics, paper_numbers, paper_variants)
     c = conn.cursor()
-    result = c.execute(query, tuple(params)).fetchall()
-    return result
+    c.execute(f"SELECT {', '.join(record_type._fields)} FROM question_facts WHERE {where}", params)
+    while True:
+        rows = c.fetchmany(batch_size)
+        if not rows:
+            break
+        for row in rows:
+            yield record_type._make(row)
+
+def select_papers(conn, columns, subject, years=None, variants=None, difficulties=None, topics=None, subtopics=None, paper_numbers=None, paper_variants=None):
+    """
+    Return matching papers as a list of PaperRecord namedtuples with only the requested columns.
+
+    Cached like filter_papers, keyed by the projection and the normalized selection.
+    """
+    columns = tuple(columns)
+    key = ('select_papers', columns) + tuple(canonical_values(values) for values in (
+        subject, years, variants, difficulties, topics, subtopics, paper_numbers, paper_variants
+    ))
+    result = _papers_cache.get_or_compute(
+        key,
+        lambda: list(iter_papers(conn, columns, subject, years, variants, difficulties, topics, subtopics, paper_numbers, paper_variants)),
+        database_signature(conn)
+    )
+    return list(result)
 
 def filter_subjects_by_paper_number_and_answer(conn):
     """Retrieve subjects that have papers with 'Paper_number' = '1' and a single letter answer."""
     query = """
-    SELECT DISTINCT Subject_name FROM past_papers
-    WHERE Paper_number = '1' AND Answer IN ('A', 'B', 'C', 'D')
+    SELECT name FROM subjects s
+    WHERE EXISTS (
+        SELECT 1 FROM questions q
+        WHERE q.subject_id = s.id AND q.paper_number = 1 AND q.answer_key IN ('A', 'B', 'C', 'D')
+    )
+    ORDER BY s.name
     """
-    c = conn.cursor()
-    c.execute(query)
-    return [row[0] for row in c.fetchall()]
+    def compute():
+        c = conn.cursor()
+        c.execute(query)
+        return [row[0] for row in c.fetchall()]
+
+    return list(_options_cache.get_or_compute(('quiz_subjects',), compute, database_signature(conn)))
 
@@ -0,0 +1,123 @@
+import os
+import sqlite3
+
+import fitz
+
+# SQLite's default limit on bound parameters is 999 in older builds
+LOOKUP_BATCH = 500
+
+def pack_ranges(conn, pdf_paths):
+    """
+    Return {source: (pack, first page, page count)} for the PDFs that build_packs.py
+    copied into a question pack and that have not changed since.
+
+    PDFs that are missing from the question_pack_pages index, modified since the pack
+    was built, or whose pack file is gone are left out (the merger opens them directly);
+    so is everything when there is no asset index yet (conn is None).
+    """
+    if conn is None:
+        return {}
+    sources = list(dict.fromkeys(path for path in pdf_paths if path))
+    rows = []
+    try:
+        for start in range(0, len(sources), LOOKUP_BATCH):
+            batch = sources[start:start + LOOKUP_BATCH]
+            rows.extend(conn.execute(
+                "SELECT source, pack, first_page, page_count, source_mtime_ns FROM question_pack_pages "
+                f"WHERE source IN ({','.join('?' * len(batch))})",
+                batch
+            ))
+    except sqlite3.Error:
+        return {}
+
+    ranges = {}
+    packs = {}  # pack -> exists
+    for source, pack, first_page, page_count, mtime_ns in rows:
+        if pack not in packs:
+            packs[pack] = os.path.exists(pack)
+        try:
+            fresh = packs[pack] and os.stat(source).st_mtime_ns == mtime_ns
+        except OSError:
+            fresh = False
+        if fresh:
+            ranges[source] = (pack, first_page, page_count)
+    return ranges
+
+class MergedDocument:
+    """
+    PDF built by appending whole documents with MuPDF.
+
+    Pages are copied with Document.insert_pdf, which keeps the source's fonts and
+    images as shared objects instead of re-serializing them page by page. The result is
+    saved with garbage=3, which also merges identical objects coming from different
+    inputs (the same exam font embedded in every question), and deflate.
+
+    With pack ranges (see pack_ranges), questions found in a question pack are copied as
+    a page range out of the pack, which is opened once, instead of opening their own file.
+    """
+    def __init__(self, ranges=None):
+        self._doc = fitz.open()
+        self._ranges = ranges or {}
+        self._packs = {}  # pack path -> open fitz.Document, or None if it cannot be opened
+        self.missing = []  # paths that could not be appended, in order
+        self.from_packs = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @property
+    def page_count(self):
+        return self._doc.page_count
+
+    def append(self, pdf_path):
+        """Append every page of a PDF; returns False (and records the path) if it does not exist."""
+        packed = self._ranges.get(pdf_path)
+        if packed is not None:
+            pack, first_page, page_count = packed
+            if pack not in self._packs:
+                try:
+                    self._packs[pack] = fitz.open(pack)
+                except Exception:
+                    # Deleted by a rebuild or damaged since pack_ranges checked it: open the
+                    # question's own file instead, for this pack's other questions too
+                    self._packs[pack] = None
+            source = self._packs[pack]
+            if source is not None:
+                self._doc.insert_pdf(source, from_page=first_page, to_page=first_page + page_count - 1)
+                self.from_packs += 1
+                return True
+        if not pdf_path or not os.path.exists(pdf_path):
+            self.missing.append(pdf_path)
+            return False
+        with fitz.open(pdf_path) as source:
+            self._doc.insert_pdf(source)
+        return True
+
+    def tobytes(self):
+        """Return the merged PDF, or None if no page was appended."""
+        if not self._doc.page_count:
+            return None
+        return self._doc.tobytes(garbage=3, deflate=True)
+
+    def close(self):
+        for pack in self._packs.values():
+            if pack is not None:
+                pack.close()
+        self._packs.clear()
+        self._doc.close()
+
+def merge_documents(pdf_paths, ranges=None):
+    """
+    Merge PDFs into one in-memory document, copying page ranges out of question packs
+    where ranges (from pack_ranges) has them.
+
+    Returns:
+        tuple: (PDF bytes or None if nothing was merged, list of missing paths)
+    """
+    with MergedDocument(ranges) as merged:
+        for pdf_path in pdf_paths:
+            merged.append(pdf_path)
+        return merged.tobytes(), merged.missing
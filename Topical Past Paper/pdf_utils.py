@@ -1,13 +1,49 @@
-import zipfile
 import os
 import tempfile
-from io import BytesIO
+import threading
+from collections import namedtuple
 from pdf2image import convert_from_path
 import streamlit as st
-import fitz
-from PIL import Image
-from PyPDF2 import PdfMerger
-import time
+from pdf_merge import MergedDocument, pack_ranges
+from zip_export import build_zip
+from progress import ProgressReporter
+from render_cache import get_render_cache, prerendered_pages, EncodingProfile
+from asset_index import read_index
+
+# Image encoding per subject. Maths is line art, which PNG keeps sharp and small; the
+# other subjects mix text with photos, charts and diagrams, which WebP compresses far
+# better. Pages are sized so that all pages of a question fit the main column of the
+# wide layout side by side.
+CONTENT_WIDTH = 1400
+ENCODING_PROFILES = {
+    'Pure Math': EncodingProfile('png', None, CONTENT_WIDTH),
+    'Stats': EncodingProfile('png', None, CONTENT_WIDTH),
+}
+DEFAULT_PROFILE = EncodingProfile('webp', 80, CONTENT_WIDTH, 'auto')
+
+# Page quality chosen in the sidebar: (share of CONTENT_WIDTH, highest zoom). 'auto' fits
+# the column, 'low' halves it for slow connections and 'high' doubles it for HiDPI screens.
+RESOLUTIONS = {
+    'auto': (1.0, 2),
+    'low': (0.5, 1),
+    'high': (2.0, 4),
+}
+# Sidebar labels of the qualities, capitalised like the colour modes
+RESOLUTION_LABELS = {
+    'Auto': 'auto',
+    'Low': 'low',
+    'High': 'high',
+}
+COLOUR_MODES = {
+    'Auto': 'auto',
+    'Grayscale': 'gray',
+    'Black & white': 'mono',
+}
+ViewMode = namedtuple('ViewMode', ['resolution', 'colour'])
+DEFAULT_VIEW = ViewMode('auto', 'auto')
+
+_transfer_lock = threading.Lock()
+_transfer = {}  # subject -> [views, bytes]
 
 def convert_pdf_to_images(pdf_path):
     """
@@ -19,7 +55,7 @@ def convert_pdf_to_images(pdf_path):
         st.error(f"Error converting PDF to images: {e}")
         return []
 
-def display_pdfs(question_pdf_path, answer_pdf_path, show_question=True):
+def display_pdfs(question_pdf_path, answer_pdf_path, show_question=True, subject_name=None, view=DEFAULT_VIEW):
     """
     Display PDFs for questions or answers based on the show_question flag, supporting enhanced resolution for specific subjects.
     
@@ -27,6 +63,8 @@ def display_pdfs(question_pdf_path, answer_pdf_path, show_question=True):
         question_pdf_path (str): Path to the question PDF file.
         answer_pdf_path (str): Path to the answer PDF file.
         show_question (bool, optional): If True, display question PDF; if False, display answer PDF.
+        subject_name (str, optional): Subject of the question, used to pick the image encoding.
+        view (ViewMode, optional): Page quality and colour mode chosen in the sidebar.
     """
     if show_question:
         pdf_type_path = question_pdf_path
@@ -40,39 +78,83 @@ def display_pdfs(question_pdf_path, answer_pdf_path, show_question=True):
         return
 
     try:
-        # Handle enhanced resolution for specific subjects
-        subjects_to_convert = ['Stats', 'Pure Math']
-        doc = fitz.open(pdf_type_path)  # Open the PDF
-        zoom = 2  # Higher resolution factor
-        mat = fitz.Matrix(zoom, zoom)
-
-        images = [page.get_pixmap(matrix=mat) for page in doc]  # Convert pages to high-res images
-        
-        if images:
-            cols = st.columns(len(images))  # Create columns for each page image
-            for i, image in enumerate(images):
-                pil_image = Image.frombytes("RGB", [image.width, image.height], image.samples)
-                with cols[i]:
-                    st.image(pil_image, caption=f"Page {i + 1}", use_column_width=True)
-        else:
-            st.warning("No images to display. The PDF might be empty or invalid.")
+        images = get_page_images(pdf_type_path, subject_name, view)
+        show_page_images(images, subject_name)
     except Exception as e:
         st.error(f"Error displaying PDF: {e}")
 
+def view_mode_selector():
+    """Show the page quality and colour controls in the sidebar and return the chosen ViewMode."""
+    with st.sidebar.expander("Page display"):
+        resolution = st.radio(
+            "Quality:", list(RESOLUTION_LABELS), horizontal=True, key="render_resolution",
+            help="Auto fits the pages to the screen; Low loads faster, High is sharper on large screens."
+        )
+        colour = st.radio(
+            "Colour:", list(COLOUR_MODES), horizontal=True, key="render_colour",
+            help="Auto shows pages without colour in grayscale. Black & white suits text-only pages."
+        )
+    return ViewMode(RESOLUTION_LABELS[resolution], COLOUR_MODES[colour])
 
-            
-def create_zip(question_path, answer_path):
+def encoding_profile(subject_name, view=DEFAULT_VIEW):
+    """Return the image encoding used for a subject's pages in a view mode."""
+    share, _ = RESOLUTIONS[view.resolution]
+    profile = ENCODING_PROFILES.get(subject_name, DEFAULT_PROFILE)
+    return profile._replace(content_width=int(profile.content_width * share), colour=view.colour)
+
+def get_page_images(pdf_path, subject_name=None, view=DEFAULT_VIEW):
     """
-    Create a ZIP file containing the question and answer PDFs, using BytesIO for in-memory zipping.
+    Return the pages of a question or answer PDF ready for st.image.
+
+    Images baked by prerender.py are served as they are when they are in colour mode
+    'auto'; anything else falls back to a live render through the render cache (MuPDF
+    only runs the first time a PDF is shown), encoded with the subject's profile. The
+    zoom follows from the page count and the quality's share of the column width.
     """
-    zip_buffer = BytesIO()
-    with zipfile.ZipFile(zip_buffer, "w") as zip_file:
-        if os.path.exists(question_path):
-            zip_file.write(question_path, os.path.basename(question_path))
-        if os.path.exists(answer_path):
-            zip_file.write(answer_path, os.path.basename(answer_path))
-    zip_buffer.seek(0)
-    return zip_buffer
+    share, max_zoom = RESOLUTIONS[view.resolution]
+    if view.colour == 'auto':
+        with read_index() as conn:
+            images = prerendered_pages(conn, pdf_path, int(CONTENT_WIDTH * share))
+        if images:
+            return images
+    return get_render_cache().get_pages(pdf_path, zoom=max_zoom, profile=encoding_profile(subject_name, view))
+
+def record_view(subject_name, images):
+    """Count the image bytes sent to the browser for one view of a question or answer."""
+    size = sum(len(image) if isinstance(image, bytes) else os.path.getsize(image) for image in images)
+    with _transfer_lock:
+        totals = _transfer.setdefault(subject_name or 'Unknown', [0, 0])
+        totals[0] += 1
+        totals[1] += size
+    return size
+
+def transfer_stats():
+    """Return views, bytes sent and bytes per view for each subject since the app started."""
+    with _transfer_lock:
+        return {
+            subject: {'views': views, 'bytes': size, 'bytes_per_view': size / views if views else 0.0}
+            for subject, (views, size) in _transfer.items()
+        }
+
+def show_page_images(images, subject_name=None):
+    """Show rendered pages (image files or encoded bytes) side by side, one column per page."""
+    if images:
+        record_view(subject_name, images)
+        cols = st.columns(len(images))  # Create columns for each page image
+        for i, image in enumerate(images):
+            with cols[i]:
+                st.image(image, caption=f"Page {i + 1}", use_column_width=True)
+    else:
+        st.warning("No images to display. The PDF might be empty or invalid.")
+
+
+            
+def create_zip(question_path, answer_path):
+    """Return the bytes of a ZIP file containing the question and answer PDFs (missing files are left out)."""
+    return build_zip([
+        (os.path.basename(question_path), question_path),
+        (os.path.basename(answer_path), answer_path),
+    ])
 
 def download_pdf(pdf_paths, zip_name, key):
     """
@@ -90,71 +172,45 @@ def download_pdf(pdf_paths, zip_name, key):
         key=key  # Ensure unique key for the download button
     )
 
-def display_pdf_quiz(pdf_path, subject_name):
-    subjects_to_convert = ['Stats', 'Pure Math']
+def display_pdf_quiz(pdf_path, subject_name, view=DEFAULT_VIEW):
+    images = get_page_images(pdf_path, subject_name, view)
+    show_page_images(images, subject_name)
 
-    doc = fitz.open(pdf_path)  # Open the PDF
-    # Improve image quality by increasing resolution
-    zoom = 2  # Increase the zoom factor to enhance image quality
-    mat = fitz.Matrix(zoom, zoom)  # Apply zoom to transformation matrix
-    
-    images = [page.get_pixmap(matrix=mat) for page in doc]  # Convert each page to an image at higher resolution
+def merge_pdfs(question_paths, answer_paths, progress_bar=None):
+    """
+    Merge a list of PDFs into two in-memory PDFs: one for questions and one for answers.
 
-    if subject_name in subjects_to_convert or True:
-        if images:
-            cols = st.columns(len(images))  # Create columns for the images
-            for i, image in enumerate(images):
-                pil_image = Image.frombytes("RGB", [image.width, image.height], image.samples)
-                with cols[i]:
-                    st.image(pil_image, caption=f"Page {i + 1}", use_column_width=True)
-        else:
-            st.warning("No images to display. The PDF might be empty or invalid.")
-    else:
-        st.error("Unsupported subject for PDF display.")
+    Questions baked into a question pack by build_packs.py are copied as page ranges out
+    of the pack instead of opening their own files. The progress bar counts merged
+    questions and is updated a few times per second.
 
-def create_zip(question_path, answer_path):
-    """Create a ZIP file containing the question and answer PDFs, using BytesIO for in-memory zipping."""
-    zip_buffer = BytesIO()
-    with zipfile.ZipFile(zip_buffer, "w") as zip_file:
-        if os.path.exists(question_path):
-            zip_file.write(question_path, os.path.basename(question_path))
-        if os.path.exists(answer_path):
-            zip_file.write(answer_path, os.path.basename(answer_path))
-    zip_buffer.seek(0)
-    return zip_buffer
-
-def merge_pdfs(question_paths, answer_paths, output_question_path="merged_question_paper.pdf", output_answer_path="merged_answer_sheet.pdf", progress_bar=None):
-    """Merges a list of PDFs into two PDFs: one for questions and one for answers."""
-    question_merger = PdfMerger()
-    answer_merger = PdfMerger()
-    
-    total_files = len(question_paths)
-    for i, (question_path, answer_path) in enumerate(zip(question_paths, answer_paths)):
-        if os.path.exists(question_path):
-            question_merger.append(question_path)
-        else:
-            st.warning(f"Question file not found: {question_path}")
-        
-        if os.path.exists(answer_path):
-            answer_merger.append(answer_path)
-        else:
-            st.warning(f"Answer file not found: {answer_path}")
-        
-        # Update progress bar manually with small increments
-        progress = (i + 1) / total_files * 100  # Get progress as a percentage
-        progress = min(max(progress, 0), 100)  # Ensure progress is between 0 and 100
-        if progress_bar:
-            progress_bar.progress(int(progress))  # Convert progress to integer
-            time.sleep(0.5)  # Increase delay to make the progress slower
-    
-    try:
-        question_merger.write(output_question_path)
-        question_merger.close()
-    except Exception as e:
-        st.error(f"Error while merging question papers: {e}")
+    Returns:
+        tuple: (question PDF bytes, answer PDF bytes); either is None if nothing could be merged.
+    """
+    with read_index() as conn:
+        ranges = pack_ranges(conn, list(question_paths) + list(answer_paths))
 
-    try:
-        answer_merger.write(output_answer_path)
-        answer_merger.close()
-    except Exception as e:
-        st.error(f"Error while merging answer sheets: {e}")
+    reporter = ProgressReporter(progress_bar, len(question_paths), unit="questions merged")
+    with MergedDocument(ranges) as question_merger, MergedDocument(ranges) as answer_merger:
+        for question_path, answer_path in zip(question_paths, answer_paths):
+            if not question_merger.append(question_path):
+                st.warning(f"Question file not found: {question_path}")
+
+            if not answer_merger.append(answer_path):
+                st.warning(f"Answer file not found: {answer_path}")
+
+            reporter.advance()
+        reporter.finish()
+
+        question_pdf = answer_pdf = None
+        try:
+            question_pdf = question_merger.tobytes()
+        except Exception as e:
+            st.error(f"Error while merging question papers: {e}")
+
+        try:
+            answer_pdf = answer_merger.tobytes()
+        except Exception as e:
+            st.error(f"Error while merging answer sheets: {e}")
+
+    return question_pdf, answer_pdf
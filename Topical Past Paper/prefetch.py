@@ -0,0 +1,78 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import streamlit as st
+
+from pdf_utils import get_page_images, DEFAULT_VIEW
+
+# Render threads shared by every session. Each session queues at most a handful of
+# PDFs, so a small pool keeps up, and the threads live as long as the server does.
+PREFETCH_WORKERS = 4
+_executor = None
+_executor_lock = threading.Lock()
+
+def get_executor():
+    """Return the process-wide prefetch thread pool, creating it on first use."""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=PREFETCH_WORKERS, thread_name_prefix="prefetch")
+    return _executor
+
+def warm(pdf_path, subject_name=None, view=DEFAULT_VIEW):
+    """Load a PDF's pages into the render cache; does nothing for answer letters or missing files."""
+    if not pdf_path or not pdf_path.lower().endswith(".pdf") or not os.path.exists(pdf_path):
+        return
+    get_page_images(pdf_path, subject_name, view)
+
+class Prefetcher:
+    """
+    A session's renders of the questions around the current one, queued on the shared
+    prefetch pool.
+
+    Only the latest request matters: PDFs that are no longer wanted are cancelled if they
+    have not started yet, so jumping ahead does not leave a queue of stale renders.
+    """
+    def __init__(self, executor=None):
+        self._executor = executor or get_executor()
+        self._futures = {}  # pdf path -> Future
+        self._lock = threading.Lock()
+
+    def prefetch(self, pdf_paths, subject_name=None, view=DEFAULT_VIEW):
+        """Warm the given PDFs in order of priority (first path first)."""
+        wanted = list(dict.fromkeys(path for path in pdf_paths if path))
+        with self._lock:
+            for path, future in list(self._futures.items()):
+                if path not in wanted and (future.done() or future.cancel()):
+                    del self._futures[path]
+            for path in wanted:
+                if path not in self._futures:
+                    self._futures[path] = self._executor.submit(warm, path, subject_name, view)
+
+    def cancel(self):
+        """Cancel this session's renders that have not started; the shared threads keep running."""
+        with self._lock:
+            for future in self._futures.values():
+                future.cancel()
+            self._futures.clear()
+
+def get_prefetcher():
+    """Return this session's prefetcher, creating it on first use."""
+    if "prefetcher" not in st.session_state:
+        st.session_state.prefetcher = Prefetcher()
+    return st.session_state.prefetcher
+
+def prefetch_neighbours(items, index, ahead=2, behind=1, current_answer=None, subject_name=None, view=DEFAULT_VIEW):
+    """
+    Warm the next `ahead` and previous `behind` PDFs around items[index] in the background.
+
+    The answer of the current question is queued right after the next question, so it is
+    ready when "Show Answer" is pressed.
+    """
+    paths = [items[index + 1]] if index + 1 < len(items) else []
+    paths.append(current_answer)
+    paths.extend(items[index + 2:index + 1 + ahead])
+    paths.extend(reversed(items[max(0, index - behind):index]))
+    get_prefetcher().prefetch(paths, subject_name, view)
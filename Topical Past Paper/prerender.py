@@ -0,0 +1,195 @@
+import argparse
+import hashlib
+import os
+import sqlite3
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import fitz
+from PIL import Image
+
+from asset_index import DEFAULT_PATH as INDEX_PATH, open_index
+from progress import ConsoleBar, ProgressReporter
+from render_cache import DISPLAY_WIDTH
+
+# Widths the pages are baked at; pdf_utils shows DISPLAY_WIDTH
+WIDTHS = (600, DISPLAY_WIDTH, 1800)
+DEFAULT_OUTPUT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "rendered_pages")
+
+def image_path(output_dir, source, mtime_ns, page_number, width, fmt):
+    """Return the content-addressed file for one page of a PDF at one width."""
+    key = hashlib.sha1(f"{source}\0{mtime_ns}".encode("utf-8")).hexdigest()
+    return os.path.join(output_dir, key[:2], f"{key}-p{page_number}-w{width}.{fmt}")
+
+def save_image(image, path, fmt, quality):
+    """Encode an image through a temporary file so the app never serves a partial one."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    os.close(fd)
+    try:
+        if fmt == "webp":
+            image.save(temp_path, "WEBP", quality=quality, method=4)
+        else:
+            image.save(temp_path, "PNG", optimize=True)
+        os.replace(temp_path, path)
+    except Exception:
+        os.unlink(temp_path)
+        raise
+    return os.path.getsize(path)
+
+def render_source(source, mtime_ns, widths, output_dir, fmt, quality):
+    """
+    Render every page of one PDF once, at the largest width, and save a copy per width.
+
+    Runs in a worker process. Returns the manifest rows
+    (source, width, page, source_mtime_ns, image, height, bytes).
+    """
+    rows = []
+    with fitz.open(source) as doc:
+        for page_number, page in enumerate(doc):
+            zoom = max(widths) / page.rect.width
+            pixmap = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom))
+            full = Image.frombytes("RGB", [pixmap.width, pixmap.height], pixmap.samples)
+            for width in sorted(widths, reverse=True):
+                height = max(1, round(full.height * width / full.width))
+                image = full if width == full.width else full.resize((width, height), Image.LANCZOS)
+                path = image_path(output_dir, source, mtime_ns, page_number, width, fmt)
+                size = save_image(image, path, fmt, quality)
+                rows.append((source, width, page_number, mtime_ns, path, image.height, size))
+    return rows
+
+def list_sources(conn):
+    """Return every question and mark scheme PDF path the app can show."""
+    query = """
+        SELECT Question FROM question_facts WHERE has_question = 1
+        UNION
+        SELECT Answer FROM question_facts WHERE answer_kind = 1
+    """
+    return [row[0] for row in conn.execute(query)]
+
+def pending_sources(index, sources, widths, force=False):
+    """
+    Return (source, mtime_ns) for the PDFs that need rendering and the number missing on disk.
+
+    A PDF is skipped when the manifest already holds every width for its current mtime.
+    """
+    done = {}
+    if not force:
+        for source, mtime_ns, count in index.execute(
+            "SELECT source, source_mtime_ns, COUNT(DISTINCT width) FROM rendered_pages "
+            f"WHERE width IN ({','.join('?' * len(widths))}) GROUP BY source, source_mtime_ns",
+            widths
+        ):
+            if count == len(widths):
+                done[source] = mtime_ns
+
+    pending = []
+    missing = 0
+    for source in sources:
+        try:
+            mtime_ns = os.stat(source).st_mtime_ns
+        except OSError:
+            missing += 1
+            continue
+        if done.get(source) != mtime_ns:
+            pending.append((source, mtime_ns))
+    return pending, missing
+
+def store_rows(index, source, rows):
+    """Replace the manifest entries of one PDF."""
+    index.execute("DELETE FROM rendered_pages WHERE source = ?", (source,))
+    index.executemany("INSERT INTO rendered_pages VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+
+def prune_missing(index):
+    """
+    Delete the manifest rows of PDFs that no longer exist, and the images baked from them.
+
+    Returns:
+        int: The number of PDFs pruned.
+    """
+    sources = [row[0] for row in index.execute("SELECT DISTINCT source FROM rendered_pages")]
+    gone = [source for source in sources if not os.path.exists(source)]
+    for source in gone:
+        for (image,) in index.execute("SELECT image FROM rendered_pages WHERE source = ?", (source,)).fetchall():
+            try:
+                os.unlink(image)
+            except OSError:
+                pass
+        index.execute("DELETE FROM rendered_pages WHERE source = ?", (source,))
+    index.commit()
+    return len(gone)
+
+def prerender(conn, index, widths=WIDTHS, output_dir=DEFAULT_OUTPUT, fmt="webp", quality=80, workers=None, force=False):
+    """
+    Bake every question and mark scheme PDF listed in past_papers.db (conn) into images
+    and record them in the rendered_pages table of the asset index (index).
+
+    PDFs are rendered in a process pool; the manifest is committed every 200 PDFs so an
+    interrupted run resumes where it stopped. A finished run prunes the rows and images
+    of PDFs deleted since they were baked.
+
+    Returns:
+        dict: Counters for rendered, skipped, missing, failed and pruned PDFs and bytes written.
+    """
+    sources = list_sources(conn)
+    pending, missing = pending_sources(index, sources, widths, force)
+    stats = {"sources": len(sources), "rendered": 0, "skipped": len(sources) - len(pending) - missing,
+             "missing": missing, "failed": 0, "pruned": 0, "bytes": 0}
+
+    reporter = ProgressReporter(ConsoleBar(), len(pending), unit="PDFs rendered", interval=5)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(render_source, source, mtime_ns, widths, output_dir, fmt, quality): source
+            for source, mtime_ns in pending
+        }
+        for future in as_completed(futures):
+            source = futures[future]
+            try:
+                rows = future.result()
+            except Exception as e:
+                print(f"Error rendering {source}: {e}")
+                stats["failed"] += 1
+                reporter.advance()
+                continue
+            store_rows(index, source, rows)
+            stats["rendered"] += 1
+            stats["bytes"] += sum(row[6] for row in rows)
+            reporter.advance()
+            if stats["rendered"] % 200 == 0:
+                index.commit()
+    reporter.finish()
+    index.commit()
+    stats["pruned"] = prune_missing(index)
+    return stats
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-render every question and mark scheme PDF into web-ready images.")
+    parser.add_argument("--db", default="past_papers.db", help="Path to the SQLite database file.")
+    parser.add_argument("--index", default=INDEX_PATH, help="Asset index the images are recorded in.")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="Folder the images are written to.")
+    parser.add_argument("--widths", type=int, nargs="+", default=list(WIDTHS), help="Image widths in pixels.")
+    parser.add_argument("--format", choices=("webp", "png"), default="webp", help="Image format.")
+    parser.add_argument("--quality", type=int, default=80, help="WebP quality (1-100).")
+    parser.add_argument("--workers", type=int, default=None, help="Render processes (default: one per CPU).")
+    parser.add_argument("--force", action="store_true", help="Re-render PDFs that are already up to date.")
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.db)
+    index = open_index(args.index)
+    try:
+        if conn.execute("PRAGMA user_version").fetchone()[0] < 2:
+            raise SystemExit("The database has no question_facts view; run database/migrations.py first.")
+        start = time.perf_counter()
+        stats = prerender(conn, index, tuple(args.widths), os.path.abspath(args.output), args.format,
+                          args.quality, args.workers, args.force)
+        elapsed = time.perf_counter() - start
+        print(f"Rendered {stats['rendered']} PDFs ({stats['bytes'] / 1024 / 1024:.1f} MiB), "
+              f"{stats['skipped']} up to date, {stats['missing']} missing, {stats['failed']} failed, "
+              f"{stats['pruned']} deleted PDFs pruned in {elapsed:.1f} s")
+    finally:
+        index.close()
+        conn.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+import sys
+import time
+
+class ConsoleBar:
+    """Stand-in for st.progress in command line tools: prints one line per update."""
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+
+    def progress(self, value, text=None):
+        print(text or f"{value}%", file=self.stream, flush=True)
+
+class ProgressReporter:
+    """
+    Reports the progress of a job counted in real work units (files merged, PDFs
+    rendered, ...) to a progress bar.
+
+    The bar is anything with st.progress's progress(value, text) method. Updates are
+    throttled to one every `interval` seconds, plus the first and the last one, so a
+    job of thousands of small units costs a handful of UI updates instead of one per unit.
+    """
+    def __init__(self, bar, total, unit="items", interval=0.25, clock=time.monotonic):
+        self.bar = bar
+        self.total = total
+        self.unit = unit
+        self.interval = interval
+        self.clock = clock
+        self.done = 0
+        self.updates = 0
+        self.started = clock()
+        self._last_update = None
+        self._shown = None  # count shown by the last update
+
+    def advance(self, units=1):
+        """Count finished units and update the bar if the last update is old enough."""
+        self.done += units
+        now = self.clock()
+        if self._last_update is None or now - self._last_update >= self.interval or self.done >= self.total:
+            self._update(now)
+
+    def finish(self):
+        """Show the final count, whatever the throttle says."""
+        if self._shown != self.done:
+            self._update(self.clock())
+
+    def rate(self):
+        """Return the units finished per second so far."""
+        elapsed = self.clock() - self.started
+        return self.done / elapsed if elapsed > 0 else 0.0
+
+    def _update(self, now):
+        self._last_update = now
+        self._shown = self.done
+        self.updates += 1
+        if self.bar is None:
+            return
+        percent = int(min(max(self.done / self.total * 100, 0), 100)) if self.total else 100
+        self.bar.progress(percent, text=f"{self.done} of {self.total} {self.unit}")
@@ -2,11 +2,11 @@ import streamlit as st
 import sqlite3
 import random
 from filter_logic import (
-    connect_to_db, get_topics, get_subtopics,
-    get_years, get_variants, get_paper_numbers, get_paper_variants,
-    get_difficulties, filter_papers, filter_subjects_by_paper_number_and_answer
+    connect_to_db, get_facets, facet_label, select_papers,
+    filter_subjects_by_paper_number_and_answer
 )
-from pdf_utils import display_pdf_quiz
+from pdf_utils import display_pdf_quiz, view_mode_selector
+from prefetch import prefetch_neighbours
 from doubly_linked_list_quiz import DoublyLinkedList
 from theme_management import toggle_theme
 
@@ -19,6 +19,7 @@ def main():
     with st.sidebar:
         st.header("🌙 Theme Toggle")
         toggle_theme()
+    view = view_mode_selector()
     load_css("styles.css")  # Load and apply the CSS
 
     # Main app title and description
@@ -61,98 +62,105 @@ def main():
             selected_paper_variants = st.session_state.get("paper_variants_multiselect", [])
             selected_difficulties = st.session_state.get("difficulties_multiselect", [])
 
+            # Options and question counts for every dropdown, narrowed by the selections above them
+            facets = get_facets(conn, {
+                'Subject_name': selected_subject,
+                'Topic': selected_topics,
+                'Sub_topic': selected_subtopics,
+                'Year': selected_years,
+                'Variant': selected_variants,
+                'Paper_number': selected_paper_numbers,
+                'Paper_variant': selected_paper_variants
+            })
+
             # Topic and Subtopic Expansion Panels
             if selected_subject:
                 with st.expander("Select Topics and Subtopics"):
-                    topics = get_topics(conn, selected_subject)
+                    topics = list(facets['Topic'])
                     select_all_topics = st.checkbox("Select All Topics", key="all_topics")
                     selected_topics = st.multiselect(
                         "Topics:",
                         topics,
                         default=topics if select_all_topics else [],
                         key="topics_multiselect",
+                        format_func=facet_label(facets['Topic']),
                         help="Choose one or more topics to narrow down the papers."
                     )
 
                     if selected_topics:
-                        subtopics = get_subtopics(conn, selected_subject, selected_topics)
+                        subtopics = list(facets['Sub_topic'])
                         select_all_subtopics = st.checkbox("Select All Subtopics", key="all_subtopics")
                         selected_subtopics = st.multiselect(
                             "Subtopics:",
                             subtopics,
                             default=subtopics if select_all_subtopics else [], 
                             key="subtopics_multiselect",
+                            format_func=facet_label(facets['Sub_topic']),
                             help="Choose subtopics for more specific filtering."
                         )
 
                 # Year and Variant Expansion Panels
                 with st.expander("Select Year and Variants"):
-                    years = get_years(conn, selected_subject, selected_topics, selected_subtopics)
+                    years = list(facets['Year'])
                     select_all_years = st.checkbox("Select All Years", key="all_years")
                     selected_years = st.multiselect(
                         "Years:",
                         years,
                         default=years if select_all_years else [], 
                         key="years_multiselect",
+                        format_func=facet_label(facets['Year']),
                         help="Select the years for which you want to see past papers."
                     )
 
                     if selected_years:
-                        variants = get_variants(conn, selected_subject, selected_years, selected_topics, selected_subtopics)
+                        variants = list(facets['Variant'])
                         select_all_variants = st.checkbox("Select All Variants", key="all_variants")
                         selected_variants = st.multiselect(
                             "Variants:",
                             variants,
                             default=variants if select_all_variants else [], 
                             key="variants_multiselect",
+                            format_func=facet_label(facets['Variant']),
                             help="Choose paper variants if applicable."
                         )
 
                 # Paper Number and Variant Expansion Panels
                 with st.expander("Select Paper Numbers and Variants"):
                     if selected_variants:
-                        paper_numbers = get_paper_numbers(
-                            conn, selected_subject, selected_years, 
-                            selected_variants, selected_topics, selected_subtopics
-                        )
+                        paper_numbers = list(facets['Paper_number'])
                         select_all_paper_numbers = st.checkbox("Select All Paper Numbers", key="all_paper_numbers")
                         selected_paper_numbers = st.multiselect(
                             "Paper Numbers:",
                             paper_numbers,
                             default=paper_numbers if select_all_paper_numbers else [], 
                             key="paper_numbers_multiselect",
+                            format_func=facet_label(facets['Paper_number']),
                             help="Select specific paper numbers."
                         )
 
                         if selected_paper_numbers:
-                            paper_variants = get_paper_variants(
-                                conn, selected_subject, selected_years, 
-                                selected_variants, selected_paper_numbers, 
-                                selected_topics, selected_subtopics
-                            )
+                            paper_variants = list(facets['Paper_variant'])
                             select_all_paper_variants = st.checkbox("Select All Paper Variants", key="all_paper_variants")
                             selected_paper_variants = st.multiselect(
                                 "Paper Variants:",
                                 paper_variants,
                                 default=paper_variants if select_all_paper_variants else [], 
                                 key="paper_variants_multiselect",
+                                format_func=facet_label(facets['Paper_variant']),
                                 help="Choose paper variants if available."
                             )
 
                 # Difficulty Level Expansion Panel
                 with st.expander("Select Difficulty Levels"):
                     if selected_paper_variants:
-                        difficulties = get_difficulties(
-                            conn, selected_subject, selected_years, 
-                            selected_variants, selected_paper_numbers, 
-                            selected_paper_variants, selected_topics, selected_subtopics
-                        )
+                        difficulties = list(facets['Difficulty'])
                         select_all_difficulties = st.checkbox("Select All Difficulties", key="all_difficulties")
                         selected_difficulties = st.multiselect(
                             "Difficulty Levels:",
                             difficulties,
                             default=difficulties if select_all_difficulties else [], 
                             key="difficulties_multiselect",
+                            format_func=facet_label(facets['Difficulty']),
                             help="Filter papers by difficulty level."
                         )
 
@@ -162,8 +170,9 @@ def main():
         if st.button("Generate Papers", key="generate_papers_button"):
             st.session_state.user_feedback = None  # Clear feedback
             with st.spinner("Loading papers..."):
-                filtered_data = filter_papers(
+                filtered_data = select_papers(
                     conn,
+                    ('Question', 'Subject_name', 'Answer'),
                     selected_subject,
                     selected_years,
                     selected_variants,
@@ -180,9 +189,9 @@ def main():
                 paper_paths_list = DoublyLinkedList()
                 
                 for paper in filtered_data:
-                    file_path = paper[11]
-                    subject_name = paper[0]
-                    correct_answer = paper[12]  # Correct answer from the database
+                    file_path = paper.Question
+                    subject_name = paper.Subject_name
+                    correct_answer = paper.Answer  # Correct answer from the database
                     paper_paths_list.append((file_path, subject_name, correct_answer))
                 
                 st.session_state.paper_paths_list = paper_paths_list
@@ -197,7 +206,17 @@ def main():
 
             if st.session_state.current_node:
                 pdf_path, subject_name, correct_answer = st.session_state.current_node.data
-                display_pdf_quiz(pdf_path, subject_name)
+                display_pdf_quiz(pdf_path, subject_name, view)
+
+                # Render the neighbouring questions while the user is answering this one
+                node = st.session_state.current_node
+                behind = [node.prev.data[0]] if node.prev else []
+                ahead = []
+                following = node.next
+                while following and len(ahead) < 2:
+                    ahead.append(following.data[0])
+                    following = following.next
+                prefetch_neighbours(behind + [pdf_path] + ahead, len(behind), subject_name=subject_name, view=view)
 
                 col1, col2 = st.columns([1, 1])
                 with col1:
@@ -0,0 +1,323 @@
+import hashlib
+import os
+import sqlite3
+import tempfile
+import threading
+from collections import OrderedDict, namedtuple
+from io import BytesIO
+
+import fitz
+from PIL import Image, ImageChops
+
+DEFAULT_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".render_cache")
+
+# Width of the pre-rendered images the app shows; about what a live render at zoom 2
+# gives for an A4 page (595 points wide).
+DISPLAY_WIDTH = 1200
+
+# How rendered pages are encoded: format ('png', 'jpeg' or 'webp'), quality for the lossy
+# formats, the pixel width all of a PDF's pages share when shown side by side (None
+# renders at the full zoom) and the colour mode: 'rgb', 'gray', 'mono' (1-bit, for
+# text-only pages) or 'auto' (gray for every page without colour, RGB for the rest).
+EncodingProfile = namedtuple('EncodingProfile', ['fmt', 'quality', 'content_width', 'colour'], defaults=('rgb',))
+PNG_PROFILE = EncodingProfile('png', None, None)
+
+# Largest channel difference a pixel may have and still count as gray; scanned papers
+# are never exactly neutral.
+GRAY_TOLERANCE = 24
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+def prerendered_pages(conn, pdf_path, content_width=DISPLAY_WIDTH):
+    """
+    Return the image files prerender.py baked for a PDF, or None on a miss.
+
+    Of the baked widths, the smallest one at least as wide as the PDF's share of
+    content_width (one column per page) is chosen, or the widest if none is.
+    A miss is a PDF that was never pre-rendered, was modified since, or no asset index
+    (conn is None before prerender.py first runs).
+    """
+    if conn is None:
+        return None
+    try:
+        mtime_ns = os.stat(pdf_path).st_mtime_ns
+        rows = conn.execute(
+            "SELECT width, image FROM rendered_pages WHERE source = ? AND source_mtime_ns = ? ORDER BY width, page",
+            (pdf_path, mtime_ns)
+        ).fetchall()
+    except (OSError, sqlite3.Error):
+        return None
+    by_width = {}
+    for width, image in rows:
+        by_width.setdefault(width, []).append(image)
+    if not by_width:
+        return None
+    fitting = [width for width, images in by_width.items() if width * len(images) >= content_width]
+    images = by_width[min(fitting) if fitting else max(by_width)]
+    if not all(os.path.exists(image) for image in images):
+        return None
+    return images
+
+def is_colourless(page, tolerance=GRAY_TOLERANCE):
+    """Return True if a page has no colour, judged from a small RGB thumbnail."""
+    thumbnail = page.get_pixmap(matrix=fitz.Matrix(0.25, 0.25), alpha=False)
+    image = Image.frombytes("RGB", [thumbnail.width, thumbnail.height], thumbnail.samples)
+    red, green, blue = image.split()
+    spread = max(
+        ImageChops.difference(red, green).getextrema()[1],
+        ImageChops.difference(green, blue).getextrema()[1],
+    )
+    return spread <= tolerance
+
+def encode_pixmap(pixmap, profile, mono=False):
+    """
+    Encode a rendered RGB or gray page.
+
+    MuPDF writes PNG and JPEG itself, WebP goes through Pillow. With mono the page is
+    thresholded to a 1-bit PNG whatever the format, as neither lossy format has a
+    1-bit mode.
+    """
+    if mono or profile.fmt == 'webp':
+        mode = "L" if pixmap.n == 1 else "RGB"
+        image = Image.frombytes(mode, [pixmap.width, pixmap.height], pixmap.samples)
+        buffer = BytesIO()
+        if mono:
+            image.convert("1").save(buffer, "PNG", optimize=True)
+        else:
+            image.save(buffer, "WEBP", quality=profile.quality)
+        return buffer.getvalue()
+    if profile.fmt == 'png':
+        return pixmap.tobytes("png")
+    if profile.fmt == 'jpeg':
+        return pixmap.tobytes("jpeg", jpg_quality=profile.quality)
+    raise ValueError(f"Unsupported image format: {profile.fmt}")
+
+def render_pages(pdf_path, zoom=2, profile=PNG_PROFILE):
+    """
+    Rasterize every page of a PDF with MuPDF and return the encoded pages.
+
+    With a content width, pages are scaled down so that all of them side by side fit
+    in it; they are never scaled above the zoom. Gray and 1-bit pages are rasterized
+    straight into a one-channel pixmap, a third of the memory of RGB.
+    """
+    pages = []
+    with fitz.open(pdf_path) as doc:
+        for page in doc:
+            page_zoom = zoom
+            if profile.content_width:
+                page_zoom = min(zoom, profile.content_width / len(doc) / page.rect.width)
+            colour = profile.colour
+            if colour == 'auto':
+                colour = 'gray' if is_colourless(page) else 'rgb'
+            colorspace = fitz.csRGB if colour == 'rgb' else fitz.csGRAY
+            pixmap = page.get_pixmap(matrix=fitz.Matrix(page_zoom, page_zoom), colorspace=colorspace, alpha=False)
+            pages.append(encode_pixmap(pixmap, profile, mono=colour == 'mono'))
+    return tuple(pages)
+
+class RenderCache:
+    """
+    Two-tier cache of rendered PDF pages, shared by every session in the process.
+
+    Pages are addressed by the PDF's path, modification time and size, the page number,
+    the zoom and the encoding profile, so an edited PDF is simply a new address. The first tier is an LRU
+    of encoded images bounded by memory_bytes; the second is a directory of image
+    files that survives restarts and is shared by every process of the app, kept under
+    disk_bytes by deleting the least recently used documents. Only a miss in both runs
+    MuPDF.
+    """
+    def __init__(self, directory=DEFAULT_DIRECTORY, memory_bytes=64 * 1024 * 1024, disk_bytes=1024 * 1024 * 1024):
+        self.directory = directory
+        self.memory_bytes = memory_bytes
+        self.disk_bytes = disk_bytes
+        self._entries = OrderedDict()  # document key -> tuple of encoded page bytes
+        self._pending = {}  # document key -> threading.Event for renders in flight
+        self._size = 0
+        self._lock = threading.Lock()
+        self._disk_lock = threading.Lock()  # one directory scan at a time
+        self._disk_size = None  # bytes in the directory at the last scan plus writes since
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.renders = 0
+        self.evictions = 0
+        self.disk_evictions = 0
+
+    def document_key(self, pdf_path, zoom, profile=PNG_PROFILE):
+        """Return the content address of a PDF rendered at a zoom; changes whenever the file does."""
+        path = os.path.abspath(pdf_path)
+        stat = os.stat(path)
+        identity = f"{path}\0{stat.st_mtime_ns}\0{stat.st_size}\0{zoom}\0{tuple(profile)}"
+        return hashlib.sha1(identity.encode("utf-8")).hexdigest()
+
+    def _page_file(self, key, page_number):
+        # The format is part of the key, so the files need no extension of their own
+        return os.path.join(self.directory, key[:2], f"{key}-{page_number:03d}.img")
+
+    def _count_file(self, key):
+        return os.path.join(self.directory, key[:2], f"{key}.pages")
+
+    def _remember(self, key, pages):
+        """Add a document's pages to the memory tier, evicting the least recently used ones."""
+        size = sum(len(page) for page in pages)
+        if size > self.memory_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                return
+            self._entries[key] = pages
+            self._size += size
+            while self._size > self.memory_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= sum(len(page) for page in evicted)
+                self.evictions += 1
+
+    def _read_disk(self, key):
+        """Return the stored pages, or None if the document has not been fully written."""
+        try:
+            with open(self._count_file(key)) as f:
+                count = int(f.read())
+            pages = []
+            for page_number in range(count):
+                with open(self._page_file(key, page_number), "rb") as f:
+                    pages.append(f.read())
+            os.utime(self._count_file(key))  # Mark as recently used for eviction
+        except (OSError, ValueError):
+            return None
+        return tuple(pages)
+
+    def _write_file(self, path, data):
+        """Write through a temporary file so readers never see a partial image."""
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(temp_path, path)
+        except OSError:
+            os.unlink(temp_path)
+            raise
+
+    def _write_disk(self, key, pages):
+        """Store the pages, then the page count that marks the document as complete."""
+        try:
+            os.makedirs(os.path.dirname(self._count_file(key)), exist_ok=True)
+            for page_number, page in enumerate(pages):
+                self._write_file(self._page_file(key, page_number), page)
+            self._write_file(self._count_file(key), str(len(pages)).encode("ascii"))
+        except OSError:
+            return  # A read-only or full disk only costs the second tier
+        with self._lock:
+            if self._disk_size is not None:
+                self._disk_size += sum(len(page) for page in pages)
+                if self._disk_size <= self.disk_bytes:
+                    return
+        self.evict_disk()
+
+    def disk_entries(self):
+        """Return (last used, bytes, files) for every document in the directory."""
+        entries = {}
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                if not name.endswith((".img", ".pages")):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                key = name.split("-")[0].split(".")[0]
+                used, size, files = entries.get(key, (0, 0, []))
+                entries[key] = (max(used, stat.st_mtime), size + stat.st_size, files + [path])
+        return list(entries.values())
+
+    def evict_disk(self):
+        """Delete the least recently used documents until the directory fits disk_bytes."""
+        with self._disk_lock:
+            entries = sorted(self.disk_entries())
+            total = sum(size for _, size, _ in entries)
+            for _, size, files in entries:
+                if total <= self.disk_bytes:
+                    break
+                # The page count goes first, so no reader finds a document with pages missing
+                for path in sorted(files, key=lambda path: not path.endswith(".pages")):
+                    try:
+                        os.unlink(path)
+                    except OSError:
+                        pass
+                total -= size
+                with self._lock:
+                    self.disk_evictions += 1
+            with self._lock:
+                self._disk_size = total
+
+    def get_pages(self, pdf_path, zoom=2, profile=PNG_PROFILE):
+        """
+        Return every page of the PDF as encoded bytes, rendering only on a miss in both tiers.
+
+        A request for a document that another thread (e.g. the prefetcher) is already
+        rendering waits for that render instead of starting a second one.
+        """
+        key = self.document_key(pdf_path, zoom, profile)
+        while True:
+            with self._lock:
+                pages = self._entries.get(key)
+                if pages is not None:
+                    self._entries.move_to_end(key)
+                    self.memory_hits += 1
+                    return pages
+                pending = self._pending.get(key)
+                if pending is None:
+                    pending = self._pending[key] = threading.Event()
+                    break
+            # Another thread is loading this document; wait and look again
+            pending.wait()
+
+        try:
+            pages = self._read_disk(key)
+            if pages is not None:
+                with self._lock:
+                    self.disk_hits += 1
+            else:
+                pages = render_pages(pdf_path, zoom, profile)
+                with self._lock:
+                    self.renders += 1
+                self._write_disk(key, pages)
+            self._remember(key, pages)
+            return pages
+        finally:
+            with self._lock:
+                del self._pending[key]
+            pending.set()
+
+    def clear(self):
+        """Empty the memory tier (the directory is left alone)."""
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def stats(self):
+        """Return hit counters per tier and the memory tier's size."""
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.renders
+            return {
+                'memory_hits': self.memory_hits,
+                'disk_hits': self.disk_hits,
+                'renders': self.renders,
+                'hit_rate': (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+                'memory_bytes': self._size,
+                'memory_budget': self.memory_bytes,
+                'documents': len(self._entries),
+                'evictions': self.evictions,
+                'disk_budget': self.disk_bytes,
+                'disk_evictions': self.disk_evictions,
+            }
+
+def get_render_cache(directory=DEFAULT_DIRECTORY, **options):
+    """Return the process-wide render cache for a directory, creating it on first use."""
+    key = (os.path.abspath(directory), tuple(sorted(options.items())))
+    cache = _caches.get(key)
+    if cache is None:
+        with _caches_lock:
+            cache = _caches.get(key)
+            if cache is None:
+                cache = _caches[key] = RenderCache(directory, **options)
+    return cache
@@ -0,0 +1,107 @@
+import threading
+import time
+from collections import OrderedDict
+
+def canonical_values(values):
+    """
+    Normalize one selection to a hashable, order-independent tuple.
+
+    None, '' and [] all become (), a scalar becomes a one-element tuple, and values are
+    compared as text so that 2021 and '2021' (equal under SQLite's affinity) share a key.
+    """
+    if values is None or values == '':
+        return ()
+    if not isinstance(values, (list, tuple, set)):
+        values = [values]
+    items = {value if value is None else str(value) for value in values}
+    return tuple(sorted(items, key=lambda value: (value is None, value or '')))
+
+class ResultCache:
+    """
+    Bounded, thread-safe LRU cache with a time-to-live, shared by every session in the process.
+
+    Entries are tagged with the signature of the data they were computed from; a call with a
+    different signature empties the cache. Concurrent misses on the same key wait for the
+    first caller's result instead of all running the query (e.g. a class opening the same
+    worksheet at once).
+    """
+    def __init__(self, max_entries=256, ttl=600):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._pending = {}  # key -> threading.Event for computations in flight
+        self._signature = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def _lookup(self, key, now):
+        """Return (found, value). Caller holds the lock."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+        if entry[0] < now:
+            del self._entries[key]
+            self.expirations += 1
+            return False, None
+        self._entries.move_to_end(key)
+        return True, entry[1]
+
+    def get_or_compute(self, key, compute, signature=None):
+        """Return the cached value for key, calling compute() on a miss."""
+        while True:
+            with self._lock:
+                if signature != self._signature:
+                    if self._entries:
+                        self.invalidations += 1
+                    self._entries.clear()
+                    self._signature = signature
+                found, value = self._lookup(key, time.monotonic())
+                if found:
+                    self.hits += 1
+                    return value
+                pending = self._pending.get(key)
+                if pending is None:
+                    self.misses += 1
+                    pending = self._pending[key] = threading.Event()
+                    break
+            # Another thread is computing this key; wait and look again.
+            pending.wait()
+
+        try:
+            value = compute()
+            with self._lock:
+                if signature == self._signature:
+                    self._entries[key] = (time.monotonic() + self.ttl, value)
+                    self._entries.move_to_end(key)
+                    while len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+                        self.evictions += 1
+            return value
+        finally:
+            with self._lock:
+                del self._pending[key]
+            pending.set()
+
+    def clear(self):
+        """Drop every entry."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Return hit/miss counters, the hit rate and the current size."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'size': len(self._entries),
+                'max_entries': self.max_entries,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations,
+            }
@@ -0,0 +1,68 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from connection_pool import ConnectionPool, get_pool
+
+class ConnectionPoolTest(unittest.TestCase):
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+        with sqlite3.connect(self.path) as conn:
+            conn.execute("CREATE TABLE questions (id INTEGER PRIMARY KEY, year INTEGER)")
+            conn.execute("INSERT INTO questions (year) VALUES (2021)")
+        conn.close()
+        self.pool = ConnectionPool(self.path)
+
+    def tearDown(self):
+        self.pool.close()
+        os.unlink(self.path)
+
+    def test_connections_are_read_only(self):
+        with self.pool.connection() as conn:
+            self.assertEqual(conn.execute("SELECT year FROM questions").fetchall(), [(2021,)])
+            with self.assertRaises(sqlite3.Error):
+                conn.execute("INSERT INTO questions (year) VALUES (2022)")
+
+    def test_idle_connections_are_reused(self):
+        with self.pool.connection() as first:
+            pass
+        with self.pool.connection() as second:
+            self.assertIs(second, first)
+        self.assertEqual((self.pool.stats()['opens'], self.pool.stats()['hits']), (1, 1))
+
+    def test_idle_connections_are_recycled_when_the_file_changes(self):
+        with self.pool.connection() as first:
+            pass
+        with sqlite3.connect(self.path) as writer:
+            writer.execute("INSERT INTO questions (year) VALUES (2022)")
+        writer.close()
+        # Make sure the write shows in the mtime even on a coarse-grained file system
+        stat = os.stat(self.path)
+        os.utime(self.path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+        with self.pool.connection() as second:
+            self.assertIsNot(second, first)
+            self.assertEqual(second.execute("SELECT count(*) FROM questions").fetchone(), (2,))
+        self.assertEqual(self.pool.stats()['recycled'], 1)
+
+    def test_idle_connections_are_capped(self):
+        pool = ConnectionPool(self.path, max_idle=1)
+        with pool.connection(), pool.connection():
+            self.assertEqual(pool.stats()['in_use'], 2)
+        self.assertEqual(pool.stats()['idle'], 1)
+        pool.close()
+
+    def test_a_missing_file_is_not_created(self):
+        missing = self.path + '.missing'
+        with self.assertRaises(Exception):
+            with ConnectionPool(missing).connection():
+                pass
+        self.assertFalse(os.path.exists(missing))
+
+    def test_one_pool_per_file_and_options(self):
+        self.assertIs(get_pool(self.path), get_pool(self.path))
+        self.assertIsNot(get_pool(self.path), get_pool(self.path, immutable=True))
+
+if __name__ == "__main__":
+    unittest.main()
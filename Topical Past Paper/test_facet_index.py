@@ -0,0 +1,98 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from facet_index import FacetIndex, get_facet_index
+
+COLUMNS = ('Subject_name', 'Year', 'Paper_variant')
+ROWS = [
+    ('Physics', 2021, '11'),
+    ('Physics', 2021, '12'),
+    ('Physics', 2022, '11'),
+    ('Chemistry', 2021, '11'),
+    ('Chemistry', None, '21'),
+]
+
+# The tables FacetIndex.load reads, with one name in each dimension it filters on
+SCHEMA = """
+    CREATE TABLE subjects (id INTEGER PRIMARY KEY, name TEXT);
+    CREATE TABLE topics (id INTEGER PRIMARY KEY, name TEXT);
+    CREATE TABLE subtopics (id INTEGER PRIMARY KEY, name TEXT);
+    CREATE TABLE sessions (id INTEGER PRIMARY KEY, name TEXT);
+    CREATE TABLE difficulties (id INTEGER PRIMARY KEY, name TEXT);
+    CREATE TABLE questions (
+        id INTEGER PRIMARY KEY, subject_id INTEGER, topic_id INTEGER, subtopic_id INTEGER,
+        year INTEGER, session_id INTEGER, paper_number INTEGER, paper_variant INTEGER,
+        difficulty_id INTEGER, has_question INTEGER
+    );
+    INSERT INTO subjects VALUES (1, 'Physics');
+    INSERT INTO topics VALUES (1, 'Waves');
+    INSERT INTO sessions VALUES (1, 'May/June');
+    INSERT INTO difficulties VALUES (1, 'Easy');
+"""
+
+def add_question(conn, year, has_question=1):
+    conn.execute("INSERT INTO questions VALUES (NULL, 1, 1, NULL, ?, 1, 1, 12, 1, ?)", (year, has_question))
+    conn.commit()
+
+class FacetIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.index = FacetIndex(ROWS, COLUMNS)
+
+    def test_facets_count_rows_narrowed_by_earlier_selections(self):
+        facets = self.index.facets({'subject_name': 'Physics'})
+        self.assertEqual(facets['Subject_name'], {'Physics': 3, 'Chemistry': 2})
+        self.assertEqual(facets['Year'], {2021: 2, 2022: 1})
+        self.assertEqual(facets['Paper_variant'], {'11': 2, '12': 1})
+
+    def test_later_selections_do_not_narrow_earlier_columns(self):
+        facets = self.index.facets({'Year': [2022]})
+        self.assertEqual(facets['Subject_name'], {'Physics': 3, 'Chemistry': 2})
+        self.assertEqual(facets['Paper_variant'], {'11': 1})
+
+    def test_values_match_across_sqlite_affinity(self):
+        self.assertEqual(self.index.distinct('Subject_name', {'Year': '2022'}), ['Physics'])
+        self.assertEqual(self.index.distinct('Year', {'Paper_variant': 12}), [2021])
+
+    def test_null_and_empty_lists_match_nothing(self):
+        self.assertEqual(self.index.mask({'Year': None}), 0)
+        self.assertEqual(self.index.distinct('Year', {'Subject_name': []}), [])
+
+    def test_covers_only_indexed_columns(self):
+        self.assertTrue(self.index.covers('year', {'subject_name': 'Physics'}))
+        self.assertFalse(self.index.covers('Marks'))
+
+class GetFacetIndexTest(unittest.TestCase):
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+        self.conn = sqlite3.connect(self.path)
+        self.conn.executescript(SCHEMA)
+        add_question(self.conn, 2021)
+        add_question(self.conn, 2022, has_question=0)
+
+    def tearDown(self):
+        self.conn.close()
+        os.unlink(self.path)
+
+    def test_index_loads_named_questions_with_a_pdf(self):
+        index = get_facet_index(self.conn)
+        self.assertEqual(index.facets()['Year'], {2021: 1})
+        self.assertEqual(index.facets()['Subject_name'], {'Physics': 1})
+        self.assertEqual(index.facets()['Paper_variant'], {'12': 1})
+
+    def test_index_is_shared_until_the_file_changes(self):
+        index = get_facet_index(self.conn)
+        self.assertIs(get_facet_index(self.conn), index)
+
+        add_question(self.conn, 2023)
+        # Make sure the rewrite shows in the mtime even on a coarse-grained file system
+        stat = os.stat(self.path)
+        os.utime(self.path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+        rebuilt = get_facet_index(self.conn)
+        self.assertIsNot(rebuilt, index)
+        self.assertEqual(rebuilt.facets()['Year'], {2021: 1, 2023: 1})
+
+if __name__ == "__main__":
+    unittest.main()
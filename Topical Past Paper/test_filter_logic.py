@@ -0,0 +1,80 @@
+import os
+import sqlite3
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "database"))
+from migrations import migrate
+
+from filter_logic import PAPER_COLUMNS, filter_papers, iter_papers, select_papers
+
+# Rows in the original past_papers layout: Physics has two MCQ questions with answer keys,
+# one of them without a generated question PDF, and a paper 2 question in variant 12.
+PAST_PAPERS = [
+    ("Physics", "9702", "Waves", None, 1, "11", "May/June", "Easy", 2021, 1, "1", "q1.pdf", "B"),
+    ("Physics", "9702", "Waves", None, 1, "11", "May/June", "Hard", 2021, 1, "2", None, "C"),
+    ("Physics", "9702", "Motion", None, 2, "12", "Oct/Nov", "Medium", 2022, 6, "3", "q3.pdf", "ms3.pdf"),
+    ("Chemistry", "9701", "Atoms", None, 1, "11", "May/June", "Easy", 2021, 1, "1", "q1.pdf", "A"),
+]
+
+def migrated_database():
+    """Return an in-memory database holding PAST_PAPERS, migrated to the latest version."""
+    conn = sqlite3.connect(":memory:")
+    conn.execute("""
+        CREATE TABLE past_papers (
+            Subject_name TEXT, Subject_code TEXT, Topic TEXT, Sub_topic TEXT,
+            Paper_number INTEGER, Paper_variant TEXT, Variant TEXT, Difficulty TEXT,
+            Year INTEGER, Marks INTEGER, Question_Number TEXT, Question TEXT, Answer TEXT
+        )
+    """)
+    conn.executemany("INSERT INTO past_papers VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", PAST_PAPERS)
+    conn.commit()
+    migrate(conn, vacuum=False)
+    return conn
+
+class SelectPapersTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # One database for the whole class: the result caches are process-wide
+        cls.conn = migrated_database()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.conn.close()
+
+    def test_records_hold_only_the_requested_columns(self):
+        papers = select_papers(self.conn, ('Question_Number', 'Answer'), 'Physics')
+        self.assertEqual(type(papers[0])._fields, ('Question_Number', 'Answer'))
+        self.assertEqual(sorted(papers), [('1', 'B'), ('3', 'C:/Users/Projects/TPP/output_questions/ms/9702/2022/Oct_Nov/12/3.pdf')])
+
+    def test_questions_without_a_pdf_are_left_out(self):
+        numbers = [paper.Question_Number for paper in select_papers(self.conn, ('Question_Number',), 'Physics', years=[2021])]
+        self.assertEqual(numbers, ['1'])
+
+    def test_streaming_returns_the_same_records_in_any_batch_size(self):
+        columns = ('Subject_code', 'Question_Number', 'Marks')
+        streamed = list(iter_papers(self.conn, columns, 'Physics', batch_size=1))
+        self.assertEqual(sorted(streamed), sorted(select_papers(self.conn, columns, 'Physics')))
+        self.assertEqual(len(streamed), 2)
+
+    def test_paper_variants_match_as_shown(self):
+        papers = select_papers(self.conn, ('Question_Number',), 'Physics', paper_variants=['12'])
+        self.assertEqual(papers, [('3',)])
+
+    def test_names_are_filtered_through_their_dimension_tables(self):
+        papers = select_papers(self.conn, ('Question_Number',), 'Physics', variants=['Oct/Nov'], difficulties=['Medium'], topics=['Motion'])
+        self.assertEqual(papers, [('3',)])
+        self.assertEqual(select_papers(self.conn, ('Question_Number',), 'Physics', topics=['Atoms']), [])
+
+    def test_unknown_columns_are_rejected(self):
+        with self.assertRaises(ValueError):
+            select_papers(self.conn, ('Question', 'answer_key'), 'Physics')
+
+    def test_filter_papers_keeps_the_past_papers_layout(self):
+        rows = filter_papers(self.conn, 'Chemistry', [2021], ['May/June'], ['Easy'], ['Atoms'], [], [1], ['11'])
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(len(rows[0]), len(PAPER_COLUMNS))
+        self.assertEqual(rows[0][PAPER_COLUMNS.index('Answer')], 'A')
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+import importlib.util
+import os
+import shutil
+import tempfile
+import unittest
+
+if importlib.util.find_spec("fitz") is None or importlib.util.find_spec("PIL") is None:
+    raise unittest.SkipTest("PyMuPDF and Pillow are not installed")
+
+from asset_index import open_index
+from prerender import pending_sources, prune_missing, store_rows
+
+class AssetIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.index = open_index(os.path.join(self.folder, "asset_index.db"))
+        self.sources = []
+        for number in range(2):
+            source = os.path.join(self.folder, f"{number}.pdf")
+            with open(source, "wb") as f:
+                f.write(b"%PDF")
+            self.sources.append(source)
+            self.bake(source)
+
+    def tearDown(self):
+        self.index.close()
+        shutil.rmtree(self.folder)
+
+    def bake(self, source, widths=(600, 1200)):
+        """Record a one-page PDF as baked at widths, with an image file per width."""
+        mtime_ns = os.stat(source).st_mtime_ns
+        rows = []
+        for width in widths:
+            image = f"{source}-w{width}.webp"
+            with open(image, "wb") as f:
+                f.write(b"RIFF")
+            rows.append((source, width, 0, mtime_ns, image, width, 4))
+        store_rows(self.index, source, rows)
+        self.index.commit()
+
+    def test_baked_pdfs_are_skipped_until_they_change(self):
+        self.assertEqual(pending_sources(self.index, self.sources, (600, 1200)), ([], 0))
+        os.utime(self.sources[1], ns=(0, 10 ** 9))
+        pending, missing = pending_sources(self.index, self.sources, (600, 1200))
+        self.assertEqual([source for source, _ in pending], [self.sources[1]])
+
+    def test_a_new_width_renders_everything_again(self):
+        pending, _ = pending_sources(self.index, self.sources, (600, 1200, 1800))
+        self.assertEqual(len(pending), 2)
+
+    def test_deleted_pdfs_are_pruned_with_their_images(self):
+        os.unlink(self.sources[0])
+        self.assertEqual(prune_missing(self.index), 1)
+        remaining = self.index.execute("SELECT DISTINCT source FROM rendered_pages").fetchall()
+        self.assertEqual(remaining, [(self.sources[1],)])
+        self.assertFalse(os.path.exists(f"{self.sources[0]}-w600.webp"))
+        self.assertTrue(os.path.exists(f"{self.sources[1]}-w600.webp"))
+        self.assertEqual(prune_missing(self.index), 0)
+
+if __name__ == "__main__":
+    unittest.main()
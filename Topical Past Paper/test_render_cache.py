@@ -0,0 +1,114 @@
+import importlib.util
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+if importlib.util.find_spec("fitz") is None or importlib.util.find_spec("PIL") is None:
+    raise unittest.SkipTest("PyMuPDF and Pillow are not installed")
+
+import render_cache
+from render_cache import RenderCache
+
+def fake_render(pdf_path, zoom=2, profile=None):
+    """Stand-in for render_pages: two 'pages' of 100 bytes named after the file."""
+    name = os.path.basename(pdf_path).encode("ascii")
+    return (name.ljust(100, b"."), name.ljust(100, b"!"))
+
+class RenderCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.directory = os.path.join(self.folder, "cache")
+        self.pdfs = []
+        for number in range(3):
+            path = os.path.join(self.folder, f"{number}.pdf")
+            with open(path, "wb") as f:
+                f.write(b"%PDF")
+            self.pdfs.append(path)
+        patcher = mock.patch.object(render_cache, "render_pages", side_effect=fake_render)
+        self.render = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_repeated_requests_hit_memory(self):
+        cache = RenderCache(self.directory)
+        self.assertEqual(cache.get_pages(self.pdfs[0]), fake_render(self.pdfs[0]))
+        self.assertEqual(cache.get_pages(self.pdfs[0]), fake_render(self.pdfs[0]))
+        self.assertEqual((cache.stats()['renders'], cache.stats()['memory_hits']), (1, 1))
+
+    def test_a_new_process_reads_the_directory(self):
+        RenderCache(self.directory).get_pages(self.pdfs[0])
+        cache = RenderCache(self.directory)
+        self.assertEqual(cache.get_pages(self.pdfs[0]), fake_render(self.pdfs[0]))
+        self.assertEqual((cache.stats()['renders'], cache.stats()['disk_hits']), (0, 1))
+
+    def test_an_edited_pdf_is_rendered_again(self):
+        cache = RenderCache(self.directory)
+        cache.get_pages(self.pdfs[0])
+        with open(self.pdfs[0], "ab") as f:
+            f.write(b"edited")
+        cache.get_pages(self.pdfs[0])
+        self.assertEqual(cache.stats()['renders'], 2)
+
+    def test_memory_tier_evicts_the_least_recently_used_document(self):
+        cache = RenderCache(self.directory, memory_bytes=450)  # two documents of 200 bytes
+        cache.get_pages(self.pdfs[0])
+        cache.get_pages(self.pdfs[1])
+        cache.get_pages(self.pdfs[0])
+        cache.get_pages(self.pdfs[2])
+        self.assertEqual(cache.stats()['evictions'], 1)
+        self.assertEqual(cache.stats()['documents'], 2)
+        cache.get_pages(self.pdfs[0])
+        self.assertEqual(cache.stats()['memory_hits'], 2)
+
+    def test_directory_evicts_the_least_recently_used_document(self):
+        cache = RenderCache(self.directory, disk_bytes=500)  # two documents of about 200 bytes
+        cache.get_pages(self.pdfs[0])
+        cache.get_pages(self.pdfs[1])
+        # Make document 0 the older one even on a coarse-grained file system
+        old = time.time() - 60
+        key = cache.document_key(self.pdfs[0], 2)
+        for _, _, files in cache.disk_entries():
+            for path in files:
+                if os.path.basename(path).startswith(key):
+                    os.utime(path, (old, old))
+        cache.get_pages(self.pdfs[2])
+        self.assertEqual(cache.stats()['disk_evictions'], 1)
+        self.assertEqual(len(cache.disk_entries()), 2)
+
+        fresh = RenderCache(self.directory)
+        fresh.get_pages(self.pdfs[0])
+        fresh.get_pages(self.pdfs[1])
+        self.assertEqual((fresh.stats()['renders'], fresh.stats()['disk_hits']), (1, 1))
+
+    def test_concurrent_requests_share_one_render(self):
+        cache = RenderCache(self.directory)
+        started = threading.Event()
+        release = threading.Event()
+
+        def slow_render(*args):
+            started.set()
+            release.wait(5)
+            return fake_render(*args)
+
+        self.render.side_effect = slow_render
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(cache.get_pages(self.pdfs[0])))
+                   for _ in range(4)]
+        threads[0].start()
+        started.wait(5)
+        for thread in threads[1:]:
+            thread.start()
+        release.set()
+        for thread in threads:
+            thread.join(5)
+        self.assertEqual(results, [fake_render(self.pdfs[0])] * 4)
+        self.assertEqual(self.render.call_count, 1)
+
+if __name__ == "__main__":
+    unittest.main()
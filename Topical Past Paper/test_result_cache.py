@@ -0,0 +1,77 @@
+import threading
+import unittest
+
+from result_cache import ResultCache, canonical_values
+
+class CanonicalValuesTest(unittest.TestCase):
+    def test_empty_selections_share_one_key(self):
+        self.assertEqual({canonical_values(None), canonical_values(''), canonical_values([])}, {()})
+
+    def test_order_duplicates_and_affinity_do_not_matter(self):
+        self.assertEqual(canonical_values([2022, '2021', 2022]), canonical_values(['2021', '2022']))
+        self.assertEqual(canonical_values(2021), ('2021',))
+
+class ResultCacheTest(unittest.TestCase):
+    def test_hits_skip_the_computation(self):
+        cache = ResultCache()
+        calls = []
+        for _ in range(3):
+            self.assertEqual(cache.get_or_compute('key', lambda: calls.append(1) or 'value'), 'value')
+        self.assertEqual(len(calls), 1)
+        self.assertEqual((cache.stats()['hits'], cache.stats()['misses']), (2, 1))
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = ResultCache(max_entries=2)
+        cache.get_or_compute('a', lambda: 1)
+        cache.get_or_compute('b', lambda: 2)
+        cache.get_or_compute('a', lambda: 1)  # 'b' is now the least recently used
+        cache.get_or_compute('c', lambda: 3)
+        self.assertEqual(cache.get_or_compute('a', lambda: 'recomputed'), 1)
+        self.assertEqual(cache.get_or_compute('b', lambda: 'recomputed'), 'recomputed')
+        self.assertEqual(cache.stats()['evictions'], 2)
+
+    def test_expired_entries_are_recomputed(self):
+        cache = ResultCache(ttl=-1)
+        cache.get_or_compute('key', lambda: 'old')
+        self.assertEqual(cache.get_or_compute('key', lambda: 'new'), 'new')
+        self.assertEqual(cache.stats()['expirations'], 1)
+
+    def test_a_new_signature_empties_the_cache(self):
+        cache = ResultCache()
+        cache.get_or_compute('key', lambda: 'old', signature=1)
+        self.assertEqual(cache.get_or_compute('key', lambda: 'new', signature=2), 'new')
+        self.assertEqual(cache.stats()['invalidations'], 1)
+
+    def test_a_failed_computation_is_not_cached(self):
+        cache = ResultCache()
+        with self.assertRaises(ValueError):
+            cache.get_or_compute('key', lambda: int('x'))
+        self.assertEqual(cache.get_or_compute('key', lambda: 'value'), 'value')
+
+    def test_concurrent_misses_wait_for_one_computation(self):
+        cache = ResultCache()
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def compute():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return 'value'
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(cache.get_or_compute('key', compute)))
+                   for _ in range(4)]
+        threads[0].start()
+        started.wait(5)
+        for thread in threads[1:]:
+            thread.start()
+        release.set()
+        for thread in threads:
+            thread.join(5)
+        self.assertEqual(results, ['value'] * 4)
+        self.assertEqual(len(calls), 1)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,97 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+
+from worksheet_cache import WorksheetCache
+
+def merge(question_paths, answer_paths):
+    """Stand-in for pdf_utils.merge_pdfs: 100 bytes per document, named after its files."""
+    return (",".join(question_paths).encode("utf-8").ljust(100, b"."),
+            ",".join(answer_paths).encode("utf-8").ljust(100, b"."))
+
+class WorksheetCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.directory = os.path.join(self.folder, "cache")
+        self.questions = []
+        for number in range(4):
+            path = os.path.join(self.folder, f"{number}.pdf")
+            with open(path, "wb") as f:
+                f.write(b"%PDF")
+            self.questions.append(path)
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_the_same_worksheet_is_merged_once(self):
+        cache = WorksheetCache(self.directory)
+        calls = []
+
+        def counting_merge(questions, answers):
+            calls.append(1)
+            return merge(questions, answers)
+
+        first = cache.get_or_merge(self.questions[:2], ["B", "C"], counting_merge)
+        self.assertEqual(cache.get_or_merge(self.questions[:2], ["B", "C"], counting_merge), first)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual((cache.stats()['hits'], cache.stats()['misses']), (1, 1))
+
+    def test_order_and_edits_change_the_address(self):
+        cache = WorksheetCache(self.directory)
+        key = cache.key(self.questions[:2], [])
+        self.assertNotEqual(cache.key(self.questions[1::-1], []), key)
+        with open(self.questions[0], "ab") as f:
+            f.write(b"edited")
+        self.assertNotEqual(cache.key(self.questions[:2], []), key)
+
+    def test_empty_merges_are_not_cached(self):
+        cache = WorksheetCache(self.directory)
+        cache.get_or_merge(self.questions[:1], [], lambda questions, answers: (b"", b""))
+        self.assertEqual(cache.stats()['worksheets'], 0)
+
+    def test_least_recently_used_worksheets_are_evicted(self):
+        cache = WorksheetCache(self.directory, max_bytes=450)  # two worksheets of 200 bytes
+        cache.get_or_merge(self.questions[:1], [], merge)
+        cache.get_or_merge(self.questions[1:2], [], merge)
+        # Make the first worksheet the older one even on a coarse-grained file system
+        old = time.time() - 60
+        key = cache.key(self.questions[:1], [])
+        for _, _, files in cache.entries():
+            for path in files:
+                if os.path.basename(path).startswith(key):
+                    os.utime(path, (old, old))
+        cache.get_or_merge(self.questions[2:3], [], merge)
+        self.assertEqual(cache.stats()['evictions'], 1)
+        self.assertIsNone(cache.get(key))
+        self.assertIsNotNone(cache.get(cache.key(self.questions[1:2], [])))
+
+    def test_concurrent_requests_share_one_merge(self):
+        cache = WorksheetCache(self.directory)
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def slow_merge(questions, answers):
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return merge(questions, answers)
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(cache.get_or_merge(self.questions, [], slow_merge)))
+                   for _ in range(4)]
+        threads[0].start()
+        started.wait(5)
+        for thread in threads[1:]:
+            thread.start()
+        release.set()
+        for thread in threads:
+            thread.join(5)
+        self.assertEqual(results, [merge(self.questions, [])] * 4)
+        self.assertEqual(len(calls), 1)
+
+if __name__ == "__main__":
+    unittest.main()
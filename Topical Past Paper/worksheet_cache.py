@@ -0,0 +1,187 @@
+import hashlib
+import os
+import tempfile
+import threading
+
+DEFAULT_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".worksheet_cache")
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+class WorksheetCache:
+    """
+    Disk cache of merged worksheets, shared by every session and process of the app.
+
+    A worksheet is addressed by its ordered list of question and answer files together
+    with each file's modification time and size, so regenerating the same selection in
+    the same order is served from disk, and editing any input PDF is simply a new
+    address. Entries are never modified once written: each request reads its own copy
+    of the bytes, so one session can never overwrite another's download. The directory
+    is kept under max_bytes by evicting the least recently used worksheets.
+    """
+    def __init__(self, directory=DEFAULT_DIRECTORY, max_bytes=512 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._pending = {}  # key -> threading.Event for merges in flight
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def key(self, question_paths, answer_paths):
+        """Return the content address of a worksheet; changes whenever an input file does."""
+        digest = hashlib.sha1()
+        for path in list(question_paths) + ["\0answers"] + list(answer_paths):
+            try:
+                stat = os.stat(path)
+                identity = f"{path}\0{stat.st_mtime_ns}\0{stat.st_size}\n"
+            except (OSError, TypeError, ValueError):
+                identity = f"{path}\0missing\n"  # MCQ answer letters and files not generated yet
+            digest.update(identity.encode("utf-8"))
+        return digest.hexdigest()
+
+    def _files(self, key):
+        folder = os.path.join(self.directory, key[:2])
+        return os.path.join(folder, f"{key}-questions.pdf"), os.path.join(folder, f"{key}-answers.pdf")
+
+    def _read(self, key):
+        try:
+            documents = []
+            for path in self._files(key):
+                with open(path, "rb") as f:
+                    documents.append(f.read())
+                os.utime(path)  # Mark as recently used for eviction
+        except OSError:
+            return None
+        return tuple(documents)
+
+    def get(self, key):
+        """Return (question PDF bytes, answer PDF bytes), or None if the worksheet is not cached."""
+        documents = self._read(key)
+        with self._lock:
+            if documents is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return documents
+
+    def _write_file(self, path, data):
+        """Write through a temporary file so readers never see a partial PDF."""
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(temp_path, path)
+        except OSError:
+            os.unlink(temp_path)
+            raise
+
+    def put(self, key, question_pdf, answer_pdf):
+        """Store a merged worksheet and evict old ones beyond the size cap."""
+        question_file, answer_file = self._files(key)
+        try:
+            os.makedirs(os.path.dirname(question_file), exist_ok=True)
+            self._write_file(answer_file, answer_pdf)
+            self._write_file(question_file, question_pdf)
+        except OSError:
+            return  # A read-only or full disk only costs the cache
+        self.evict()
+
+    def entries(self):
+        """Return (last used, bytes, files) for every cached worksheet."""
+        entries = {}
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                if not name.endswith(".pdf"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                key = name.rsplit("-", 1)[0]
+                used, size, files = entries.get(key, (0, 0, []))
+                entries[key] = (max(used, stat.st_mtime), size + stat.st_size, files + [path])
+        return list(entries.values())
+
+    def evict(self):
+        """Delete the least recently used worksheets until the directory fits max_bytes."""
+        with self._lock:
+            entries = sorted(self.entries())
+            total = sum(size for _, size, _ in entries)
+            for _, size, files in entries:
+                if total <= self.max_bytes:
+                    break
+                for path in files:
+                    try:
+                        os.unlink(path)
+                    except OSError:
+                        pass
+                total -= size
+                self.evictions += 1
+
+    def get_or_merge(self, question_paths, answer_paths, merge):
+        """
+        Return the worksheet from the cache, or build it with merge(question_paths, answer_paths)
+        and store it. Worksheets where either PDF came back empty are not cached.
+
+        A request for a worksheet that another session is already merging waits for that
+        merge and reads its copy instead of starting a second one.
+        """
+        key = self.key(question_paths, answer_paths)
+        while True:
+            documents = self._read(key)
+            with self._lock:
+                if documents is not None:
+                    self.hits += 1
+                    return documents
+                pending = self._pending.get(key)
+                if pending is None:
+                    pending = self._pending[key] = threading.Event()
+                    break
+            # Another session is merging this worksheet; wait and look again
+            pending.wait()
+
+        try:
+            # The previous merge may have finished between the read and taking the key
+            documents = self._read(key)
+            if documents is not None:
+                with self._lock:
+                    self.hits += 1
+                return documents
+            with self._lock:
+                self.misses += 1
+            question_pdf, answer_pdf = merge(question_paths, answer_paths)
+            if question_pdf and answer_pdf:
+                self.put(key, question_pdf, answer_pdf)
+            return question_pdf, answer_pdf
+        finally:
+            with self._lock:
+                del self._pending[key]
+            pending.set()
+
+    def stats(self):
+        """Return hit counters and the size of the directory."""
+        entries = self.entries()
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'worksheets': len(entries),
+                'bytes': sum(size for _, size, _ in entries),
+                'max_bytes': self.max_bytes,
+                'evictions': self.evictions,
+            }
+
+def get_worksheet_cache(directory=DEFAULT_DIRECTORY, **options):
+    """Return the process-wide worksheet cache for a directory, creating it on first use."""
+    key = (os.path.abspath(directory), tuple(sorted(options.items())))
+    cache = _caches.get(key)
+    if cache is None:
+        with _caches_lock:
+            cache = _caches.get(key)
+            if cache is None:
+                cache = _caches[key] = WorksheetCache(directory, **options)
+    return cache
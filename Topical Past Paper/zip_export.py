@@ -0,0 +1,46 @@
+import os
+import shutil
+import zipfile
+from io import BytesIO
+
+CHUNK_SIZE = 1024 * 1024
+
+def build_zip(members):
+    """
+    Build a ZIP archive in memory and return its bytes.
+
+    members is an iterable of (name in the archive, data), where data is either the
+    bytes of an in-memory document (e.g. a merge result) or the path of a file, which
+    is streamed into the archive in chunks. Paths that do not exist, such as MCQ answer
+    letters, are skipped. PDFs are already compressed, so members are stored as they
+    are (ZIP_STORED): deflating them would cost CPU for almost no saving.
+
+    The archive is the only copy that is built; BytesIO.getvalue() hands over its
+    buffer without copying it, and the bytes can go straight to st.download_button.
+    """
+    buffer = BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_STORED) as zip_file:
+        for name, data in members:
+            if isinstance(data, (bytes, bytearray, memoryview)):
+                zip_file.writestr(name, data)
+            elif data and os.path.isfile(data):
+                with open(data, "rb") as source, zip_file.open(name, "w") as target:
+                    shutil.copyfileobj(source, target, CHUNK_SIZE)
+    return buffer.getvalue()
+
+def member_name(pdf_path, index, folder):
+    """
+    Name a single question's PDF inside the archive, e.g.
+    'questions/007_9709_2020_May_June_12_3.pdf' for the 7th question of the worksheet.
+    The numbering keeps the worksheet order; the session and paper keep names unique.
+    """
+    parts = os.path.normpath(pdf_path).split(os.sep)[-5:]
+    return f"{folder}/{index:03d}_{'_'.join(parts)}"
+
+def file_members(pdf_paths, folder):
+    """Return (name, path) members for the PDFs of a worksheet, numbered in order."""
+    return [
+        (member_name(pdf_path, index, folder), pdf_path)
+        for index, pdf_path in enumerate(pdf_paths, start=1)
+        if pdf_path and pdf_path.lower().endswith(".pdf")
+    ]